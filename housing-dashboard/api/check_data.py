@@ -43,7 +43,7 @@ def main():
             # Check major cities
             cities_query = text("""
                 SELECT DISTINCT region_name 
-                FROM zillow_housing 
+                FROM regions 
                 WHERE LOWER(region_name) LIKE '%new york%'
                    OR LOWER(region_name) LIKE '%los angeles%'
                    OR LOWER(region_name) LIKE '%chicago%'
@@ -65,6 +65,7 @@ def main():
                        MIN(date) as min_date,
                        MAX(date) as max_date
                 FROM zillow_housing
+                JOIN regions USING (region_id)
                 WHERE region_name IN ('NY-New York', 'CA-Los Angeles', 'IL-Chicago', 'TX-Dallas', 'FL-Miami')
                 GROUP BY region_name
                 ORDER BY region_name;
@@ -85,6 +86,7 @@ def main():
                     price,
                     date
                 FROM zillow_housing
+                JOIN regions USING (region_id)
                 WHERE region_name IN ('New York', 'Los Angeles', 'Chicago', 'Dallas', 'Miami')
                 AND date = (SELECT MAX(date) FROM zillow_housing)
                 ORDER BY region_name;
@@ -4,10 +4,9 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
-from typing import Dict, List
+import time
+from typing import Dict
 from datetime import datetime
-import numpy as np
-import json
 import logging
 
 # Configure logging
@@ -22,6 +21,36 @@ load_dotenv()
 
 app = FastAPI(title="Housing Market Analysis API")
 
+# Dashboard markets (regions.region_name)
+MARKETS = ['New York', 'Los Angeles', 'Chicago', 'Dallas', 'Miami']
+
+# region_name -> region_id, cached per process. Ids are assigned by the database
+# and change when regions is dropped and reloaded, so the cache is refreshed
+# after REGION_IDS_TTL seconds, or on a miss (a market not resolved yet)
+REGION_IDS_TTL = 300
+_region_ids: Dict[str, int] = {}
+_region_ids_loaded_at = 0.0
+
+def get_region_ids(engine) -> Dict[str, int]:
+    """Region ids of the dashboard markets, looked up in regions on a miss or once the cache expires"""
+    global _region_ids, _region_ids_loaded_at
+    expired = time.monotonic() - _region_ids_loaded_at > REGION_IDS_TTL
+    if expired or any(market not in _region_ids for market in MARKETS):
+        query = text("SELECT region_name, region_id FROM regions WHERE region_name = ANY(:names)")
+        df = pd.read_sql(query, engine, params={'names': MARKETS})
+        _region_ids = dict(zip(df['region_name'], df['region_id'].astype(int)))
+        _region_ids_loaded_at = time.monotonic()
+        logger.debug(f"Resolved region ids: {_region_ids}")
+    return _region_ids
+
+def market_columns(region_ids: Dict[str, int], aggregate: str, column: str, suffix: str = '') -> str:
+    """One pivoted SELECT expression per market, NULL for markets missing from regions"""
+    return ',\n'.join(
+        f'{aggregate}(CASE WHEN region_id = {region_ids[market]} THEN {column} END) as "{market}{suffix}"'
+        if market in region_ids else f'NULL as "{market}{suffix}"'
+        for market in MARKETS
+    )
+
 @app.get("/")
 def read_root():
     return {
@@ -127,18 +156,15 @@ async def get_rental_trends():
     try:
         logger.info("Attempting to fetch current market trends data...")
         engine = get_db_connection()
-        query = text("""
+        region_ids = get_region_ids(engine)
+        query = text(f"""
             SELECT
                 TO_CHAR(date, 'YYYY-MM') as date,
-                AVG(CASE WHEN region_name = 'New York' THEN price_mom * 100 END) as "New York",
-                AVG(CASE WHEN region_name = 'Los Angeles' THEN price_mom * 100 END) as "Los Angeles",
-                AVG(CASE WHEN region_name = 'Chicago' THEN price_mom * 100 END) as "Chicago",
-                AVG(CASE WHEN region_name = 'Dallas' THEN price_mom * 100 END) as "Dallas",
-                AVG(CASE WHEN region_name = 'Miami' THEN price_mom * 100 END) as "Miami"
+                {market_columns(region_ids, 'AVG', 'price_mom * 100')}
             FROM 
                 zillow_housing
             WHERE
-                region_name IN ('New York', 'Los Angeles', 'Chicago', 'Dallas', 'Miami')
+                region_id = ANY(:region_ids)
                 AND price_mom IS NOT NULL
             GROUP BY
                 date
@@ -146,7 +172,7 @@ async def get_rental_trends():
                 date;
         """)
         logger.debug(f"Executing current market trends query: {query}")
-        df = pd.read_sql(query, engine)
+        df = pd.read_sql(query, engine, params={'region_ids': list(region_ids.values())})
         logger.info(f"Query executed successfully. Row count: {len(df)}")
         logger.debug(f"DataFrame head: \n{df.head()}")
 
@@ -175,19 +201,16 @@ async def get_rental_growth():
     try:
         logger.info("Fetching current market growth rates data...")
         engine = get_db_connection()
-        query = text("""
+        region_ids = get_region_ids(engine)
+        query = text(f"""
             WITH monthly_data AS (
                 SELECT 
                     date_trunc('month', date) as month_date,
-                    MAX(CASE WHEN region_name = 'New York' THEN price_yoy * 100 END) as "New York_YoY",
-                    MAX(CASE WHEN region_name = 'Los Angeles' THEN price_yoy * 100 END) as "Los Angeles_YoY",
-                    MAX(CASE WHEN region_name = 'Chicago' THEN price_yoy * 100 END) as "Chicago_YoY",
-                    MAX(CASE WHEN region_name = 'Dallas' THEN price_yoy * 100 END) as "Dallas_YoY",
-                    MAX(CASE WHEN region_name = 'Miami' THEN price_yoy * 100 END) as "Miami_YoY"
+                    {market_columns(region_ids, 'MAX', 'price_yoy * 100', '_YoY')}
                 FROM 
                     zillow_housing
                 WHERE
-                    region_name IN ('New York', 'Los Angeles', 'Chicago', 'Dallas', 'Miami')
+                    region_id = ANY(:region_ids)
                     AND price_yoy IS NOT NULL
                 GROUP BY 
                     date_trunc('month', date)
@@ -205,7 +228,7 @@ async def get_rental_growth():
                 month_date;
         """)
         logger.debug(f"Executing current market growth rates query: {query}")
-        df = pd.read_sql(query, engine)
+        df = pd.read_sql(query, engine, params={'region_ids': list(region_ids.values())})
         logger.info(f"Query executed successfully")
         logger.debug(f"DataFrame columns: {df.columns.tolist()}")
         logger.debug(f"DataFrame shape: {df.shape}")
@@ -235,25 +258,23 @@ async def get_rental_heatmap():
     try:
         logger.info("Fetching current market heatmap data...")
         engine = get_db_connection()
-        query = text("""
+        region_ids = get_region_ids(engine)
+        query = text(f"""
             SELECT 
                 TO_CHAR(date, 'YYYY-MM') as date,
-                MAX(CASE WHEN region_name = 'New York' THEN price_yoy * 100 END) as "New York_YoY",
-                MAX(CASE WHEN region_name = 'Los Angeles' THEN price_yoy * 100 END) as "Los Angeles_YoY",
-                MAX(CASE WHEN region_name = 'Chicago' THEN price_yoy * 100 END) as "Chicago_YoY",
-                MAX(CASE WHEN region_name = 'Dallas' THEN price_yoy * 100 END) as "Dallas_YoY",
-                MAX(CASE WHEN region_name = 'Miami' THEN price_yoy * 100 END) as "Miami_YoY"
+                {market_columns(region_ids, 'MAX', 'price_yoy * 100', '_YoY')}
             FROM 
                 zillow_housing
             WHERE
-                date = (SELECT MAX(date) FROM zillow_housing)
-                AND region_name IN ('New York', 'Los Angeles', 'Chicago', 'Dallas', 'Miami')
+                -- Latest month of the markets, found through the (region_id, date) key
+                date = (SELECT MAX(date) FROM zillow_housing WHERE region_id = ANY(:region_ids))
+                AND region_id = ANY(:region_ids)
                 AND price_yoy IS NOT NULL
             GROUP BY 
                 date;
         """)
         logger.debug(f"Executing current market heatmap query: {query}")
-        df = pd.read_sql(query, engine)
+        df = pd.read_sql(query, engine, params={'region_ids': list(region_ids.values())})
         if len(df) == 0:
             logger.warning("No current market heatmap data found")
             raise HTTPException(status_code=404, detail="No current market heatmap data found")
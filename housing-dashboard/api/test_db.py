@@ -25,7 +25,7 @@ def main():
                 SELECT COUNT(*) as count, 
                        MIN(date) as min_date, 
                        MAX(date) as max_date,
-                       COUNT(DISTINCT region_name) as regions
+                       COUNT(DISTINCT region_id) as regions
                 FROM zillow_housing;
             """))
             row = result.fetchone()
@@ -37,8 +37,9 @@ def main():
             # Sample some actual data
             print("\nSample data from zillow_housing:")
             result = conn.execute(text("""
-                SELECT date, region_name, price, price_yoy
-                FROM zillow_housing
+                SELECT z.date, r.region_name, z.price, z.price_yoy
+                FROM zillow_housing z
+                JOIN regions r USING (region_id)
                 LIMIT 5;
             """))
             for row in result:
@@ -0,0 +1,292 @@
+import argparse
+import io
+import json
+import multiprocessing
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from registry import DATASETS
+from load_to_db import DatabaseLoader
+from validation import SchemaValidator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Approximate row counts of the current data/ files; scale factors multiply these.
+# The small regions dimension (unique names) is not benchmarked
+BASE_ROWS = {
+    'bls_housing_cpi': 130,
+    'census_housing': 30,
+    'kaggle_housing_prices': 290,
+    'wages_education': 1000,
+    'interest_rates': 900,
+    'zillow_housing': 50000,
+    'zillow_home_value_index': 15000
+}
+
+DEFAULT_SCALES = [1, 10, 100]
+
+# Distinct values for every unique-key column after the first
+KEY_CARDINALITY = 25
+
+BENCH_PREFIX = 'bench_'
+
+
+def synthetic_frame(table_name, rows, constraints, seed=0):
+    """
+    Generate a load-ready DataFrame shaped like a registry table.
+
+    Unique-key columns are derived from the row number so every row is unique;
+    numeric values stay within each column's precision and scale.
+
+    Args:
+        table_name (str): Registry table to imitate.
+        rows (int): Number of rows to generate.
+        constraints (dict): Column constraints from SchemaValidator.constraints.
+        seed (int): Random seed.
+    Returns:
+        pd.DataFrame: Frame with the table's load_columns.
+    """
+    spec = DATASETS[table_name]
+    rng = np.random.default_rng(seed)
+    row_ids = np.arange(rows)
+    data = {}
+
+    # First key varies slowest, later keys cycle through KEY_CARDINALITY values
+    keys = spec['unique_keys']
+    remaining = row_ids.copy()
+    key_values = {}
+    for key in reversed(keys[1:]):
+        key_values[key] = remaining % KEY_CARDINALITY
+        remaining = remaining // KEY_CARDINALITY
+    key_values[keys[0]] = remaining
+
+    for column in spec['load_columns']:
+        info = constraints[column]
+        data_type = info['data_type']
+        if column in key_values:
+            ids = key_values[column]
+            if data_type == 'date':
+                data[column] = np.datetime64('1900-01-01') + ids.astype('timedelta64[D]')
+            elif data_type == 'integer':
+                data[column] = 1900 + ids
+            else:
+                data[column] = pd.Series(ids).map(lambda i, col=column: f'{col}_{i}').to_numpy()
+        elif data_type == 'numeric':
+            scale = info['scale'] or 0
+            limit = 10.0 ** (info['precision'] - scale)
+            values = rng.uniform(-limit / 10, limit / 10, rows).round(scale)
+            values[rng.random(rows) < 0.01] = np.nan
+            data[column] = values
+        elif data_type == 'integer':
+            data[column] = rng.integers(0, 10_000_000, rows)
+        elif data_type == 'date':
+            data[column] = np.datetime64('2000-01-01') + rng.integers(0, 9000, rows).astype('timedelta64[D]')
+        else:
+            labels = np.array([f'{column}_{i}' for i in range(50)], dtype=object)
+            data[column] = labels[rng.integers(0, len(labels), rows)]
+    return pd.DataFrame(data)
+
+
+def load_copy_stringio(conn, df, table_name, columns, unique_keys):
+    """COPY via an in-memory CSV buffer, as DatabaseLoader.copy_from_stringio does"""
+    stages = {}
+    start = time.perf_counter()
+    output = io.StringIO()
+    df[columns].to_csv(output, sep='\t', header=False, index=False)
+    output.seek(0)
+    stages['serialize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        columns_str = ', '.join([f'"{col}"' for col in columns])
+        cur.copy_expert(
+            f"COPY public.{table_name} ({columns_str}) FROM STDIN WITH CSV DELIMITER E'\\t' NULL ''",
+            output
+        )
+    stages['copy'] = time.perf_counter() - start
+    return stages
+
+
+def _load_execute_values(conn, df, table_name, columns, unique_keys, page_size):
+    """Upsert with execute_values, as load_to_supabase_improved.upsert_data does"""
+    stages = {}
+    start = time.perf_counter()
+    data = df[columns].astype(object).where(df[columns].notna(), None).values.tolist()
+    stages['serialize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns_str = ', '.join([f'"{col}"' for col in columns])
+    unique_cols_str = ', '.join([f'"{col}"' for col in unique_keys])
+    update_str = ', '.join([f'"{col}" = EXCLUDED."{col}"' for col in columns if col not in unique_keys])
+    query = f"""
+        INSERT INTO public.{table_name} ({columns_str})
+        VALUES %s
+        ON CONFLICT ({unique_cols_str})
+        DO UPDATE SET {update_str}
+    """
+    with conn.cursor() as cur:
+        execute_values(cur, query, data, template=None, page_size=page_size)
+    stages['execute'] = time.perf_counter() - start
+    return stages
+
+
+def load_execute_values(conn, df, table_name, columns, unique_keys):
+    """execute_values with the loader's current page_size=100"""
+    return _load_execute_values(conn, df, table_name, columns, unique_keys, page_size=100)
+
+
+def load_execute_values_large_pages(conn, df, table_name, columns, unique_keys):
+    """execute_values with page_size=10000, to show the cost of round trips"""
+    return _load_execute_values(conn, df, table_name, columns, unique_keys, page_size=10000)
+
+
+STRATEGIES = {
+    'copy_stringio': load_copy_stringio,
+    'execute_values': load_execute_values,
+    'execute_values_10k': load_execute_values_large_pages
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+
+
+def run_case(table_name, strategy, scale, result_queue):
+    """Run one (table, strategy, scale) case in a fresh process so peak RSS is per case"""
+    try:
+        loader = DatabaseLoader()
+        spec = DATASETS[table_name]
+        bench_table = f'{BENCH_PREFIX}{table_name}'
+        rows = BASE_ROWS[table_name] * scale
+
+        with loader.get_connection() as conn:
+            constraints = SchemaValidator(conn).constraints(table_name)
+
+            start = time.perf_counter()
+            df = synthetic_frame(table_name, rows, constraints)
+            generate_time = time.perf_counter() - start
+
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{bench_table}")
+                cur.execute(f"CREATE TABLE public.{bench_table} (LIKE public.{table_name} INCLUDING ALL)")
+                # LIKE copies the SERIAL default, which would advance the live table's sequence
+                if 'id' in constraints:
+                    cur.execute(f"ALTER TABLE public.{bench_table} ALTER COLUMN id DROP DEFAULT")
+                    cur.execute(f"ALTER TABLE public.{bench_table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+            conn.commit()
+
+            try:
+                start = time.perf_counter()
+                stages = STRATEGIES[strategy](conn, df, bench_table, spec['load_columns'], spec['unique_keys'])
+                commit_start = time.perf_counter()
+                conn.commit()
+                stages['commit'] = time.perf_counter() - commit_start
+                total = time.perf_counter() - start
+            finally:
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE IF EXISTS public.{bench_table}")
+                conn.commit()
+
+        result_queue.put({
+            'table': table_name,
+            'strategy': strategy,
+            'scale': scale,
+            'rows': rows,
+            'generate_seconds': round(generate_time, 4),
+            'stages': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+            'total_seconds': round(total, 4),
+            'rows_per_second': round(rows / total, 1) if total > 0 else None,
+            'peak_rss_mb': peak_rss_mb()
+        })
+    except Exception as e:
+        result_queue.put({'table': table_name, 'strategy': strategy, 'scale': scale, 'error': str(e)})
+
+
+def run_benchmarks(tables, strategies, scales):
+    """Run every case, each in its own process, and return the list of results"""
+    results = []
+    result_queue = multiprocessing.Queue()
+    for scale in scales:
+        for table_name in tables:
+            for strategy in strategies:
+                print(f"{table_name} x{scale} via {strategy}...", end=' ', flush=True)
+                process = multiprocessing.Process(target=run_case, args=(table_name, strategy, scale, result_queue))
+                process.start()
+                result = result_queue.get()
+                process.join()
+                results.append(result)
+                if 'error' in result:
+                    print(f"error: {result['error']}")
+                else:
+                    print(f"{result['rows_per_second']} rows/s, {result['total_seconds']}s, "
+                          f"peak RSS {result['peak_rss_mb']} MB")
+    return results
+
+
+def compare_results(results, baseline_path, threshold=0.2):
+    """Print cases whose rows/sec dropped by more than threshold versus a baseline results file"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r['table'], r['strategy'], r['scale']): r
+            for r in json.load(f)['results'] if 'error' not in r
+        }
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['table'], result['strategy'], result['scale']))
+        if previous is None or 'error' in result:
+            continue
+        change = result['rows_per_second'] / previous['rows_per_second'] - 1
+        if change < -threshold:
+            regressions.append((result, change))
+
+    if regressions:
+        print(f"\nRegressions versus {baseline_path}:")
+        for result, change in regressions:
+            print(f"  {result['table']} x{result['scale']} via {result['strategy']}: {change:+.0%} rows/s")
+    else:
+        print(f"\nNo regressions versus {baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark load strategies against a local Postgres')
+    parser.add_argument('--tables', nargs='+', choices=list(BASE_ROWS), default=list(BASE_ROWS))
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES)
+    parser.add_argument('--output', default='benchmarks/load_benchmark.json', help='Results JSON file')
+    parser.add_argument('--baseline', help='Previous results JSON to compare rows/sec against')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.tables, args.strategies, args.scales)
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({
+            'run_time': datetime.now().isoformat(),
+            'pandas_version': pd.__version__,
+            'base_rows': BASE_ROWS,
+            'results': results
+        }, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
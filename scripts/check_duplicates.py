@@ -1,87 +1,232 @@
+import sys
+import argparse
+from pathlib import Path
+import numpy as np
 import pandas as pd
 
-def check_data_file(filepath, description):
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from storage import iter_frames, read_columns
+from schemas import iter_dataset
+
+CHUNK_ROWS = 100_000
+SAMPLE_GROUPS = 10
+SAMPLE_ROWS_PER_GROUP = 3
+
+# Date/id column of the wide Zillow HVI files: the first of these that is present
+HVI_ID_COLUMNS = ('index', 'Unnamed: 0', 'Date', 'date')
+
+# Key columns that must be unique in each dataset. A tuple lists alternative
+# names (the first one present is used). Wide files have one column per region:
+# every other column (except *_MoM changes) is a value column, so the keys are
+# really (id, column) pairs.
+DUPLICATE_CHECKS = {
+    'bls': {'path': 'data/bls/bls_housing_processed.csv', 'keys': ['date']},
+    'census': {'path': 'data/census/census_housing_processed.csv', 'keys': ['state', 'year']},
+    'kaggle_housing': {'path': 'data/kaggle/housing/kaggle_housing_processed.csv', 'keys': ['date']},
+    'wages': {'path': 'data/kaggle/wages/kaggle_wages_processed.csv', 'keys': ['Year']},
+    'interest_rates': {'path': 'data/kaggle/interest_rates/kaggle_interest_rates_processed.csv', 'keys': ['Date']},
+    'zillow': {'path': 'data/kaggle/zillow/kaggle_zillow_processed.csv', 'keys': ['Date', 'RegionName']},
+    'zillow_hvi': {'path': 'data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv',
+                   'keys': [HVI_ID_COLUMNS], 'wide': True},
+    'zillow_hvi_cleaned': {'path': 'data/cleaned/zillow_hvi_cleaned.csv',
+                           'keys': [HVI_ID_COLUMNS], 'wide': True}
+}
+
+
+class KeyCounter:
+    """
+    Occurrence count per distinct key hash, kept as sorted uint64/int64 arrays
+    (16 bytes per distinct key, independent of the number of rows).
+
+    Each block's hashes are reduced to unique values and counts; blocks are
+    merged into the main arrays once they add up to its size, so every key is
+    re-sorted O(log n) times in total.
+    """
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, hashes):
+        """Count one block of key hashes"""
+        unique, counts = np.unique(hashes, return_counts=True)
+        self._pending.append((unique, counts))
+        self._pending_size += len(unique)
+        if self._pending_size >= len(self.hashes):
+            self._merge()
+
+    def _merge(self):
+        if not self._pending:
+            return
+        hashes = np.concatenate([self.hashes] + [unique for unique, _ in self._pending])
+        counts = np.concatenate([self.counts] + [counts for _, counts in self._pending])
+        self.hashes, inverse = np.unique(hashes, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    def duplicates(self):
+        """(hashes, counts) of keys seen more than once, most frequent first"""
+        self._merge()
+        repeated = self.counts > 1
+        hashes, counts = self.hashes[repeated], self.counts[repeated]
+        order = np.argsort(-counts, kind='stable')
+        return hashes[order], counts[order]
+
+
+def hash_keys(df, keys):
+    """64-bit hash of each row's key tuple"""
+    return pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+
+
+def resolve_keys(path, keys):
+    """Replace tuples of alternative column names with the one present in the file"""
+    columns = read_columns(path)
+    resolved = []
+    for key in keys:
+        if isinstance(key, tuple):
+            present = [col for col in key if col in columns]
+            if not present:
+                raise KeyError(f"None of {', '.join(key)} found in {path}")
+            key = present[0]
+        elif key not in columns:
+            raise KeyError(f"{key} not found in {path}")
+        resolved.append(key)
+    return resolved, columns
+
+
+def find_duplicates(path, keys, wide=False, chunksize=CHUNK_ROWS,
+                    sample_groups=SAMPLE_GROUPS, sample_rows=SAMPLE_ROWS_PER_GROUP):
+    """
+    Find repeated key tuples in a file while streaming it, without melting or loading it whole.
+
+    The first pass reads only the key columns (as text, so every block hashes
+    the same way) and counts key hashes with a KeyCounter. A second pass is
+    made only if duplicates were found, to collect sample rows of the largest
+    groups. 64-bit hash collisions are possible in principle but vanishingly
+    unlikely at these sizes.
+
+    Args:
+        path (str): File to check (any storage format).
+        keys (list): Key columns; tuples list alternative names.
+        wide (bool): The file is wide (one value column per region), so each
+            repeated key row repeats an (id, column) pair for every value column.
+        chunksize (int): Rows per block.
+        sample_groups (int): Largest duplicate groups to sample.
+        sample_rows (int): Rows kept per sampled group.
+    Returns:
+        dict: 'keys', 'rows', 'columns', 'value_columns' (wide only), 'distinct_keys',
+            'duplicate_groups', 'duplicate_rows' (rows in repeated groups),
+            'duplicate_entries' (rows, or (id, column) pairs when wide) and 'groups'
+            (list of {'key', 'count', 'sample'} for the largest groups).
+    """
+    keys, columns = resolve_keys(path, keys)
+    key_types = {key: str for key in keys}
+    value_columns = [col for col in columns if col not in keys and not col.endswith('_MoM')] if wide else None
+
+    counter = KeyCounter()
+    rows = 0
+    for block in iter_frames(path, columns=keys, chunksize=chunksize, dtype=key_types):
+        rows += len(block)
+        counter.add(hash_keys(block, keys))
+    dup_hashes, dup_counts = counter.duplicates()
+
+    duplicate_rows = int(dup_counts.sum())
+    report = {
+        'keys': keys,
+        'rows': rows,
+        'columns': len(columns),
+        'value_columns': len(value_columns) if wide else None,
+        'distinct_keys': len(counter.hashes),
+        'duplicate_groups': len(dup_hashes),
+        'duplicate_rows': duplicate_rows,
+        'duplicate_entries': duplicate_rows * len(value_columns) if wide else duplicate_rows,
+        'groups': []
+    }
+    if not len(dup_hashes):
+        return report
+
+    # Second pass: sample rows of the largest groups only
+    wanted = dup_hashes[:sample_groups]
+    samples = []
+    for block in iter_dataset(path, chunksize=chunksize, dtype=key_types, project=False):
+        hashes = hash_keys(block, keys)
+        matched = np.isin(hashes, wanted)
+        if matched.any():
+            rows_found = block[matched].assign(_key_hash=hashes[matched])
+            samples.append(rows_found.groupby('_key_hash', sort=False).head(sample_rows))
+    sample = pd.concat(samples).groupby('_key_hash', sort=False).head(sample_rows)
+
+    for key_hash, count in zip(wanted, dup_counts[:sample_groups]):
+        group = sample[sample['_key_hash'] == key_hash].drop(columns='_key_hash')
+        report['groups'].append({
+            'key': dict(zip(keys, group[keys].iloc[0].tolist())),
+            'count': int(count),
+            'sample': group
+        })
+    return report
+
+
+def print_report(report, description):
+    """Print a find_duplicates report"""
     print(f"\nChecking for duplicates in {description}...")
-    
-    # Read the data
-    df = pd.read_csv(filepath)
-    
-    # Print total number of rows
-    print(f"Total rows: {len(df)}")
-    
-    # Print column names
-    print(f"Columns: {', '.join(df.columns.tolist())}")
-    
-    # Handle date columns
-    if 'Date' in df.columns:
-        print("\nDate column info:")
-        print(df['Date'].describe())
-    if 'Unnamed: 0' in df.columns:
-        print("\nUnnamed: 0 column info:")
-        print(df['Unnamed: 0'].describe())
-    
-    # Melt the data to check for duplicates
-    state_cols = [col for col in df.columns if col not in ['Date', 'Unnamed: 0'] and not col.endswith('_MoM')]
-    
-    df_melted = pd.melt(
-        df,
-        id_vars=['Unnamed: 0'] if 'Unnamed: 0' in df.columns else ['Date'],
-        value_vars=state_cols,
-        var_name='state',
-        value_name='home_value_index'
-    )
-    
-    # Check for duplicates
-    duplicates = df_melted[df_melted.duplicated(['Unnamed: 0' if 'Unnamed: 0' in df.columns else 'Date', 'state'], keep=False)]
-    
-    if len(duplicates) > 0:
-        print(f"\nFound {len(duplicates)} duplicate entries!")
-        print("\nSample of duplicates:")
-        print(duplicates.sort_values(['Unnamed: 0' if 'Unnamed: 0' in df.columns else 'Date', 'state']).head(10))
-    else:
-        print("\nNo duplicates found after melting!")
+    print(f"Total rows: {report['rows']}")
+    print(f"Key columns: {', '.join(report['keys'])} ({report['distinct_keys']} distinct)")
+    if report['value_columns'] is not None:
+        print(f"Value columns: {report['value_columns']}")
+
+    if not report['duplicate_groups']:
+        print("\nNo duplicates found!")
+        return
+
+    unit = "(id, column) entries" if report['value_columns'] is not None else "entries"
+    print(f"\nFound {report['duplicate_entries']} duplicate {unit} in {report['duplicate_groups']} "
+          f"key groups ({report['duplicate_rows']} rows)!")
+    print("\nDuplicate counts by key (largest groups):")
+    counts = pd.DataFrame([{**group['key'], 'count': group['count']} for group in report['groups']])
+    print(counts.to_string(index=False))
+    print("\nSample of duplicates:")
+    print(pd.concat([group['sample'] for group in report['groups']]).head(SAMPLE_GROUPS))
+
+
+def check_data_file(filepath, description, keys=(HVI_ID_COLUMNS,), wide=True):
+    """Check a file for duplicate keys (by default a wide Zillow HVI file) and print the report"""
+    report = find_duplicates(filepath, list(keys), wide=wide)
+    print_report(report, description)
+    return report
+
 
 def check_duplicates():
-    # Check processed data
-    df = pd.read_csv('data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv')
-    
-    # Convert index to datetime if it's a date column
-    if 'index' in df.columns:
-        df['date'] = pd.to_datetime(df['index'])
-        df = df.drop('index', axis=1)
-    elif 'Date' in df.columns:
-        df['date'] = pd.to_datetime(df['Date'])
-        df = df.drop('Date', axis=1)
-    
-    # Melt state columns into rows
-    state_cols = [col for col in df.columns if col != 'date']
-    df_melted = pd.melt(
-        df,
-        id_vars=['date'],
-        value_vars=state_cols,
-        var_name='state',
-        value_name='home_value_index'
-    )
-    
-    # Check for duplicates
-    duplicates = df_melted[df_melted.duplicated(['date', 'state'], keep=False)]
-    
-    if len(duplicates) > 0:
-        print(f"\nFound {len(duplicates)} duplicate entries!")
-        print("\nSample of duplicates:")
-        print(duplicates.sort_values(['date', 'state']).head(10))
-        
-        # Group by date and state to show counts
-        dup_counts = duplicates.groupby(['date', 'state']).size().reset_index(name='count')
-        print("\nDuplicate counts by date and state:")
-        print(dup_counts.sort_values('count', ascending=False).head(10))
-    else:
-        print("No duplicates found!")
+    """Check the processed Zillow HVI data for duplicate (date, state) entries"""
+    return check_data_file(DUPLICATE_CHECKS['zillow_hvi']['path'], 'processed Zillow HVI data')
+
 
 def main():
-    # Check both processed and cleaned data
-    check_data_file('data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv', 'processed Zillow HVI data')
-    check_data_file('data/cleaned/zillow_hvi_cleaned.csv', 'cleaned Zillow HVI data')
+    parser = argparse.ArgumentParser(description='Find duplicate keys in datasets without loading them whole')
+    parser.add_argument('targets', nargs='*',
+                        help=f"Dataset names ({', '.join(DUPLICATE_CHECKS)}) or file paths "
+                             "(default: processed and cleaned Zillow HVI)")
+    parser.add_argument('--keys', nargs='+', help='Key columns (required for file paths)')
+    parser.add_argument('--wide', action='store_true', help='Treat every non-key column as a value column')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='Rows per block')
+    args = parser.parse_args()
+
+    for target in args.targets or ['zillow_hvi', 'zillow_hvi_cleaned']:
+        check = DUPLICATE_CHECKS.get(target)
+        if check is None:
+            if not args.keys:
+                parser.error(f"--keys is required for {target}")
+            check = {'path': target, 'keys': args.keys, 'wide': args.wide}
+        keys = args.keys or check['keys']
+        try:
+            report = find_duplicates(check['path'], keys, wide=args.wide or check.get('wide', False),
+                                     chunksize=args.chunksize)
+        except (FileNotFoundError, KeyError) as e:
+            print(f"\nSkipping {target}: {e}")
+            continue
+        print_report(report, target)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from load_to_db import DatabaseLoader
+from partitions import load_partitioned
+
+# Scratch copy of zillow_housing the check partitions and reloads; the live table is not touched
+CHECK_TABLE = 'check_zillow_housing'
+CHECK_YEARS = [2020, 2021, 2022]
+CHANGED_YEAR = 2021
+COLUMNS = ['region_id', 'date', 'price', 'price_mom', 'price_yoy']
+
+
+def check_frame(regions=3):
+    """Monthly rows for a few regions over CHECK_YEARS"""
+    dates = pd.date_range(f'{CHECK_YEARS[0]}-01-01', f'{CHECK_YEARS[-1]}-12-01', freq='MS')
+    index = pd.MultiIndex.from_product([range(1, regions + 1), dates], names=['region_id', 'date'])
+    df = index.to_frame(index=False)
+    df['date'] = df['date'].dt.date
+    df['price'] = np.round(np.linspace(100000, 200000, len(df)), 2)
+    df['price_mom'] = 0.5
+    df['price_yoy'] = 4.0
+    return df
+
+
+def partition_oids(conn, table_name):
+    """Partition name -> pg_class oid; a partition that was swapped gets a new oid"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, c.oid FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+        """, (f'public.{table_name}',))
+        return dict(cur.fetchall())
+
+
+def run_check():
+    """
+    Load a partitioned scratch table twice, changing one year in between, and
+    check that the loader would not drop it and the other years were not rewritten.
+    Returns:
+        list: Failure messages (empty when the check passes).
+    """
+    loader = DatabaseLoader()
+    failures = []
+    with loader.get_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{CHECK_TABLE} CASCADE")
+                cur.execute(f"""
+                    CREATE TABLE public.{CHECK_TABLE}
+                    (LIKE public.zillow_housing INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES)
+                    PARTITION BY RANGE (date)
+                """)
+            conn.commit()
+
+            def load(conn, target, frame):
+                loader.copy_from_stringio(conn, frame, target, COLUMNS)
+
+            df = check_frame()
+            first = load_partitioned(conn, CHECK_TABLE, df, load, column='date')
+            if first['loaded'] != CHECK_YEARS:
+                failures.append(f"first run loaded {first['loaded']}, expected {CHECK_YEARS}")
+            if loader.droppable_tables(conn, [CHECK_TABLE]):
+                failures.append(f"{CHECK_TABLE} would be dropped before a reload")
+            before = partition_oids(conn, CHECK_TABLE)
+
+            changed = pd.to_datetime(df['date']).dt.year == CHANGED_YEAR
+            df.loc[changed, 'price'] += 1
+            second = load_partitioned(conn, CHECK_TABLE, df, load, column='date')
+            after = partition_oids(conn, CHECK_TABLE)
+
+            if second['loaded'] != [CHANGED_YEAR]:
+                failures.append(f"second run loaded {second['loaded']}, expected [{CHANGED_YEAR}]")
+            for name, oid in before.items():
+                rewritten = after.get(name) != oid
+                if name.endswith(f'_y{CHANGED_YEAR}') != rewritten:
+                    failures.append(f"{name} was {'rewritten' if rewritten else 'not rewritten'}")
+
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT COUNT(*), SUM(price) FROM public.{CHECK_TABLE}")
+                count, total = cur.fetchone()
+            if count != len(df) or round(float(total), 2) != round(df['price'].sum(), 2):
+                failures.append(f"table holds {count} rows summing to {total}, expected {len(df)}")
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{CHECK_TABLE} CASCADE")
+            conn.commit()
+    return failures
+
+
+def main():
+    failures = run_check()
+    if failures:
+        print("Partitioned reload check failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"Partitioned reload check passed: only {CHANGED_YEAR} was swapped in on the second run")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import sys
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from storage import FrameWriter
+from cleaning_report import CleaningReport, issue_summary, null_counts
+
 def handle_missing_values(df, strategy="drop", fill_value=None):
     """
     Handle missing values in the dataset.
@@ -20,6 +26,64 @@ def handle_missing_values(df, strategy="drop", fill_value=None):
     else:
         raise ValueError("Invalid strategy! Use 'drop', 'fill', or 'mean'.")
 
+# Values parsed per pd.to_numeric call when coercing text columns
+COERCE_BATCH_VALUES = 65_536
+
+def text_columns(df):
+    """Columns stored as text (object or string dtype), the only ones numeric coercion can change"""
+    return [col for col, dtype in df.dtypes.items()
+            if dtype == object or isinstance(dtype, pd.StringDtype)]
+
+def coerce_numeric(df, columns=None):
+    """
+    Coerce text columns to numbers in one batched parse, leaving typed columns alone.
+
+    The text columns are parsed in flat batches spanning many columns rather
+    than column by column. Columns that parse to whole numbers without gaps are re-parsed
+    on their own so they keep the integer dtype pd.to_numeric would give them.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to process (not modified).
+        columns (list): Columns to coerce; defaults to every text column.
+            Already numeric columns are skipped.
+    Returns:
+        pd.DataFrame: DataFrame with the columns converted.
+        dict: Column -> number of non-null values that could not be parsed and became NaN.
+    """
+    text_cols = text_columns(df)
+    columns = text_cols if columns is None else [col for col in columns if col in text_cols]
+    if not columns:
+        return df, {}
+
+    raw = df[columns].to_numpy(dtype=object)
+    parsed = np.empty(raw.shape, dtype="float64")
+    # Parse groups of columns as one flat array of about COERCE_BATCH_VALUES values
+    step = max(1, COERCE_BATCH_VALUES // max(len(df), 1))
+    for start in range(0, len(columns) if len(df) else 0, step):
+        batch = raw[:, start:start + step]
+        # Column-major ravel keeps each column's values contiguous for the reshape back
+        values = pd.to_numeric(pd.Series(batch.ravel(order="F")), errors="coerce").to_numpy(dtype="float64")
+        parsed[:, start:start + step] = values.reshape(batch.shape, order="F")
+    missing = np.isnan(parsed)
+    n_missing = missing.sum(axis=0)
+
+    # Only columns with gaps after parsing can have coerced values
+    coerced = dict.fromkeys(columns, 0)
+    gappy = np.flatnonzero(n_missing)
+    if len(gappy):
+        already_null = pd.isna(raw[:, gappy]).sum(axis=0)
+        for i, count in zip(gappy, n_missing[gappy] - already_null):
+            coerced[columns[i]] = int(count)
+
+    block = pd.DataFrame(parsed, index=df.index, columns=columns)
+    whole = (n_missing == 0) & (parsed == np.floor(parsed)).all(axis=0)
+    for i in np.flatnonzero(whole):
+        block[columns[i]] = pd.to_numeric(df[columns[i]], errors="coerce")
+
+    df = df.copy(deep=False)
+    df[columns] = block
+    return df, coerced
+
 def handle_numeric_issues(df):
     """
     Fix numeric issues by coercing columns to numeric and replacing invalid values.
@@ -28,9 +92,7 @@ def handle_numeric_issues(df):
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
-    for col in df.select_dtypes(include=["object", "float", "int"]).columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    return df
+    return coerce_numeric(df)[0]
 
 def remove_duplicates(df):
     """
@@ -50,142 +112,358 @@ def inspect_data(df):
     Returns:
         dict: Summary of issues in the dataset.
     """
-    return {
-        "missing_values": df.isnull().sum().sum(),
-        "duplicates": df.duplicated().sum(),
-        "numeric_issues": (df.select_dtypes(include=[np.number]).isna().sum().sum())
-    }
+    summary = issue_summary(df, null_counts(df))
+    del summary["rows"]
+    return summary
 
-def clean_kaggle_housing(df):
+def run_step(report, name, func, df, *args, **kwargs):
+    """
+    Apply a cleaning step, recording it in the report if there is one.
+    Args:
+        report (CleaningReport): Report to record the step in, or None.
+        name (str): Step name.
+        func (callable): Step taking and returning a DataFrame.
+        df (pd.DataFrame): Step input.
+    Returns:
+        pd.DataFrame: Step output.
+    """
+    if report is None:
+        return func(df, *args, **kwargs)
+    return report.run(name, func, df, *args, **kwargs)
+
+def run_numeric_step(report, df):
+    """
+    Run coerce_numeric as the "numeric" step, noting its per-column counts in the report.
+    Returns:
+        pd.DataFrame: The coerced DataFrame.
+        dict: Column -> values coerced to NaN (non-zero counts only).
+    """
+    coerced = {}
+
+    def coerce(df):
+        df, counts = coerce_numeric(df)
+        coerced.update({col: count for col, count in counts.items() if count})
+        return df
+
+    df = run_step(report, "numeric", coerce, df)
+    if report is not None and coerced:
+        report.annotate(coerced_values=coerced)
+    return df, coerced
+
+def clean_kaggle_housing(df, report=None):
     """
     Clean Kaggle housing dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
+        report (CleaningReport): Optional report recording each step.
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     # Handle missing values by filling with mean
-    df = handle_missing_values(df, strategy="mean")
+    df = run_step(report, "missing", handle_missing_values, df, strategy="mean")
     return df
 
-def clean_wages(df):
+def clean_wages(df, report=None):
     """
     Clean wages dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
+        report (CleaningReport): Optional report recording each step.
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     # Handle missing values by filling with median
-    df = handle_missing_values(df, strategy="fill", fill_value=df.median(numeric_only=True))
+    df = run_step(report, "missing", handle_missing_values, df,
+                  strategy="fill", fill_value=df.median(numeric_only=True))
     # Fix numeric issues
-    df = handle_numeric_issues(df)
+    df, _ = run_numeric_step(report, df)
     return df
 
-def clean_interest_rates(df):
+def clean_interest_rates(df, report=None):
     """
     Clean interest rates dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
+        report (CleaningReport): Optional report recording each step.
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     # Handle missing values by dropping rows
-    df = handle_missing_values(df, strategy="drop")
+    df = run_step(report, "missing", handle_missing_values, df, strategy="drop")
     # Fix numeric issues
-    df = handle_numeric_issues(df)
+    df, _ = run_numeric_step(report, df)
     return df
 
-def clean_zillow(df):
+def clean_zillow(df, report=None):
     """
     Clean Zillow dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
+        report (CleaningReport): Optional report recording each step.
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     # Remove duplicates
-    df = remove_duplicates(df)
+    df = run_step(report, "dedupe", remove_duplicates, df)
     # Handle missing values
-    df = handle_missing_values(df, strategy="mean")
+    df = run_step(report, "missing", handle_missing_values, df, strategy="mean")
     # Fix numeric issues
-    df = handle_numeric_issues(df)
+    df, _ = run_numeric_step(report, df)
+    return df
+
+def parse_hvi_dates(df):
+    """Replace the Zillow HVI index column ('Unnamed: 0', plus any 'Date') with a parsed 'date' column"""
+    if 'Unnamed: 0' not in df.columns:
+        return df
+    df = df.assign(date=pd.to_datetime(df['Unnamed: 0']))
+    return df.drop([col for col in ('Date', 'Unnamed: 0') if col in df.columns], axis=1)
+
+def ffill_numeric(df):
+    """Forward fill every numeric column in one call"""
+    numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col != 'date']
+    df = df.copy(deep=False)
+    df[numeric_cols] = df[numeric_cols].ffill()
     return df
 
-def clean_zillow_hvi(df):
+def clean_zillow_hvi(df, report=None):
     """
     Clean Zillow Home Value Index dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
+        report (CleaningReport): Optional report recording each step.
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     # Ensure we have proper date information
-    if 'Date' in df.columns:
-        df['date'] = pd.to_datetime(df['Unnamed: 0'])
-        df = df.drop(['Date', 'Unnamed: 0'], axis=1)
-    elif 'Unnamed: 0' in df.columns:
-        df['date'] = pd.to_datetime(df['Unnamed: 0'])
-        df = df.drop('Unnamed: 0', axis=1)
+    df = run_step(report, "parse_dates", parse_hvi_dates, df)
     
     # First convert to numeric to ensure proper handling
-    df = handle_numeric_issues(df)
+    df, coerced = run_numeric_step(report, df)
+    if coerced:
+        print(f"Coerced {sum(coerced.values())} non-numeric values in {len(coerced)} columns to NaN")
     
     # Forward fill missing values within each group/region
     # This assumes missing values should use the last known value
-    for col in df.select_dtypes(include=[np.number]).columns:
-        if col != 'date':  # Skip the date column
-            df[col] = df[col].ffill()
+    df = run_step(report, "ffill", ffill_numeric, df)
     
     # If any remaining missing values, use backward fill
-    df = df.bfill()
+    df = run_step(report, "bfill", pd.DataFrame.bfill, df)
     
     # If still any missing values (e.g., completely empty columns)
     # fill with 0 as last resort
-    df = df.fillna(0)
+    df = run_step(report, "fill_zero", pd.DataFrame.fillna, df, 0)
     
     return df
 
-def clean_dataset(df, missing_strategy="drop", fill_value=None, time_series=False):
+def time_series_fill(df):
+    """Forward fill, then backward fill the leading gaps"""
+    return df.ffill().bfill()
+
+def clean_dataset(df, missing_strategy="drop", fill_value=None, time_series=False, report=None):
     """
     Apply a complete cleaning pipeline to the dataset.
     Args:
         df (pd.DataFrame): The DataFrame to clean.
         missing_strategy (str): Strategy for handling missing values.
         fill_value: Value to use if missing_strategy is "fill".
+        time_series (bool): Forward/backward fill before handling missing values.
+        report (CleaningReport): Report to record the steps in; a new one is used if None.
     Returns:
         pd.DataFrame: The fully cleaned DataFrame.
         dict: Summary of cleaning operations performed.
     """
-    # Store initial state for reporting
-    initial_state = inspect_data(df)
+    report = report if report is not None else CleaningReport()
     
     # Apply cleaning operations
-    df = handle_numeric_issues(df)
+    df, coerced = run_numeric_step(report, df)
     
     if time_series:
         # For time series data, try forward/backward fill first
-        df = df.ffill().bfill()
-        # Then apply standard missing value handling for any remaining NAs
-        df = handle_missing_values(df, strategy=missing_strategy, fill_value=fill_value)
-    else:
-        df = handle_missing_values(df, strategy=missing_strategy, fill_value=fill_value)
-    
-    df = remove_duplicates(df)
+        df = run_step(report, "time_series_fill", time_series_fill, df)
+    # Then apply standard missing value handling for any remaining NAs
+    df = run_step(report, "missing", handle_missing_values, df,
+                  strategy=missing_strategy, fill_value=fill_value)
     
-    # Store final state for reporting
-    final_state = inspect_data(df)
+    df = run_step(report, "dedupe", remove_duplicates, df)
     
     # Create summary report
+    run_report = report.finish(df)
     summary = {
-        "initial_issues": initial_state,
-        "final_issues": final_state,
-        "rows_removed": len(df) - len(df),
+        "initial_issues": {key: value for key, value in run_report["initial"].items() if key != "rows"},
+        "final_issues": {key: value for key, value in run_report["final"].items() if key != "rows"},
+        "rows_removed": run_report["rows_removed"],
+        "coerced_values": coerced,
         "cleaning_operations": [
             "numeric_conversion",
             f"missing_values_{missing_strategy}",
             "duplicate_removal"
-        ]
+        ],
+        "steps": run_report["steps"]
     }
     
     return df, summary
+
+# Rows per chunk in streaming mode
+CHUNK_ROWS = 100_000
+
+# Step order of clean_dataset(time_series=True) and clean_zillow, for streaming mode
+CLEAN_DATASET_STEPS = ("numeric", "time_series_fill", "missing", "dedupe")
+ZILLOW_STEPS = ("dedupe", "missing", "numeric")
+
+class StreamCleaner:
+    """
+    Apply the cleaning steps to a file chunk by chunk, writing output incrementally.
+
+    Steps that need the whole column get their state from a first pass or carry
+    it between chunks:
+    - "time_series_fill": ffill carries each column's last value into the next
+      chunk; the leading NaNs that bfill would fill take the column's first
+      valid value, found in the first pass.
+    - "missing" with strategy "mean": column means are accumulated in the first pass.
+    - "dedupe": a set of 64-bit row hashes spans all chunks (8 bytes of hash plus
+      set overhead per distinct row).
+    "numeric" coerces as handle_numeric_issues does and stores numbers as float64
+    so every chunk has the same schema.
+    """
+
+    def __init__(self, steps=CLEAN_DATASET_STEPS, missing_strategy="drop", fill_value=None,
+                 chunksize=CHUNK_ROWS):
+        """
+        Args:
+            steps (tuple): Ordered step names: "numeric", "time_series_fill", "missing", "dedupe".
+            missing_strategy (str): "drop", "fill" or "mean" (see handle_missing_values).
+            fill_value: Scalar or per-column dict for the "fill" strategy.
+            chunksize (int): Rows read per chunk.
+        """
+        if missing_strategy not in ("drop", "fill", "mean"):
+            raise ValueError("Invalid strategy! Use 'drop', 'fill', or 'mean'.")
+        self.steps = steps
+        self.missing_strategy = missing_strategy
+        self.fill_value = fill_value
+        self.chunksize = chunksize
+
+    def _scan_dtypes(self, input_path):
+        """
+        Infer each column's dtype over the whole file, as a single read_csv would.
+
+        Chunks are inferred separately (a column can be int in one chunk and
+        float or object in another), which would break cross-chunk hashing, so
+        every chunk is read with these dtypes.
+        """
+        widths = ["bool", "int64", "float64", "object"]
+        dtypes = {}
+        for chunk in pd.read_csv(input_path, chunksize=self.chunksize):
+            for col, dtype in chunk.dtypes.items():
+                kind = {"b": "bool", "i": "int64", "f": "float64"}.get(dtype.kind, "object")
+                previous = dtypes.get(col, kind)
+                if previous != kind and "bool" in (previous, kind):
+                    kind = "object"
+                dtypes[col] = max(previous, kind, key=widths.index)
+        return dtypes
+
+    def _read(self, input_path, dtypes):
+        return pd.read_csv(input_path, chunksize=self.chunksize, dtype=dtypes)
+
+    def _needs_first_pass(self):
+        return "time_series_fill" in self.steps or ("missing" in self.steps and self.missing_strategy == "mean")
+
+    def _numeric(self, chunk):
+        chunk = handle_numeric_issues(chunk)
+        numeric_cols = chunk.select_dtypes(include=[np.number]).columns
+        return chunk.astype({col: "float64" for col in numeric_cols})
+
+    def _dedupe(self, chunk, seen):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= np.fromiter((h not in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        seen.update(hashes[keep].tolist())
+        return chunk[keep]
+
+    def _forward_fill(self, chunk, state):
+        if chunk.empty:
+            return chunk
+        # Prepend the previous chunk's last values so ffill continues across the boundary
+        last = state.get("last")
+        if last is not None:
+            chunk = pd.concat([last, chunk]).ffill().iloc[1:]
+        else:
+            chunk = chunk.ffill()
+        state["last"] = chunk.iloc[[-1]]
+        return chunk
+
+    def _first_pass(self, input_path, dtypes):
+        """Collect first valid values and column means over the prefix of steps that needs them"""
+        stats = {"first_valid": {}, "sums": None, "counts": None}
+        seen = set()
+        state = {}
+        for chunk in self._read(input_path, dtypes):
+            for step in self.steps:
+                if step == "numeric":
+                    chunk = self._numeric(chunk)
+                elif step == "dedupe":
+                    chunk = self._dedupe(chunk, seen)
+                elif step == "time_series_fill":
+                    for col in chunk.columns:
+                        if col not in stats["first_valid"]:
+                            valid = chunk[col].first_valid_index()
+                            if valid is not None:
+                                stats["first_valid"][col] = chunk.at[valid, col]
+                    chunk = self._forward_fill(chunk, state)
+                elif step == "missing":
+                    numeric = chunk.select_dtypes(include=[np.number])
+                    sums, counts = numeric.sum(), numeric.count()
+                    stats["sums"] = sums if stats["sums"] is None else stats["sums"].add(sums, fill_value=0)
+                    stats["counts"] = counts if stats["counts"] is None else stats["counts"].add(counts, fill_value=0)
+                    break
+        if stats["sums"] is not None:
+            stats["means"] = stats["sums"] / stats["counts"].replace(0, np.nan)
+        return stats
+
+    def clean_file(self, input_path, output_path):
+        """
+        Clean a CSV into an intermediate file without holding it in memory.
+        Args:
+            input_path (str): CSV to clean.
+            output_path (str): Logical output path (written via storage.FrameWriter).
+        Returns:
+            dict: rows_in, rows_out, chunks, duplicates_removed, and initial/final
+                missing_values and numeric_issues counts.
+        """
+        dtypes = self._scan_dtypes(input_path)
+        stats = self._first_pass(input_path, dtypes) if self._needs_first_pass() else {}
+        seen = set()
+        state = {}
+        summary = {"rows_in": 0, "rows_out": 0, "chunks": 0, "duplicates_removed": 0,
+                   "initial": {"missing_values": 0, "numeric_issues": 0},
+                   "final": {"missing_values": 0, "numeric_issues": 0}}
+
+        def count_issues(chunk, counts):
+            counts["missing_values"] += int(chunk.isnull().sum().sum())
+            counts["numeric_issues"] += int(chunk.select_dtypes(include=[np.number]).isna().sum().sum())
+
+        with FrameWriter(output_path) as writer:
+            for chunk in self._read(input_path, dtypes):
+                summary["rows_in"] += len(chunk)
+                summary["chunks"] += 1
+                count_issues(chunk, summary["initial"])
+                for step in self.steps:
+                    if step == "numeric":
+                        chunk = self._numeric(chunk)
+                    elif step == "dedupe":
+                        before = len(chunk)
+                        chunk = self._dedupe(chunk, seen)
+                        summary["duplicates_removed"] += before - len(chunk)
+                    elif step == "time_series_fill":
+                        chunk = self._forward_fill(chunk, state)
+                        # Anything still missing precedes the column's first valid value
+                        chunk = chunk.fillna(stats["first_valid"])
+                    elif step == "missing":
+                        if self.missing_strategy == "mean":
+                            chunk = chunk.fillna(stats["means"])
+                        else:
+                            chunk = handle_missing_values(chunk, self.missing_strategy, self.fill_value)
+                count_issues(chunk, summary["final"])
+                summary["rows_out"] += len(chunk)
+                writer.write(chunk)
+        summary["output"] = str(writer.path)
+        return summary
@@ -2,304 +2,372 @@ import pandas as pd
 import os
 from pathlib import Path
 import json
+import hashlib
+import pickle
+import argparse
 from datetime import datetime
-
-class DataInspector:
-    def __init__(self):
-        """Initialize data inspector"""
-        self.data_dir = Path('data')
-        self.report = {
-            'inspection_time': datetime.now().isoformat(),
-            'datasets': {}
-        }
-
-    def inspect_bls_data(self):
-        """Inspect BLS housing CPI data"""
-        df = pd.read_csv('data/bls/bls_housing_processed.csv')
-        dataset_report = {
-            'file': 'bls_housing_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'date_format_issues': [],
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in date
-        duplicates = df[df.duplicated(['date'], keep=False)]
-        if not duplicates.empty:
-            dataset_report['duplicates']['date'] = duplicates['date'].tolist()
-
-        # Check date format
-        try:
-            pd.to_datetime(df['date'])
-        except Exception as e:
-            dataset_report['date_format_issues'].append(str(e))
-
-        # Check numeric columns
-        numeric_cols = ['Fuels_Utilities', 'Household_Furnishings', 'Housing', 'Housing_All', 'Shelter']
-        for col in numeric_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['bls'] = dataset_report
-
-    def inspect_census_data(self):
-        """Inspect Census housing data"""
-        df = pd.read_csv('data/census/census_housing_processed.csv')
-        dataset_report = {
-            'file': 'census_housing_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in state/year combination
-        duplicates = df[df.duplicated(['state', 'year'], keep=False)]
-        if not duplicates.empty:
-            dataset_report['duplicates']['state_year'] = duplicates[['state', 'year']].values.tolist()
-
-        # Check numeric columns
-        numeric_cols = [
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sys
+
+from data_cleaning import coerce_numeric
+
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from storage import resolve_path, artifact_hash, read_columns
+from schemas import read_dataset
+from cleaning_report import null_counts
+
+# Per-dataset reports from earlier runs, reused while the processed file is unchanged
+INSPECTION_CACHE_PATH = 'data/cache/inspection_cache.json'
+# Bump when profile_frame's output changes so cached reports are rebuilt
+INSPECTOR_VERSION = 2
+
+# What to check in each processed dataset:
+#   path: processed file (read in whichever storage format it was written)
+#   duplicate_keys: report label -> key columns whose repeated combinations are listed,
+#       or a function of the column names returning that mapping
+#   date_column: column checked for unparseable dates, or a tuple of candidates
+#       (the first one present is used); datasets without dates omit date_format_issues
+#   numeric_columns: columns checked for non-numeric values, or a function of the column names
+# Functions must be module-level (or partials of them) so specs can be sent to worker processes
+
+
+def columns_except(excluded, columns):
+    """Every column but the excluded ones"""
+    return [col for col in columns if col not in excluded]
+
+
+def year_category_keys(columns):
+    """Each category column must be unique within a year"""
+    return {f'year_{col}': ['Year', col] for col in columns if col != 'Year'}
+
+
+INSPECTION_SPECS = {
+    'bls': {
+        'path': 'data/bls/bls_housing_processed.csv',
+        'duplicate_keys': {'date': ['date']},
+        'date_column': 'date',
+        'numeric_columns': ['Fuels_Utilities', 'Household_Furnishings', 'Housing', 'Housing_All', 'Shelter']
+    },
+    'census': {
+        'path': 'data/census/census_housing_processed.csv',
+        'duplicate_keys': {'state_year': ['state', 'year']},
+        'numeric_columns': [
             'Total_Housing_Units', 'Occupied_Units', 'Vacant_Units',
             'Owner_Occupied', 'Renter_Occupied', 'Median_Home_Value',
             'Median_Monthly_Housing_Cost', 'Vacancy_Rate', 'Homeownership_Rate'
         ]
-        for col in numeric_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['census'] = dataset_report
-
-    def inspect_kaggle_housing_prices(self):
-        """Inspect Kaggle housing prices data"""
-        df = pd.read_csv('data/kaggle/housing/kaggle_housing_processed.csv')
-        dataset_report = {
-            'file': 'kaggle_housing_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'date_format_issues': [],
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in date
-        duplicates = df[df.duplicated(['date'], keep=False)]
-        if not duplicates.empty:
-            dataset_report['duplicates']['date'] = duplicates['date'].tolist()
-
-        # Check date format
-        try:
-            pd.to_datetime(df['date'])
-        except Exception as e:
-            dataset_report['date_format_issues'].append(str(e))
-
-        # Check numeric columns
-        numeric_cols = ['U.S. National', '20-City Composite', '10-City Composite']
-        for col in numeric_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['kaggle_housing'] = dataset_report
-
-    def inspect_wages_data(self):
-        """Inspect wages by education data"""
-        df = pd.read_csv('data/kaggle/wages/kaggle_wages_processed.csv')
-        dataset_report = {
-            'file': 'kaggle_wages_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in Year and category combinations
-        value_cols = [col for col in df.columns if col != 'Year']
-        for col in value_cols:
-            duplicates = df[df.duplicated(['Year', col], keep=False)]
-            if not duplicates.empty:
-                dataset_report['duplicates'][f'year_{col}'] = duplicates[['Year', col]].values.tolist()
-
-        # Check numeric values
-        for col in value_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['wages'] = dataset_report
-
-    def inspect_interest_rates(self):
-        """Inspect interest rates data"""
-        df = pd.read_csv('data/kaggle/interest_rates/kaggle_interest_rates_processed.csv')
-        dataset_report = {
-            'file': 'kaggle_interest_rates_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'date_format_issues': [],
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in date
-        duplicates = df[df.duplicated(['Date'], keep=False)]
-        if not duplicates.empty:
-            dataset_report['duplicates']['date'] = duplicates['Date'].tolist()
-
-        # Check date format
-        try:
-            pd.to_datetime(df['Date'])
-        except Exception as e:
-            dataset_report['date_format_issues'].append(str(e))
-
-        # Check numeric columns
-        numeric_cols = [
+    },
+    'kaggle_housing': {
+        'path': 'data/kaggle/housing/kaggle_housing_processed.csv',
+        'duplicate_keys': {'date': ['date']},
+        'date_column': 'date',
+        'numeric_columns': ['U.S. National', '20-City Composite', '10-City Composite']
+    },
+    'wages': {
+        'path': 'data/kaggle/wages/kaggle_wages_processed.csv',
+        'duplicate_keys': year_category_keys,
+        'numeric_columns': partial(columns_except, ['Year'])
+    },
+    'interest_rates': {
+        'path': 'data/kaggle/interest_rates/kaggle_interest_rates_processed.csv',
+        'duplicate_keys': {'date': ['Date']},
+        'date_column': 'Date',
+        'numeric_columns': [
             'Federal Funds Target Rate', 'Federal Funds Upper Target',
             'Federal Funds Lower Target', 'Effective Federal Funds Rate',
             'Real GDP (Percent Change)', 'Unemployment Rate', 'Inflation Rate'
         ]
-        for col in numeric_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['interest_rates'] = dataset_report
-
-    def inspect_zillow_data(self):
-        """Inspect Zillow housing data"""
-        df = pd.read_csv('data/kaggle/zillow/kaggle_zillow_processed.csv')
-        dataset_report = {
-            'file': 'kaggle_zillow_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'date_format_issues': [],
-            'numeric_issues': []
-        }
-
-        # Check for duplicates in date/region combination
-        duplicates = df[df.duplicated(['Date', 'RegionName'], keep=False)]
-        if not duplicates.empty:
-            dataset_report['duplicates']['date_region'] = duplicates[['Date', 'RegionName']].values.tolist()
-
-        # Check date format
-        try:
-            pd.to_datetime(df['Date'])
-        except Exception as e:
-            dataset_report['date_format_issues'].append(str(e))
-
-        # Check numeric columns
-        numeric_cols = ['Price', 'Price_MoM', 'Price_YoY']
-        for col in numeric_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
-
-        self.report['datasets']['zillow'] = dataset_report
-
-    def inspect_zillow_hvi(self):
-        """Inspect Zillow Home Value Index data"""
-        df = pd.read_csv('data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv')
-        dataset_report = {
-            'file': 'kaggle_zillow_hvindex_processed.csv',
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'duplicates': {},
-            'missing_values': {},
-            'date_format_issues': [],
-            'numeric_issues': []
-        }
+    },
+    'zillow': {
+        'path': 'data/kaggle/zillow/kaggle_zillow_processed.csv',
+        'duplicate_keys': {'date_region': ['Date', 'RegionName']},
+        'date_column': 'Date',
+        'numeric_columns': ['Price', 'Price_MoM', 'Price_YoY']
+    },
+    'zillow_hvi': {
+        'path': 'data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv',
+        'duplicate_keys': {},
+        'date_column': ('index', 'Date'),
+        'numeric_columns': partial(columns_except, ['index', 'Date'])
+    }
+}
+
+
+def _resolve(value, columns):
+    return value(columns) if callable(value) else value
+
+
+def profile_frame(df, spec):
+    """
+    Profile one dataset in a single vectorized pass per check.
+
+    Missing values are counted once for every column and reused for the
+    non-numeric counts, which only need parsing for text columns; those are
+    parsed together by coerce_numeric. Dates are parsed once with coercion,
+    and only re-parsed strictly when something failed, to report the error.
+
+    Args:
+        df (pd.DataFrame): Processed dataset.
+        spec (dict): Entry of INSPECTION_SPECS.
+    Returns:
+        dict: Report with the fields of data/inspection_report.json, plus
+            'numeric_ranges' (min/max per numeric column) and, for datasets with
+            dates, 'date_parse_failures'.
+    """
+    columns = df.columns.tolist()
+    dataset_report = {
+        'file': os.path.basename(spec['path']),
+        'row_count': len(df),
+        'column_count': len(columns),
+        'duplicates': {},
+        'missing_values': {}
+    }
+
+    for label, keys in _resolve(spec['duplicate_keys'], columns).items():
+        repeated = df.duplicated(keys, keep=False)
+        if repeated.any():
+            values = df.loc[repeated, keys[0]] if len(keys) == 1 else df.loc[repeated, keys].values
+            dataset_report['duplicates'][label] = values.tolist()
+
+    missing = null_counts(df)
+    dataset_report['missing_values'] = {col: int(count) for col, count in missing.items() if count > 0}
+
+    date_column = spec.get('date_column')
+    if date_column is not None:
+        if isinstance(date_column, tuple):
+            date_column = next((col for col in date_column if col in columns), date_column[-1])
+        dates = df[date_column]
+        failures = int((pd.to_datetime(dates, errors='coerce').isna() & dates.notna()).sum())
+        dataset_report['date_format_issues'] = []
+        if failures:
+            try:
+                pd.to_datetime(dates)
+            except Exception as e:
+                dataset_report['date_format_issues'].append(str(e))
+        dataset_report['date_parse_failures'] = failures
+
+    numeric_cols = _resolve(spec['numeric_columns'], columns)
+    numeric, coerced = coerce_numeric(df[numeric_cols])
+    dataset_report['numeric_issues'] = []
+    for col in numeric_cols:
+        # Missing values count as non-numeric, as pd.to_numeric(..., errors='coerce').isna() does
+        non_numeric = int(missing[col]) + coerced.get(col, 0)
+        if non_numeric:
+            dataset_report['numeric_issues'].append(f"{col}: {non_numeric} non-numeric values")
+
+    numeric = numeric.select_dtypes(include='number')
+    lows, highs = numeric.min(), numeric.max()
+    dataset_report['numeric_ranges'] = {
+        col: {'min': lows[col].item(), 'max': highs[col].item()}
+        for col in numeric.columns if pd.notna(lows[col])
+    }
+    return dataset_report
+
+
+def profile_dataset(name, spec=None):
+    """
+    Read and profile one dataset (runs in a worker process). Every column is
+    read with its catalog dtypes; files with bad values fall back to inferred
+    numeric dtypes so those values can be counted.
+    Args:
+        name (str): Key of INSPECTION_SPECS.
+        spec (dict): Spec to use instead of INSPECTION_SPECS[name].
+    Returns:
+        dict: Dataset report (see profile_frame).
+    """
+    spec = spec or INSPECTION_SPECS[name]
+    return profile_frame(read_dataset(spec['path'], strict=False, project=False), spec)
+
+
+def failed_report(spec, error):
+    """Report of a dataset that could not be profiled"""
+    return {'file': os.path.basename(spec['path']), 'error': error}
+
+
+def spec_fingerprint(spec, columns):
+    """
+    sha256 of a spec resolved against a file's columns, so cached reports are
+    rebuilt when what is checked changes (including what its functions return).
+    Args:
+        spec (dict): Entry of INSPECTION_SPECS.
+        columns (list): Column names of the dataset's file.
+    Returns:
+        str: Hex digest.
+    """
+    resolved = {
+        'path': spec['path'],
+        'duplicate_keys': _resolve(spec['duplicate_keys'], columns),
+        'date_column': spec.get('date_column'),
+        'numeric_columns': _resolve(spec['numeric_columns'], columns)
+    }
+    return hashlib.sha256(json.dumps(resolved, sort_keys=True).encode()).hexdigest()
+
+
+def file_stat(path):
+    """Size and modification time (ns) of a file, the cheap part of its fingerprint"""
+    stat = Path(path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
 
-        # Check date column format
-        date_col = 'index' if 'index' in df.columns else 'Date'
-        try:
-            pd.to_datetime(df[date_col])
-        except Exception as e:
-            dataset_report['date_format_issues'].append(str(e))
 
-        # Check numeric values in state columns
-        state_cols = [col for col in df.columns if col not in ['index', 'Date']]
-        for col in state_cols:
-            non_numeric = df[pd.to_numeric(df[col], errors='coerce').isna()][col]
-            if not non_numeric.empty:
-                dataset_report['numeric_issues'].append(f"{col}: {len(non_numeric)} non-numeric values")
-
-        # Check missing values
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                dataset_report['missing_values'][col] = int(missing)
+class DataInspector:
+    def __init__(self, specs=None, workers=None, use_cache=True, refresh=False):
+        """
+        Initialize data inspector
+
+        Args:
+            specs (dict): Dataset name -> spec, defaults to INSPECTION_SPECS. With
+                several workers the specs are pickled, so their functions must
+                be module-level.
+            workers (int): Worker processes; defaults to one per CPU (at most one
+                per dataset). 1 profiles in this process.
+            use_cache (bool): Reuse reports of unchanged files from INSPECTION_CACHE_PATH.
+            refresh (bool): Re-profile every file (the cache is still updated).
+        """
+        self.data_dir = Path('data')
+        self.specs = specs or INSPECTION_SPECS
+        self.workers = workers
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.cached = []
+        self.report = {
+            'inspection_time': datetime.now().isoformat(),
+            'datasets': {}
+        }
 
-        self.report['datasets']['zillow_hvi'] = dataset_report
+    def load_cache(self):
+        """Load the inspection cache, or an empty one on the first run"""
+        if not os.path.exists(INSPECTION_CACHE_PATH):
+            return {}
+        with open(INSPECTION_CACHE_PATH) as f:
+            return json.load(f)
+
+    def save_cache(self, cache):
+        """Write the inspection cache"""
+        os.makedirs(os.path.dirname(INSPECTION_CACHE_PATH), exist_ok=True)
+        with open(INSPECTION_CACHE_PATH, 'w') as f:
+            json.dump(cache, f, indent=2, default=str)
+
+    def cached_report(self, entry, path, stat, spec_hash):
+        """
+        Return a cached report if the file behind it and its spec are unchanged.
+
+        Matching size and mtime are trusted as is. If only the mtime moved
+        (e.g. the file was rewritten with the same data) the content hash
+        decides (taken from the artifact manifest when it is current), and the entry's mtime is updated so the next run skips hashing.
+
+        Args:
+            entry (dict): Cache entry for the dataset, or None.
+            path (Path): Current processed file.
+            stat (dict): file_stat(path).
+            spec_hash (str): spec_fingerprint() of the dataset's current spec.
+        Returns:
+            dict or None: The cached report.
+        """
+        if not entry or entry['version'] != INSPECTOR_VERSION or entry['path'] != str(path):
+            return None
+        if entry.get('spec') != spec_hash:
+            return None
+        if entry['size'] != stat['size']:
+            return None
+        if entry['mtime_ns'] != stat['mtime_ns']:
+            if artifact_hash(path) != entry['hash']:
+                return None
+            entry['mtime_ns'] = stat['mtime_ns']
+        return entry['report']
+
+    def profile_all(self):
+        """
+        Profile every changed dataset in parallel worker processes, reusing
+        cached reports for the rest.
+
+        A dataset that cannot be profiled (e.g. its file is missing) gets a
+        report with an 'error' instead, and the others are still profiled.
+
+        Returns:
+            dict: Dataset name -> report, in spec order.
+        Raises:
+            ValueError: If specs cannot be sent to worker processes.
+        """
+        cache = self.load_cache() if self.use_cache else {}
+        reports = {}
+        stats = {}
+        for name, spec in self.specs.items():
+            path = resolve_path(spec['path'])
+            if not path.exists():
+                reports[name] = failed_report(spec, f"{path} not found")
+                continue
+            stats[name] = (path, file_stat(path), spec_fingerprint(spec, read_columns(path)))
+            if not self.refresh:
+                report = self.cached_report(cache.get(name), *stats[name])
+                if report is not None:
+                    reports[name] = report
+        self.cached = [name for name in self.specs if name in reports and name in stats]
+
+        stale = [name for name in self.specs if name not in reports]
+        workers = self.workers or min(len(stale), os.cpu_count() or 1)
+        if workers <= 1:
+            for name in stale:
+                try:
+                    reports[name] = profile_dataset(name, self.specs[name])
+                except Exception as e:
+                    reports[name] = failed_report(self.specs[name], str(e))
+        else:
+            for name in stale:
+                try:
+                    pickle.dumps(self.specs[name])
+                except Exception as e:
+                    raise ValueError(f"Spec of {name} cannot be sent to worker processes "
+                                     f"(use module-level functions, or workers=1): {e}")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(profile_dataset, name, self.specs[name]): name for name in stale}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        reports[name] = future.result()
+                    except Exception as e:
+                        reports[name] = failed_report(self.specs[name], str(e))
+
+        if self.use_cache:
+            for name in stale:
+                if 'error' in reports[name]:
+                    continue
+                path, stat, spec_hash = stats[name]
+                cache[name] = {
+                    'version': INSPECTOR_VERSION,
+                    'path': str(path),
+                    'spec': spec_hash,
+                    **stat,
+                    'hash': artifact_hash(path),
+                    'inspected_at': datetime.now().isoformat(),
+                    'report': reports[name]
+                }
+            self.save_cache(cache)
+        return {name: reports[name] for name in self.specs}
 
     def inspect_all(self):
         """Run all inspections and save report"""
         print("Starting data inspection...")
-        
-        # Run all inspections
-        self.inspect_bls_data()
-        self.inspect_census_data()
-        self.inspect_kaggle_housing_prices()
-        self.inspect_wages_data()
-        self.inspect_interest_rates()
-        self.inspect_zillow_data()
-        self.inspect_zillow_hvi()
-        
+
+        # Run all inspections; unchanged files reuse their cached reports
+        self.report['datasets'].update(self.profile_all())
+        self.report['cached_datasets'] = self.cached
+        if self.cached:
+            print(f"Reused cached reports for unchanged files: {', '.join(self.cached)}")
+
         # Save report
         report_path = Path('data/inspection_report.json')
         with open(report_path, 'w') as f:
-            json.dump(self.report, f, indent=2)
-        
+            json.dump(self.report, f, indent=2, default=str)
+
         print(f"\nInspection complete. Report saved to {report_path}")
-        
+
         # Print summary of issues found
         print("\nSummary of issues found:")
         for dataset, report in self.report['datasets'].items():
+            if report.get('error'):
+                print(f"\n{dataset}:\n  - not inspected: {report['error']}")
+                continue
             issues = []
             if report['duplicates']:
                 issues.append(f"duplicates found")
@@ -309,14 +377,20 @@ class DataInspector:
                 issues.append(f"date format issues found")
             if report['numeric_issues']:
                 issues.append(f"numeric issues found")
-            
+
             if issues:
                 print(f"\n{dataset}:")
                 for issue in issues:
                     print(f"  - {issue}")
 
 def main():
-    inspector = DataInspector()
+    parser = argparse.ArgumentParser(description='Inspect the processed datasets')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU, 1 = sequential)')
+    parser.add_argument('--refresh', action='store_true', help='Re-profile every file, ignoring cached reports')
+    parser.add_argument('--no-cache', action='store_true', help='Neither read nor write the inspection cache')
+    args = parser.parse_args()
+
+    inspector = DataInspector(workers=args.workers, use_cache=not args.no_cache, refresh=args.refresh)
     inspector.inspect_all()
 
 if __name__ == "__main__":
@@ -5,8 +5,29 @@ from pathlib import Path
 import psycopg2
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-import pandas as pd
-import io
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from registry import DATASETS, DatasetEngine
+from dimensions import resolve_keys
+from load_runs import (
+    ensure_load_runs_table,
+    fingerprint_source,
+    is_unchanged,
+    record_run,
+    format_run_summary
+)
+from validation import SchemaValidator, format_report
+from checkpoints import (
+    ensure_checkpoints_table,
+    resume_chunk,
+    save_checkpoint,
+    backoff_delay,
+    CHUNK_SIZE,
+    MAX_RETRIES
+)
+from profiling import span
+from partitions import PARTITIONED_TABLES, ensure_partitions, is_partitioned, partition_years
 
 # Set up logging
 logging.basicConfig(
@@ -71,94 +92,21 @@ def get_db_connection():
             logger.warning(f"Connection attempt {attempt + 1} failed, retrying...")
             time.sleep(5)
 
-def validate_decimal_precision(df, column, precision, scale):
-    """Validate decimal values against schema precision/scale"""
-    max_value = 10 ** (precision - scale) - 1
-    min_value = -max_value
-    invalid_rows = df[
-        (df[column].notna()) & 
-        ((df[column] > max_value) | (df[column] < min_value))
-    ]
-    if not invalid_rows.empty:
-        raise ValueError(f"Values in {column} exceed precision {precision},{scale}")
-
-def validate_data(df, table_name):
-    """Validate dataframe against table schema constraints"""
-    schema_constraints = {
-        'bls_housing_cpi': {
-            'housing_cpi': (10, 2),
-            'shelter_cpi': (10, 2),
-            'fuels_utilities_cpi': (10, 2),
-            'household_furnishings_cpi': (10, 2),
-            'housing_cpi_mom': (6, 3),
-            'shelter_cpi_mom': (6, 3),
-            'fuels_utilities_mom': (6, 3),
-            'furnishings_mom': (6, 3),
-            'housing_cpi_yoy': (6, 3),
-            'shelter_cpi_yoy': (6, 3),
-            'fuels_utilities_yoy': (6, 3),
-            'furnishings_yoy': (6, 3)
-        },
-        'census_housing': {
-            'median_home_value': (12, 2),
-            'median_monthly_cost': (8, 2),
-            'vacancy_rate': (5, 2),
-            'homeownership_rate': (5, 2)
-        },
-        'kaggle_housing_prices': {
-            'us_national': (10, 2),
-            'city_composite_20': (10, 2),
-            'city_composite_10': (10, 2),
-            'us_national_mom': (6, 3),
-            'city_20_mom': (6, 3),
-            'city_10_mom': (6, 3),
-            'us_national_yoy': (6, 3),
-            'city_20_yoy': (6, 3),
-            'city_10_yoy': (6, 3)
-        },
-        'wages_education': {
-            'wage_value': (10, 2),
-            'wage_yoy_change': (6, 3)
-        },
-        'interest_rates': {
-            'fed_funds_target': (5, 2),
-            'fed_funds_upper': (5, 2),
-            'fed_funds_lower': (5, 2),
-            'effective_rate': (5, 2),
-            'real_gdp_change': (5, 2),
-            'unemployment_rate': (5, 2),
-            'inflation_rate': (5, 2),
-            'target_rate_mom': (6, 3),
-            'effective_rate_mom': (6, 3),
-            'target_rate_yoy': (6, 3),
-            'effective_rate_yoy': (6, 3)
-        },
-        'zillow_housing': {
-            'price': (12, 2),
-            'price_mom': (6, 3),
-            'price_yoy': (6, 3)
-        },
-        'zillow_home_value_index': {
-            'home_value_index': (12, 2),
-            'hvi_mom': (6, 3),
-            'hvi_yoy': (6, 3)
-        }
-    }
-    
-    if table_name in schema_constraints:
-        for column, (precision, scale) in schema_constraints[table_name].items():
-            if column in df.columns:
-                try:
-                    validate_decimal_precision(df, column, precision, scale)
-                except ValueError as e:
-                    logger.error(f"Validation error in {table_name}.{column}: {str(e)}")
-                    raise
+def validate_data(validator, df, table_name):
+    """Validate dataframe against the table's schema constraints, raising with a full report"""
+    report = validator.validate(df, table_name)
+    if report['warnings']:
+        logger.warning(f"Validation warnings:\n{format_report(report)}")
+    if report['errors']:
+        logger.error(f"Validation errors:\n{format_report(report)}")
+        raise ValueError(f"{report['errors']} values in {table_name} violate schema constraints")
+    return report
 
-def upsert_data(conn, df, table_name, unique_columns):
+def upsert_data(conn, df, table_name, unique_columns, commit=True):
     """Upsert data directly using ON CONFLICT"""
     try:
-        # Convert DataFrame to list of tuples
-        data = df.values.tolist()
+        # Convert DataFrame to list of tuples (NaN becomes NULL, not numeric 'NaN')
+        data = df.astype(object).where(df.notna(), None).values.tolist()
         
         # Get column names excluding id and created_at
         columns = [col for col in df.columns]
@@ -180,21 +128,47 @@ def upsert_data(conn, df, table_name, unique_columns):
         # Execute the upsert
         with conn.cursor() as cur:
             execute_values(cur, query, data, template=None, page_size=100)
+        if commit:
             conn.commit()
             
     except Exception as e:
         logger.error(f"Error in upsert process for {table_name}: {str(e)}")
         raise
 
-def load_dataset(conn, dataset_name, df, table_name, unique_columns):
-    """Load a single dataset with validation and error handling"""
-    logger.info(f"Loading {dataset_name}...")
+def load_dataset(conn, dataset_name, df, table_name, unique_columns, validator=None,
+                 source_hash=None, transform_version=None, chunk_size=CHUNK_SIZE):
+    """
+    Load a single dataset in checkpointed chunks with validation and error handling.
+
+    Each chunk is validated, upserted and recorded in load_checkpoints in one
+    transaction. If a checkpoint for the same source hash and transform version
+    exists, loading resumes after the last committed chunk.
+    """
+    total_chunks = max(-(-len(df) // chunk_size), 1)
+    start = (resume_chunk(conn, table_name, source_hash, transform_version, chunk_size)
+             if source_hash else 0)
+    if start:
+        logger.info(f"Resuming {dataset_name} at chunk {start + 1}/{total_chunks}")
+    else:
+        logger.info(f"Loading {dataset_name}...")
+    
+    validator = validator or SchemaValidator(conn)
     try:
-        validate_data(df, table_name)
-        logger.info(f"Validated {len(df)} rows for {dataset_name}")
-        
-        upsert_data(conn, df, table_name, unique_columns)
-        logger.info(f"Successfully loaded {dataset_name}")
+        for chunk_index in range(start, total_chunks):
+            chunk = df.iloc[chunk_index * chunk_size:(chunk_index + 1) * chunk_size]
+            with span('validate', table=table_name) as s:
+                validate_data(validator, chunk, table_name)
+                s['rows'] = len(chunk)
+            with span('upsert', table=table_name) as s:
+                upsert_data(conn, chunk, table_name, unique_columns, commit=False)
+                s['rows'] = len(chunk)
+            if source_hash:
+                save_checkpoint(conn, table_name, source_hash, transform_version, chunk_size,
+                                chunk_index + 1, total_chunks)
+            with span('commit', table=table_name):
+                conn.commit()
+            logger.info(f"Committed chunk {chunk_index + 1}/{total_chunks} of {dataset_name}")
+        logger.info(f"Successfully loaded {dataset_name} ({len(df)} rows)")
         
     except psycopg2.Error as e:
         logger.error(f"Database error loading {dataset_name}: {str(e)}")
@@ -206,6 +180,16 @@ def load_dataset(conn, dataset_name, df, table_name, unique_columns):
         logger.error(f"Unexpected error loading {dataset_name}: {str(e)}")
         raise
 
+def reconnect(conn, validator):
+    """Close a broken connection (ignoring errors) and open a new one for the validator too"""
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+    conn = get_db_connection()
+    validator.conn = conn
+    return conn
+
 def check_existing_tables(conn):
     """Check existing tables and their structure in Supabase"""
     logger.info("Checking existing database structure...")
@@ -240,8 +224,20 @@ def check_existing_tables(conn):
                           (f"({col[2]})" if col[2] else "") +
                           (f"({col[3]},{col[4]})" if col[3] else ""))
 
-def load_data_to_supabase():
-    """Main function to load all datasets to Supabase"""
+def load_data_to_supabase(engine=None, force=False):
+    """
+    Main function to load all datasets to Supabase.
+
+    Tables whose source hash and transform version match the last successful
+    load recorded in load_runs are skipped unless force is set.
+
+    Args:
+        engine (DatasetEngine): Engine to take the DataFrames from. Passing the
+            engine already used for another target reuses its parsed sources.
+        force (bool): Reload every table even if its source is unchanged.
+    Returns:
+        dict: Table name -> {'status', 'rows', 'error'} for the run summary.
+    """
     logger.info("Starting Supabase data loading process...")
     
     conn = None
@@ -254,172 +250,74 @@ def load_data_to_supabase():
         # Ask user if they want to proceed with data loading
         logger.info("\nDatabase structure check complete.")
         
-        # Load BLS data
-        df = pd.read_csv('data/bls/bls_housing_processed.csv')
-        # Select only the columns we need and map them to schema names
-        df = df[['date', 'Fuels_Utilities', 'Household_Furnishings', 'Housing', 'Shelter']]
-        column_mapping = {
-            'date': 'date',
-            'Fuels_Utilities': 'fuels_utilities_cpi',
-            'Household_Furnishings': 'household_furnishings_cpi',
-            'Housing': 'housing_cpi',
-            'Shelter': 'shelter_cpi'
-        }
-        df = df.rename(columns=column_mapping)
-        df['housing_cpi_mom'] = df['housing_cpi'].pct_change().round(3)
-        df['shelter_cpi_mom'] = df['shelter_cpi'].pct_change().round(3)
-        df['fuels_utilities_mom'] = df['fuels_utilities_cpi'].pct_change().round(3)
-        df['furnishings_mom'] = df['household_furnishings_cpi'].pct_change().round(3)
-        df['housing_cpi_yoy'] = df['housing_cpi'].pct_change(12).round(3)
-        df['shelter_cpi_yoy'] = df['shelter_cpi'].pct_change(12).round(3)
-        df['fuels_utilities_yoy'] = df['fuels_utilities_cpi'].pct_change(12).round(3)
-        df['furnishings_yoy'] = df['household_furnishings_cpi'].pct_change(12).round(3)
-        load_dataset(conn, "BLS Housing CPI", df, 'bls_housing_cpi', ['date'])
-        
-        # Load Census data
-        df = pd.read_csv('data/census/census_housing_processed.csv')
-        column_mapping = {
-            'state': 'state',
-            'year': 'year',
-            'Total_Housing_Units': 'total_housing_units',
-            'Occupied_Units': 'occupied_units',
-            'Vacant_Units': 'vacant_units',
-            'Owner_Occupied': 'owner_occupied',
-            'Renter_Occupied': 'renter_occupied',
-            'Median_Home_Value': 'median_home_value',
-            'Median_Monthly_Housing_Cost': 'median_monthly_cost',
-            'Vacancy_Rate': 'vacancy_rate',
-            'Homeownership_Rate': 'homeownership_rate'
-        }
-        df = df.rename(columns=column_mapping)
-        load_dataset(conn, "Census Housing", df, 'census_housing', ['state', 'year'])
-        
-        # Load Kaggle Housing Prices
-        df = pd.read_csv('data/kaggle/housing/kaggle_housing_processed.csv')
-        # Select only the columns we need
-        df = df[['date', 'U.S. National', '20-City Composite', '10-City Composite']]
-        column_mapping = {
-            'date': 'date',
-            'U.S. National': 'us_national',
-            '20-City Composite': 'city_composite_20',
-            '10-City Composite': 'city_composite_10'
-        }
-        df = df.rename(columns=column_mapping)
-        df['us_national_mom'] = df['us_national'].pct_change().round(3)
-        df['city_20_mom'] = df['city_composite_20'].pct_change().round(3)
-        df['city_10_mom'] = df['city_composite_10'].pct_change().round(3)
-        df['us_national_yoy'] = df['us_national'].pct_change(12).round(3)
-        df['city_20_yoy'] = df['city_composite_20'].pct_change(12).round(3)
-        df['city_10_yoy'] = df['city_composite_10'].pct_change(12).round(3)
-        load_dataset(conn, "Kaggle Housing Prices", df, 'kaggle_housing_prices', ['date'])
-        
-        # Load Wages data
-        df = pd.read_csv('data/kaggle/wages/kaggle_wages_processed.csv')
-        melted_df = pd.melt(df, id_vars=['Year'], var_name='category', value_name='wage_value')
-        melted_df[['demographic_group', 'education_level']] = melted_df['category'].str.split('_', n=1, expand=True)
-        melted_df = melted_df.drop('category', axis=1)
-        melted_df = melted_df.rename(columns={'Year': 'year'})
-        melted_df['wage_yoy_change'] = melted_df.groupby(['demographic_group', 'education_level'])['wage_value'].pct_change(fill_method=None).round(3)
-        melted_df['wage_yoy_change'] = melted_df['wage_yoy_change'].replace([float('inf'), float('-inf')], None)
-        load_dataset(conn, "Wages Education", melted_df, 'wages_education', ['year', 'education_level', 'demographic_group'])
-        
-        # Load Interest Rates data
-        df = pd.read_csv('data/kaggle/interest_rates/kaggle_interest_rates_processed.csv')
-        # First rename columns
-        column_mapping = {
-            'Date': 'date',
-            'Federal Funds Target Rate': 'fed_funds_target',
-            'Federal Funds Upper Target': 'fed_funds_upper',
-            'Federal Funds Lower Target': 'fed_funds_lower',
-            'Effective Federal Funds Rate': 'effective_rate',
-            'Real GDP (Percent Change)': 'real_gdp_change',
-            'Unemployment Rate': 'unemployment_rate',
-            'Inflation Rate': 'inflation_rate'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Calculate rate changes
-        df['target_rate_mom'] = df['fed_funds_target'].pct_change(fill_method=None).round(3)
-        df['effective_rate_mom'] = df['effective_rate'].pct_change(fill_method=None).round(3)
-        df['target_rate_yoy'] = df['fed_funds_target'].pct_change(12, fill_method=None).round(3)
-        df['effective_rate_yoy'] = df['effective_rate'].pct_change(12, fill_method=None).round(3)
-        
-        # Replace inf values with None
-        for col in ['target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy']:
-            df[col] = df[col].replace([float('inf'), float('-inf')], None)
+        engine = engine or DatasetEngine()
+        ensure_load_runs_table(conn)
+        ensure_checkpoints_table(conn)
+        conn.commit()
         
-        # Ensure columns are in the correct order
-        columns = [
-            'date', 'fed_funds_target', 'fed_funds_upper', 'fed_funds_lower',
-            'effective_rate', 'real_gdp_change', 'unemployment_rate', 'inflation_rate',
-            'target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy'
-        ]
-        df = df[columns]
-        load_dataset(conn, "Interest Rates", df, 'interest_rates', ['date'])
-        
-        # Load Zillow Housing data
-        df = pd.read_csv('data/kaggle/zillow/kaggle_zillow_processed.csv')
-        # Select only the columns we need
-        df = df[['Date', 'RegionName', 'State', 'Metro', 'CountyName', 'Price', 'Price_MoM', 'Price_YoY']]
-        column_mapping = {
-            'Date': 'date',
-            'RegionName': 'region_name',
-            'State': 'state',
-            'Metro': 'metro_area',
-            'CountyName': 'county_name',
-            'Price': 'price',
-            'Price_MoM': 'price_mom',
-            'Price_YoY': 'price_yoy'
-        }
-        df = df.rename(columns=column_mapping)
-        # Ensure columns are in the correct order
-        columns = ['date', 'region_name', 'state', 'metro_area', 'county_name', 'price', 'price_mom', 'price_yoy']
-        df = df[columns]
-        df = df.sort_values(['date', 'region_name']).drop_duplicates(['date', 'region_name'], keep='last')
-        load_dataset(conn, "Zillow Housing", df, 'zillow_housing', ['date', 'region_name'])
-        
-        # Load Zillow HVI data
-        df = pd.read_csv('data/cleaned/zillow_hvi_cleaned.csv')
-        df['date'] = pd.to_datetime(df['date'])
-        state_cols = [col for col in df.columns if col != 'date' and not col.endswith('_MoM')]
-        df_melted = pd.melt(df, id_vars=['date'], value_vars=state_cols,
-                           var_name='state', value_name='home_value_index')
-        df_melted = df_melted.sort_values(['date', 'state']).drop_duplicates(['date', 'state'])
-        df_melted['home_value_index'] = pd.to_numeric(df_melted['home_value_index'], errors='coerce')
-        df_melted = df_melted.sort_values(['date', 'state', 'home_value_index'], ascending=[True, True, False])
-        df_melted = df_melted.drop_duplicates(['date', 'state'], keep='first')
-        
-        dfs = []
-        for state in df_melted['state'].unique():
-            state_df = df_melted[df_melted['state'] == state].copy()
-            state_df = state_df.sort_values('date')
-            state_df['hvi_mom'] = state_df['home_value_index'].pct_change().round(3)
-            state_df['hvi_yoy'] = state_df['home_value_index'].pct_change(12).round(3)
-            dfs.append(state_df)
-        df_melted = pd.concat(dfs, ignore_index=True)
-        
-        for col in ['hvi_mom', 'hvi_yoy']:
-            df_melted[col] = df_melted[col].replace([float('inf'), float('-inf')], None)
-        load_dataset(conn, "Zillow Home Value Index", df_melted, 'zillow_home_value_index', ['date', 'state'])
+        validator = SchemaValidator(conn)
+        summary = {}
+        for table_name, spec in DATASETS.items():
+            source_path = engine.source_path(table_name)
+            fingerprint = None
+            try:
+                with span('fingerprint', table=table_name):
+                    fingerprint = fingerprint_source(source_path)
+                if not force and is_unchanged(conn, table_name, fingerprint, spec['version']):
+                    logger.info(f"Skipping {spec['name']} (source unchanged)")
+                    summary[table_name] = {'status': 'skipped'}
+                    continue
+                
+                # Tables with a lookup map their natural key to the ids the database assigned
+                df = resolve_keys(conn, spec, engine.build(table_name))
+                if is_partitioned(conn, table_name):
+                    # Upserts are routed to yearly partitions, which must exist first
+                    ensure_partitions(conn, table_name, partition_years(df, PARTITIONED_TABLES[table_name]))
+                    conn.commit()
+                for attempt in range(MAX_RETRIES + 1):
+                    try:
+                        load_dataset(conn, spec['name'], df, table_name, spec['unique_keys'],
+                                     validator, source_hash=fingerprint['source_hash'],
+                                     transform_version=spec['version'])
+                        break
+                    except psycopg2.OperationalError as e:
+                        # Transient network/pooler failure: reconnect and resume from the checkpoint
+                        if attempt == MAX_RETRIES:
+                            raise
+                        delay = backoff_delay(attempt)
+                        logger.warning(f"Connection error on {spec['name']} "
+                                       f"(attempt {attempt + 1}/{MAX_RETRIES}), retrying in {delay:.1f}s: {str(e)}")
+                        time.sleep(delay)
+                        conn = reconnect(conn, validator)
+                record_run(conn, table_name, source_path, fingerprint, spec['version'],
+                           'loaded', loaded_rows=len(df))
+                conn.commit()
+                summary[table_name] = {'status': 'loaded', 'rows': len(df)}
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    # The connection broke without being marked closed
+                    conn = reconnect(conn, validator)
+                record_run(conn, table_name, source_path, fingerprint, spec['version'],
+                           'failed', error=str(e))
+                conn.commit()
+                summary[table_name] = {'status': 'failed', 'error': str(e)}
         
         # Verify all data was loaded
         with conn.cursor() as cur:
-            tables = {
-                'BLS Housing CPI': 'bls_housing_cpi',
-                'Census Housing': 'census_housing',
-                'Kaggle Housing Prices': 'kaggle_housing_prices',
-                'Wages Education': 'wages_education',
-                'Interest Rates': 'interest_rates',
-                'Zillow Housing': 'zillow_housing',
-                'Zillow Home Value Index': 'zillow_home_value_index'
-            }
             logger.info("\nVerifying data loaded:")
-            for name, table in tables.items():
-                cur.execute(f"SELECT COUNT(*) FROM public.{table}")
+            for table_name, spec in DATASETS.items():
+                cur.execute(f"SELECT COUNT(*) FROM public.{table_name}")
                 count = cur.fetchone()[0]
-                logger.info(f"{name}: {count} rows")
+                logger.info(f"{spec['name']}: {count} rows")
         
+        logger.info("\n" + format_run_summary(summary))
+        failed = [table for table, result in summary.items() if result['status'] == 'failed']
+        if failed:
+            raise RuntimeError(f"Failed to load: {', '.join(failed)}")
         logger.info("\nAll data loaded and committed successfully!")
+        return summary
         
     except Exception as e:
         logger.error(f"Error in data loading process: {str(e)}")
@@ -430,8 +328,13 @@ def load_data_to_supabase():
             logger.info("Database connection closed")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--force', action='store_true', help='Reload tables even if their source is unchanged')
+    args = parser.parse_args()
+    
     try:
-        load_data_to_supabase()
+        load_data_to_supabase(force=args.force)
     except Exception as e:
         logger.error(f"Failed to complete data loading: {str(e)}")
         exit(1)
@@ -1,14 +1,26 @@
 import os
-import pandas as pd
+import sys
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from data_cleaning import (
     clean_kaggle_housing,
     clean_wages,
     clean_interest_rates,
     clean_zillow,
     clean_zillow_hvi,
-    inspect_data
+    StreamCleaner,
+    ZILLOW_STEPS
 )
 
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from profiling import span, flush_trace
+from storage import write_frame, resolve_path
+from schemas import read_dataset
+from cleaning_report import CleaningReport, write_run_report
+
 # Define file paths
 datasets = {
     "kaggle_housing": "data/kaggle/housing/kaggle_housing_raw.csv",
@@ -31,59 +43,210 @@ cleaning_functions = {
     "census": clean_kaggle_housing  # Using similar cleaning strategy as housing data
 }
 
-def process_dataset(dataset_name, file_path):
+# Streaming equivalents (steps, missing strategy) of the cleaning functions, used with --chunksize
+streaming_steps = {
+    "kaggle_housing": (("missing",), "mean"),
+    "interest_rates": (("missing", "numeric"), "drop"),
+    "zillow": (ZILLOW_STEPS, "mean"),
+    "bls": (("missing",), "mean"),
+    "census": (("missing",), "mean")
+}
+
+def summary_of(state):
+    """inspect_data-style summary (missing_values, duplicates, numeric_issues) of a report state"""
+    return {key: value for key, value in state.items() if key != 'rows'}
+
+def stream_dataset(dataset_name, file_path, chunksize):
+    """
+    Clean a CSV source chunk by chunk with StreamCleaner, without loading it whole.
+    
+    Args:
+        dataset_name (str): Name of the dataset (a key of streaming_steps)
+        file_path (Path): CSV source
+        chunksize (int): Rows per chunk
+    Returns:
+        dict: Report with the stream's initial/final counts and no per-step entries.
+    """
+    steps, strategy = streaming_steps[dataset_name]
+    start = time.perf_counter()
+    with span('stream_clean', dataset=dataset_name) as s:
+        summary = StreamCleaner(steps, strategy, chunksize=chunksize).clean_file(
+            file_path, f"data/cleaned/{dataset_name}_cleaned.csv")
+        s['rows'] = summary['rows_in']
+    # Only duplicates that were removed are counted; none remain afterwards when deduplicating
+    return {
+        'dataset': dataset_name,
+        'initial': dict(summary['initial'], rows=summary['rows_in'], duplicates=summary['duplicates_removed']),
+        'final': dict(summary['final'], rows=summary['rows_out'], duplicates=0),
+        'rows_removed': summary['rows_in'] - summary['rows_out'],
+        'seconds': round(time.perf_counter() - start, 3),
+        'streamed': {'steps': list(steps), 'chunks': summary['chunks']},
+        'steps': [],
+        'output': summary['output']
+    }
+
+def process_dataset(dataset_name, file_path, chunksize=None):
     """
     Process a single dataset through the cleaning pipeline.
     
     Args:
         dataset_name (str): Name of the dataset
         file_path (str): Path to the dataset file
+        chunksize (int): Stream CSV sources with a streaming equivalent in chunks
+            of this many rows instead of reading them whole.
+    Returns:
+        dict: 'dataset', 'status' ('cleaned' or 'failed'), 'initial_summary',
+            'final_summary', 'report' (see CleaningReport), 'output', 'error' and 'seconds'.
     """
     print(f"Processing {dataset_name}...")
+    result = {'dataset': dataset_name, 'status': 'failed', 'initial_summary': None,
+              'final_summary': None, 'report': None, 'output': None, 'error': None}
+    start = time.perf_counter()
     
     try:
-        # Load the dataset
-        df = pd.read_csv(file_path)
+        source = resolve_path(file_path)
+        if chunksize and dataset_name in streaming_steps and source.suffix == '.csv':
+            if not source.exists():
+                raise FileNotFoundError(file_path)
+            report = stream_dataset(dataset_name, source, chunksize)
+            result.update({
+                'status': 'cleaned',
+                'initial_summary': summary_of(report['initial']),
+                'final_summary': summary_of(report['final']),
+                'report': report,
+                'output': report.pop('output')
+            })
+            return result
         
-        # Get initial data quality metrics
-        initial_summary = inspect_data(df)
-        print(f"Initial Summary: {initial_summary}")
-
-        # Clean the data using the appropriate cleaning function
-        cleaned_df = cleaning_functions[dataset_name](df)
+        # Load the dataset
+        with span('read', dataset=dataset_name) as s:
+            df = read_dataset(file_path, strict=False, project=False)
+            s['rows'] = len(df)
         
-        # Get final data quality metrics
-        final_summary = inspect_data(cleaned_df)
-        print(f"Final Summary: {final_summary}")
-
-        # Create output directory if it doesn't exist
-        os.makedirs("cleaned_data", exist_ok=True)
+        # Clean the data using the appropriate cleaning function; the report profiles
+        # the input once and reuses each step's counts for the cleaned output
+        report = CleaningReport(dataset_name)
+        with span('clean', dataset=dataset_name) as s:
+            report.start(df)
+            cleaned_df = cleaning_functions[dataset_name](df, report=report)
+            report.finish(cleaned_df)
+            s['rows'] = len(cleaned_df)
         
         # Save the cleaned dataset
         cleaned_file_path = f"data/cleaned/{dataset_name}_cleaned.csv"
-        cleaned_df.to_csv(cleaned_file_path, index=False)
-        print(f"Cleaned dataset saved to {cleaned_file_path}")
+        with span('write', dataset=dataset_name) as s:
+            cleaned_file_path = write_frame(cleaned_df, cleaned_file_path)
+            s['rows'] = len(cleaned_df)
         
-        # Print improvement metrics
-        print(f"Improvements:")
-        print(f"- Missing values reduced by: {initial_summary['missing_values'] - final_summary['missing_values']}")
-        print(f"- Duplicates removed: {initial_summary['duplicates'] - final_summary['duplicates']}")
-        print(f"- Numeric issues resolved: {initial_summary['numeric_issues'] - final_summary['numeric_issues']}\n")
+        result.update({
+            'status': 'cleaned',
+            'initial_summary': summary_of(report.initial),
+            'final_summary': summary_of(report.final),
+            'report': report.to_dict(),
+            'output': str(cleaned_file_path)
+        })
         
     except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
+        result['error'] = f"File not found at {file_path}"
     except Exception as e:
-        print(f"Error processing {dataset_name}: {str(e)}")
+        result['error'] = str(e)
+    finally:
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        # Pool workers exit without running atexit hooks; save their spans now
+        if multiprocessing.parent_process() is not None:
+            flush_trace()
+    return result
+
+def print_result(result):
+    """Print the outcome and improvement metrics of one processed dataset"""
+    dataset_name = result['dataset']
+    if result['status'] != 'cleaned':
+        print(f"Error processing {dataset_name}: {result['error']}\n")
+        return
+    
+    initial_summary = result['initial_summary']
+    final_summary = result['final_summary']
+    print(f"{dataset_name} cleaned in {result['seconds']}s")
+    print(f"Initial Summary: {initial_summary}")
+    print(f"Final Summary: {final_summary}")
+    print(f"Cleaned dataset saved to {result['output']}")
+    
+    # Print improvement metrics
+    print(f"Improvements:")
+    print(f"- Missing values reduced by: {initial_summary['missing_values'] - final_summary['missing_values']}")
+    print(f"- Duplicates removed: {initial_summary['duplicates'] - final_summary['duplicates']}")
+    print(f"- Numeric issues resolved: {initial_summary['numeric_issues'] - final_summary['numeric_issues']}\n")
+
+def largest_first(dataset_paths):
+    """Order datasets by source file size, largest first, so the longest job starts immediately"""
+    def size(item):
+        path = resolve_path(item[1])
+        return path.stat().st_size if path.exists() else 0
+    return sorted(dataset_paths.items(), key=size, reverse=True)
+
+def process_all(dataset_paths, workers=None, chunksize=None):
+    """
+    Clean datasets in parallel worker processes.
+    
+    Args:
+        dataset_paths (dict): Dataset name -> raw file path.
+        workers (int): Worker processes; defaults to one per CPU (at most one per
+            dataset). 1 cleans in this process.
+        chunksize (int): Stream large CSV sources in chunks (see process_dataset).
+    Returns:
+        dict: Dataset name -> result from process_dataset.
+    """
+    jobs = largest_first(dataset_paths)
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    results = {}
+    
+    if workers <= 1:
+        for dataset_name, file_path in jobs:
+            results[dataset_name] = process_dataset(dataset_name, file_path, chunksize)
+            print_result(results[dataset_name])
+        return results
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_dataset, dataset_name, file_path, chunksize): dataset_name
+            for dataset_name, file_path in jobs
+        }
+        for future in as_completed(futures):
+            dataset_name = futures[future]
+            try:
+                results[dataset_name] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory); the other datasets carry on
+                results[dataset_name] = {'dataset': dataset_name, 'status': 'failed', 'error': str(e)}
+            print_result(results[dataset_name])
+    return results
 
 def main():
     """
     Main function to process all datasets through the cleaning pipeline.
     """
+    parser = argparse.ArgumentParser(description='Clean the raw datasets')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU, 1 = sequential)')
+    parser.add_argument('--chunksize', type=int,
+                        help='Stream CSV sources in chunks of this many rows instead of loading them whole')
+    args = parser.parse_args()
+    
     print("Starting data cleaning process...\n")
     
-    for dataset_name, file_path in datasets.items():
-        process_dataset(dataset_name, file_path)
+    os.makedirs("data/cleaned", exist_ok=True)
+    start = time.perf_counter()
+    results = process_all(datasets, workers=args.workers, chunksize=args.chunksize)
+    
+    reports = {name: result.get('report') or {'dataset': name, 'error': result['error']}
+               for name, result in results.items()}
+    report_path = write_run_report(reports, workers=args.workers, chunksize=args.chunksize,
+                                   seconds=round(time.perf_counter() - start, 3))
+    print(f"Cleaning report written to {report_path}")
     
+    failed = [name for name, result in results.items() if result['status'] != 'cleaned']
+    print(f"Cleaned {len(results) - len(failed)}/{len(results)} datasets in {time.perf_counter() - start:.1f}s")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
     print("Data cleaning process completed!")
 
 if __name__ == "__main__":
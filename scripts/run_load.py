@@ -0,0 +1,35 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'scrapers'))
+from registry import DatasetEngine
+from load_to_db import DatabaseLoader
+from load_to_supabase_improved import load_data_to_supabase
+
+def main():
+    """Load every registry dataset into the requested targets, parsing each source once"""
+    parser = argparse.ArgumentParser(description='Load housing datasets into one or more databases')
+    parser.add_argument('--targets', nargs='+', choices=['local', 'supabase'], default=['local'],
+                        help='Databases to load (default: local)')
+    parser.add_argument('--no-schema', action='store_true', help='Skip schema creation for the local database')
+    parser.add_argument('--force', action='store_true', help='Reload tables even if their source is unchanged')
+    parser.add_argument('--full-reload', action='store_true',
+                        help='Rebuild local tables as shadow copies and swap them in without read downtime')
+    parser.add_argument('--partitioned', action='store_true',
+                        help='Partition the local zillow_housing by year and reload only changed years')
+    args = parser.parse_args()
+
+    # Shared engine: the first target parses and transforms, later targets reuse the frames
+    engine = DatasetEngine()
+
+    if 'local' in args.targets:
+        loader = DatabaseLoader()
+        loader.load_all_data(drop_existing=True, create_schema=not args.no_schema,
+                             engine=engine, force=args.force, full_reload=args.full_reload,
+                             partitioned=args.partitioned)
+    if 'supabase' in args.targets:
+        load_data_to_supabase(engine=engine, force=args.force)
+
+if __name__ == "__main__":
+    main()
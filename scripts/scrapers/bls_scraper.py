@@ -1,17 +1,26 @@
-import requests
 import pandas as pd
 import os
+import argparse
 from datetime import datetime
-import json
-import time
 from dotenv import load_dotenv
+from profiling import span
+from storage import write_frame
+from http_client import RateLimitedClient
+from response_cache import ResponseCache, CURRENT_MAX_AGE
+
+# BLS API v2 limits per request, keyed by whether a registration key is used
+SERIES_PER_REQUEST = {True: 50, False: 25}
+YEARS_PER_REQUEST = {True: 20, False: 10}
 
 class BLSHousingScraper:
-    def __init__(self, api_key=None):
-        """Initialize BLS scraper with optional API key"""
+    def __init__(self, api_key=None, use_cache=True, refresh=False):
+        """Initialize BLS scraper with optional API key and on-disk response cache"""
         self.base_url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
         self.api_key = api_key
         self.headers = {'Content-type': 'application/json'}
+        # BLS enforces daily quotas rather than a published rate; stay polite
+        self.client = RateLimitedClient(rate=2, burst=4, max_workers=4, headers=self.headers,
+                                        cache=ResponseCache() if use_cache else None, refresh=refresh)
         
         # Load environment variables from the correct location
         dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
@@ -30,55 +39,135 @@ class BLSHousingScraper:
             'CUUR0000SAH3': 'Household_Furnishings',  # Household furnishings and operations
         }
 
-    def fetch_data(self, start_year, end_year=None):
-        """Fetch housing data from BLS API"""
-        if end_year is None:
-            end_year = datetime.now().year
+    def plan_requests(self, series_ids, start_year, end_year):
+        """
+        Split a series list and year range into windows the BLS API accepts.
 
-        data = []
-        
-        # BLS API allows 50 series per request
+        The v2 API caps series and years per request (SERIES_PER_REQUEST and
+        YEARS_PER_REQUEST, which are higher with a registration key).
+
+        Args:
+            series_ids (list): BLS series IDs.
+            start_year (int): First year.
+            end_year (int): Last year (inclusive).
+        Returns:
+            list: (series_chunk, window_start, window_end) tuples.
+        """
+        keyed = bool(self.api_key)
+        max_series = SERIES_PER_REQUEST[keyed]
+        max_years = YEARS_PER_REQUEST[keyed]
+        plan = []
+        for i in range(0, len(series_ids), max_series):
+            chunk = series_ids[i:i + max_series]
+            for window_start in range(start_year, end_year + 1, max_years):
+                plan.append((chunk, window_start, min(window_start + max_years - 1, end_year)))
+        return plan
+
+    def window_final_at(self, window_end):
+        """
+        Time after which a request window's response can no longer change.
+
+        Unadjusted CPI values are not revised, so a window is final once its
+        last December has been published (mid-January of the following year);
+        responses fetched from February 1st on are cached forever. Earlier
+        fetches may be missing months and are refetched after CURRENT_MAX_AGE.
+        """
+        return datetime(window_end + 1, 2, 1).timestamp()
+
+    def fetch_window(self, request):
+        """
+        POST one planned request.
+        Args:
+            request (tuple): (series_chunk, window_start, window_end) from plan_requests.
+        Returns:
+            list: The response's series objects.
+        Raises:
+            ValueError: If BLS sent an empty response or did not process the
+                request (e.g. daily quota exceeded).
+        """
+        series_chunk, window_start, window_end = request
         payload = {
-            "seriesid": list(self.series_ids.keys()),
-            "startyear": str(start_year),
-            "endyear": str(end_year),
-            "registrationkey": self.api_key
+            "seriesid": series_chunk,
+            "startyear": str(window_start),
+            "endyear": str(window_end)
         }
+        if self.api_key:
+            payload["registrationkey"] = self.api_key
+
+        with span('http_fetch', source='bls', start_year=window_start, series=len(series_chunk)):
+            json_data = self.client.fetch_json(
+                'POST', self.base_url, max_age=CURRENT_MAX_AGE, json_body=payload,
+                cacheable=lambda data: data.get('status') == 'REQUEST_SUCCEEDED',
+                final_at=self.window_final_at(window_end)
+            )
+        if json_data is None:
+            raise ValueError(f"Empty response for window {window_start}-{window_end} "
+                             f"({len(series_chunk)} series)")
+        if json_data.get('status') != 'REQUEST_SUCCEEDED':
+            raise ValueError(json_data.get('message', 'Unknown error'))
+        return json_data['Results']['series']
+
+    def parse_series(self, series_list, series_names):
+        """
+        Flatten series objects into one long DataFrame without per-item Python loops.
 
-        try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-            json_data = response.json()
-
-            if json_data.get('status') != 'REQUEST_SUCCEEDED':
-                print(f"Error: {json_data.get('message', 'Unknown error')}")
-                return None
-
-            # Process each series
-            for series in json_data['Results']['series']:
-                series_id = series['seriesID']
-                series_name = self.series_ids[series_id]
-                
-                for item in series['data']:
-                    year = item['year']
-                    period = item['period'].replace('M', '')  # Convert M01 to 1
-                    value = item['value']
-                    
-                    data.append({
-                        'date': f"{year}-{period}",
-                        'series_id': series_id,
-                        'series_name': series_name,
-                        'value': value
-                    })
-
-            return pd.DataFrame(data)
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data: {e}")
+        Only monthly periods (M01-M12) are kept; M13 is the annual average.
+
+        Args:
+            series_list (list): Series objects from fetch_window.
+            series_names (dict): Series ID -> name; unknown IDs keep their ID as name.
+        Returns:
+            pd.DataFrame: date (YYYY-MM), series_id, series_name and value columns.
+        """
+        series_list = [series for series in series_list if series.get('data')]
+        if not series_list:
+            return pd.DataFrame(columns=['date', 'series_id', 'series_name', 'value'])
+
+        df = pd.json_normalize(series_list, record_path='data', meta=['seriesID'])
+        df = df[df['period'].str.match(r'M(0[1-9]|1[0-2])$')]
+        ids = df['seriesID']
+        df = pd.DataFrame({
+            'date': df['year'] + '-' + df['period'].str[1:],
+            'series_id': ids,
+            'series_name': ids.map(series_names).fillna(ids),
+            'value': pd.to_numeric(df['value'], errors='coerce')
+        })
+        return df.drop_duplicates(['series_id', 'date']).sort_values(['series_id', 'date'], ignore_index=True)
+
+    def fetch_data(self, start_year, end_year=None, series_ids=None):
+        """
+        Fetch housing data from BLS API, in concurrent rate-limited request windows.
+        Args:
+            start_year (int): First year.
+            end_year (int): Last year, defaults to the current year.
+            series_ids (dict): Series ID -> name, defaults to self.series_ids.
+        Returns:
+            pd.DataFrame or None: Long frame from parse_series, or None if every request failed.
+        """
+        if end_year is None:
+            end_year = datetime.now().year
+        series_ids = series_ids or self.series_ids
+
+        plan = self.plan_requests(list(series_ids), start_year, end_year)
+        print(f"Fetching {len(series_ids)} series for {start_year}-{end_year} in {len(plan)} requests...")
+        results = self.client.map(self.fetch_window, plan)
+
+        series_list = []
+        for (chunk, window_start, window_end), series, error in results:
+            if error is not None:
+                print(f"Error fetching {len(chunk)} series for {window_start}-{window_end}: {error}")
+            else:
+                series_list.extend(series)
+        if not series_list:
             return None
 
+        with span('parse', source='bls') as s:
+            df = self.parse_series(series_list, series_ids)
+            s['rows'] = len(df)
+        return df
+
     def save_to_csv(self, df, filename=None):
-        """Save data to CSV file"""
+        """Save data as an intermediate file (Parquet when available, else CSV)"""
         if df is None or df.empty:
             print("No data to save")
             return
@@ -87,7 +176,9 @@ class BLSHousingScraper:
             filename = f"bls_housing_data_{datetime.now().strftime('%Y%m%d')}.csv"
 
         filepath = os.path.join('data', 'bls', filename)
-        df.to_csv(filepath, index=False)
+        with span('write', source='bls') as s:
+            filepath = write_frame(df, filepath)
+            s['rows'] = len(df)
         print(f"Data saved to {filepath}")
 
     def process_data(self, df):
@@ -112,16 +203,27 @@ class BLSHousingScraper:
         return df_pivot
 
 def main():
+    parser = argparse.ArgumentParser(description='Fetch BLS housing CPI series')
+    parser.add_argument('--years', type=int, default=10, help='Number of years before the current one')
+    parser.add_argument('--series', nargs='+', default=[],
+                        help='Extra series IDs to fetch alongside the housing series')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached responses')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the response cache')
+    args = parser.parse_args()
+
     # Initialize scraper (add your API key if you have one)
-    scraper = BLSHousingScraper(api_key=os.getenv('BLS_API_KEY'))
+    scraper = BLSHousingScraper(api_key=os.getenv('BLS_API_KEY'), use_cache=not args.no_cache,
+                                refresh=args.refresh)
+    series_ids = {**scraper.series_ids, **{series_id: series_id for series_id in args.series}}
     
     # Fetch last 10 years of data
     current_year = datetime.now().year
-    df = scraper.fetch_data(current_year - 10, current_year)
+    df = scraper.fetch_data(current_year - args.years, current_year, series_ids=series_ids)
     
     if df is not None:
         # Process the data
-        df_processed = scraper.process_data(df)
+        with span('process', source='bls'):
+            df_processed = scraper.process_data(df)
         
         # Save both raw and processed data
         scraper.save_to_csv(df, 'bls_housing_raw.csv')
@@ -1,13 +1,18 @@
-import requests
 import pandas as pd
 import os
 from datetime import datetime
-import time
+import argparse
 from dotenv import load_dotenv
+from profiling import span
+from storage import write_frame
+from http_client import RateLimitedClient
+from response_cache import ResponseCache, IMMUTABLE
+
+GEOGRAPHIES = ('state', 'county', 'place')
 
 class CensusHousingScraper:
-    def __init__(self, api_key=None):
-        """Initialize Census scraper with optional API key"""
+    def __init__(self, api_key=None, use_cache=True, refresh=False):
+        """Initialize Census scraper with optional API key and on-disk response cache"""
         self.base_url = "https://api.census.gov/data"
         self.api_key = api_key
         
@@ -39,83 +44,132 @@ class CensusHousingScraper:
             '17': 'Illinois'
         }
 
-    def fetch_data(self, year):
-        """Fetch housing data from Census API for specified year"""
-        data = []
-        
-        # Construct variable list for API
-        var_list = list(self.variables.keys())
-        variables = ['NAME'] + var_list
-        
-        # Create API URL
+        # Shared pooled session: Census allows generous but not unlimited request rates
+        self.client = RateLimitedClient(rate=5, burst=10, max_workers=8,
+                                        cache=ResponseCache() if use_cache else None, refresh=refresh)
+        self._state_fips = {}
+
+    def build_requests(self, years, geography='state', state_fips=None):
+        """
+        Plan one API request per year and geography.
+
+        State and county queries cover the whole country in one request per
+        year; place queries must be scoped to a state, so they are split into
+        one request per year and state.
+
+        Args:
+            years (iterable): ACS 5-year vintages.
+            geography (str): One of GEOGRAPHIES.
+            state_fips (list): State FIPS codes to scope place queries to (and
+                to filter state/county rows by); None means all states.
+        Returns:
+            list: (year, geography, params) tuples.
+        """
+        variables = ['NAME'] + list(self.variables.keys())
+        base_params = {'get': ','.join(variables)}
+        if self.api_key:
+            base_params['key'] = self.api_key
+
+        plan = []
+        for year in years:
+            if geography == 'state':
+                geo = 'state:' + (','.join(state_fips) if state_fips else '*')
+                plan.append((year, geography, {**base_params, 'for': geo}))
+            elif geography == 'county':
+                params = {**base_params, 'for': 'county:*'}
+                if state_fips:
+                    params['in'] = 'state:' + ','.join(state_fips)
+                plan.append((year, geography, params))
+            elif geography == 'place':
+                for fips in state_fips or self.all_state_fips(year):
+                    plan.append((year, geography, {**base_params, 'for': 'place:*', 'in': f'state:{fips}'}))
+            else:
+                raise ValueError(f"Unknown geography: {geography}")
+        return plan
+
+    def all_state_fips(self, year):
+        """FIPS codes of every state (and DC/PR) in a vintage, fetched once per year"""
+        if year not in self._state_fips:
+            json_data = self.client.fetch_json('GET', f"{self.base_url}/{year}/acs/acs5", max_age=IMMUTABLE,
+                                               params={'get': 'NAME', 'for': 'state:*'})
+            self._state_fips[year] = sorted(row[1] for row in json_data[1:])
+        return self._state_fips[year]
+
+    def parse_response(self, json_data, year, geography):
+        """
+        Turn a Census API JSON table into a DataFrame in one vectorized pass.
+        Args:
+            json_data (list): Header row followed by data rows.
+            year (int): Vintage the rows belong to.
+            geography (str): One of GEOGRAPHIES.
+        Returns:
+            pd.DataFrame: One row per geography with the renamed variables.
+        """
+        raw = pd.DataFrame(json_data[1:], columns=json_data[0])
+        values = raw[list(self.variables)].apply(pd.to_numeric, errors='coerce').astype('Int64')
+        values = values.rename(columns=self.variables)
+
+        if geography == 'state':
+            # Same layout as before: state name and year, then the variables
+            ids = pd.DataFrame({'state': raw['NAME'], 'year': year})
+        else:
+            fips_cols = [col for col in ('state', 'county', 'place') if col in raw.columns]
+            ids = pd.DataFrame({
+                'geo_level': geography,
+                'geo_id': raw[fips_cols].apply(''.join, axis=1) if fips_cols else None,
+                'name': raw['NAME'],
+                'state_fips': raw['state'],
+                'year': year
+            })
+        return pd.concat([ids, values], axis=1)
+
+    def fetch_data(self, year, geography='state', params=None):
+        """Fetch housing data from Census API for one year (and, for places, one state)"""
         url = f"{self.base_url}/{year}/acs/acs5"
-        
-        # Parameters for the API request
-        params = {
-            'get': ','.join(variables),
-            'for': 'state:' + ','.join(self.states.keys()),
-            'key': self.api_key
-        }
-        
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            json_data = response.json()
-            
-            # First row contains headers
-            headers = json_data[0]
-            
-            # Process each row of data
-            for row in json_data[1:]:
-                record = dict(zip(headers, row))
-                state_fips = record['state']
-                state_name = self.states.get(state_fips)
-                
-                if state_name:
-                    entry = {
-                        'state': state_name,
-                        'year': year
-                    }
-                    
-                    # Add each variable to the entry
-                    for var_id, var_name in self.variables.items():
-                        value = record.get(var_id)
-                        try:
-                            entry[var_name] = int(value) if value not in [None, ''] else None
-                        except ValueError:
-                            entry[var_name] = None
-                    
-                    data.append(entry)
-            
-            return pd.DataFrame(data)
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data for {year}: {e}")
+        if params is None:
+            params = self.build_requests([year], geography, list(self.states))[0][2]
+
+        # Published ACS vintages never change; unpublished ones (204) come back
+        # empty and are not cached
+        with span('http_fetch', source='census', year=year, geography=geography):
+            json_data = self.client.fetch_json('GET', url, max_age=IMMUTABLE, params=params)
+        if json_data is None:
             return None
+        return self.parse_response(json_data, year, geography)
 
-    def fetch_multiple_years(self, start_year, end_year=None):
-        """Fetch data for multiple years"""
+    def fetch_multiple_years(self, start_year, end_year=None, geography='state', states=None):
+        """
+        Fetch data for multiple years concurrently through the shared rate-limited session.
+        Args:
+            start_year (int): First ACS 5-year vintage.
+            end_year (int): Last vintage, defaults to the previous year.
+            geography (str): One of GEOGRAPHIES.
+            states (dict): State FIPS -> name to restrict to; defaults to self.states,
+                pass an empty dict for every state.
+        Returns:
+            pd.DataFrame or None: All fetched rows.
+        """
         if end_year is None:
             end_year = datetime.now().year - 1  # Previous year's data
-        
+        states = self.states if states is None else states
+
+        plan = self.build_requests(range(start_year, end_year + 1), geography, list(states) or None)
+        print(f"Fetching {geography} data for {start_year}-{end_year} ({len(plan)} requests)...")
+        results = self.client.map(lambda request: self.fetch_data(*request), plan)
+
         all_data = []
-        
-        for year in range(start_year, end_year + 1):
-            print(f"Fetching data for {year}...")
-            df = self.fetch_data(year)
-            
-            if df is not None:
+        for (year, geo, params), df, error in results:
+            if error is not None:
+                print(f"Error fetching {geo} data for {year} ({params.get('in', 'all')}): {error}")
+            elif df is not None:
                 all_data.append(df)
-            
-            # Sleep to respect API rate limits
-            time.sleep(1)
         
         if all_data:
             return pd.concat(all_data, ignore_index=True)
         return None
 
     def save_to_csv(self, df, filename=None):
-        """Save data to CSV file"""
+        """Save data as an intermediate file (Parquet when available, else CSV)"""
         if df is None or df.empty:
             print("No data to save")
             return
@@ -124,7 +178,9 @@ class CensusHousingScraper:
             filename = f"census_housing_data_{datetime.now().strftime('%Y%m%d')}.csv"
 
         filepath = os.path.join('data', 'census', filename)
-        df.to_csv(filepath, index=False)
+        with span('write', source='census') as s:
+            filepath = write_frame(df, filepath)
+            s['rows'] = len(df)
         print(f"Data saved to {filepath}")
 
     def process_data(self, df):
@@ -142,21 +198,38 @@ class CensusHousingScraper:
         return df
 
 def main():
+    parser = argparse.ArgumentParser(description='Fetch ACS 5-year housing data')
+    parser.add_argument('--geographies', nargs='+', choices=GEOGRAPHIES, default=['state'])
+    parser.add_argument('--all-states', action='store_true',
+                        help='Cover every state instead of the tracked five')
+    parser.add_argument('--years', type=int, default=5, help='Number of vintages before the latest')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached responses')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the response cache')
+    args = parser.parse_args()
+
     # Initialize scraper (add your API key if you have one)
-    scraper = CensusHousingScraper(api_key=os.getenv('CENSUS_API_KEY'))
+    scraper = CensusHousingScraper(api_key=os.getenv('CENSUS_API_KEY'), use_cache=not args.no_cache,
+                                   refresh=args.refresh)
+    states = {} if args.all_states else scraper.states
     
     # Fetch last 5 years of data
     current_year = datetime.now().year - 1  # Previous year's data
-    df = scraper.fetch_multiple_years(current_year - 5, current_year)
-    
-    if df is not None:
-        # Process the data
-        df_processed = scraper.process_data(df)
-        
-        # Save both raw and processed data
-        scraper.save_to_csv(df, 'census_housing_raw.csv')
-        if df_processed is not None:
-            scraper.save_to_csv(df_processed, 'census_housing_processed.csv')
+    for geography in args.geographies:
+        df = scraper.fetch_multiple_years(current_year - args.years, current_year,
+                                          geography=geography, states=states)
+        if df is None:
+            continue
+        if geography == 'state':
+            # Process the data
+            with span('process', source='census'):
+                df_processed = scraper.process_data(df)
+            
+            # Save both raw and processed data
+            scraper.save_to_csv(df, 'census_housing_raw.csv')
+            if df_processed is not None:
+                scraper.save_to_csv(df_processed, 'census_housing_processed.csv')
+        else:
+            scraper.save_to_csv(df, f'census_housing_{geography}_raw.csv')
 
 if __name__ == "__main__":
     main()
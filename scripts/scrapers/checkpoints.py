@@ -0,0 +1,88 @@
+import random
+
+# One row per table: how many chunks of which source have been committed
+LOAD_CHECKPOINTS_DDL = """
+CREATE TABLE IF NOT EXISTS public.load_checkpoints (
+    table_name VARCHAR(100) PRIMARY KEY,
+    source_hash CHAR(64) NOT NULL,
+    transform_version INTEGER,
+    chunk_size INTEGER NOT NULL,
+    chunks_done INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE public.load_checkpoints ADD COLUMN IF NOT EXISTS transform_version INTEGER;
+"""
+
+# Rows per committed chunk
+CHUNK_SIZE = 5000
+
+# Retries for transient connection errors, with exponential backoff
+MAX_RETRIES = 5
+BACKOFF_BASE = 2
+BACKOFF_CAP = 60
+
+
+def ensure_checkpoints_table(conn):
+    """Create the load_checkpoints metadata table if it does not exist"""
+    with conn.cursor() as cur:
+        cur.execute(LOAD_CHECKPOINTS_DDL)
+
+
+def resume_chunk(conn, table_name, source_hash, transform_version, chunk_size):
+    """
+    Return the index of the first chunk still to load for a table.
+
+    A checkpoint is only honoured if it is in progress and was written for
+    the same source file, transform version and chunk size; otherwise the
+    load starts at 0.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Table being loaded.
+        source_hash (str): Hash of the source file (see load_runs.fingerprint_source).
+        transform_version (int): Registry version of the table's transform.
+        chunk_size (int): Rows per chunk.
+    Returns:
+        int: Number of chunks already committed.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT source_hash, transform_version, chunk_size, chunks_done, status
+            FROM public.load_checkpoints
+            WHERE table_name = %s
+        """, (table_name,))
+        row = cur.fetchone()
+    if row is None:
+        return 0
+    saved_hash, saved_version, saved_chunk_size, chunks_done, status = row
+    if (status != 'in_progress' or saved_hash != source_hash or saved_version != transform_version
+            or saved_chunk_size != chunk_size):
+        return 0
+    return chunks_done
+
+
+def save_checkpoint(conn, table_name, source_hash, transform_version, chunk_size, chunks_done, total_chunks):
+    """Record committed progress for a table; call inside the chunk's transaction"""
+    status = 'complete' if chunks_done >= total_chunks else 'in_progress'
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO public.load_checkpoints
+                (table_name, source_hash, transform_version, chunk_size, chunks_done, total_chunks,
+                 status, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (table_name) DO UPDATE SET
+                source_hash = EXCLUDED.source_hash,
+                transform_version = EXCLUDED.transform_version,
+                chunk_size = EXCLUDED.chunk_size,
+                chunks_done = EXCLUDED.chunks_done,
+                total_chunks = EXCLUDED.total_chunks,
+                status = EXCLUDED.status,
+                updated_at = EXCLUDED.updated_at
+        """, (table_name, source_hash, transform_version, chunk_size, chunks_done, total_chunks, status))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with full jitter for the given (0-based) retry attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
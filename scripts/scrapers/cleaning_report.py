@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from profiling import profiler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_DIR = 'data/reports'
+
+# Step name whose removed rows are counted as duplicates
+DEDUPE_STEP = 'dedupe'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+
+def frame_mb(df):
+    """Shallow memory of a frame in MB (no per-string scan)"""
+    return round(df.memory_usage(index=True, deep=False).sum() / 2 ** 20, 3)
+
+
+def null_counts(df):
+    """Missing values per column, from a single isnull pass"""
+    return df.isnull().sum()
+
+
+def issue_summary(df, counts, duplicates=None):
+    """
+    Summarize a frame with the keys of data_cleaning.inspect_data.
+    Args:
+        df (pd.DataFrame): Frame the counts were taken from.
+        counts (pd.Series): Column -> missing values (see null_counts).
+        duplicates (int): Known duplicate row count; computed when None.
+    Returns:
+        dict: 'rows', 'missing_values', 'duplicates' and 'numeric_issues'.
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if duplicates is None:
+        duplicates = df.duplicated().sum()
+    return {
+        'rows': len(df),
+        'missing_values': int(counts.sum()),
+        'duplicates': int(duplicates),
+        'numeric_issues': int(counts[numeric_cols].sum())
+    }
+
+
+class CleaningReport:
+    """Record rows, missing values, time and memory for each step of one dataset's cleaning"""
+
+    def __init__(self, dataset=None):
+        """
+        Args:
+            dataset (str): Dataset name stored with the report.
+        """
+        self.dataset = dataset
+        self.initial = None
+        self.final = None
+        self.steps = []
+        self._counts = None
+        self._started = None
+
+    def start(self, df):
+        """Profile the input frame; called automatically by the first step"""
+        self._started = time.perf_counter()
+        self._counts = null_counts(df)
+        self.initial = issue_summary(df, self._counts)
+
+    def run(self, name, func, df, *args, **kwargs):
+        """
+        Apply one cleaning step and record what it changed.
+
+        The missing value counts of each step's output are reused as the next
+        step's input counts, so every intermediate frame is scanned once.
+
+        Args:
+            name (str): Step name, e.g. 'dedupe' or 'missing_mean'.
+            func (callable): Step taking the frame as first argument and returning the new frame.
+            df (pd.DataFrame): Step input.
+            *args, **kwargs: Passed to func.
+        Returns:
+            pd.DataFrame: Step output.
+        """
+        if self._counts is None:
+            self.start(df)
+        nulls_in = int(self._counts.sum())
+        rows_in = len(df)
+        # Steps are also profiler spans, so they show up in an active trace (ETL_PROFILE),
+        # which adds the traced peak; the process peak RSS and frame sizes are always recorded
+        frame_mb_in = frame_mb(df)
+        rss_start = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        with profiler.span(f'clean_{name}', dataset=self.dataset) as record:
+            df = func(df, *args, **kwargs)
+            record['rows'] = len(df)
+        wall_s = time.perf_counter() - wall_start
+        cpu_s = time.process_time() - cpu_start
+        rss_end = peak_rss_mb()
+        self._counts = null_counts(df)
+        nulls_out = int(self._counts.sum())
+        self.steps.append({
+            'step': name,
+            'rows_in': rows_in,
+            'rows_out': len(df),
+            'rows_removed': rows_in - len(df),
+            'nulls_in': nulls_in,
+            'nulls_out': nulls_out,
+            'nulls_fixed': nulls_in - nulls_out,
+            'duplicates_removed': rows_in - len(df) if name == DEDUPE_STEP else 0,
+            'wall_s': round(wall_s, 6),
+            'cpu_s': round(cpu_s, 6),
+            # Growth of the process peak RSS; 0 when the step stayed below an earlier peak
+            'peak_mem_mb': round(rss_end - rss_start, 3) if rss_end is not None else None,
+            'peak_rss_mb': round(rss_end, 3) if rss_end is not None else None,
+            'frame_mb_in': frame_mb_in,
+            'frame_mb_out': frame_mb(df),
+            'traced_peak_mb': record.get('peak_mem_mb')
+        })
+        return df
+
+    def annotate(self, **fields):
+        """Attach extra fields (e.g. per-column coercion counts) to the last step"""
+        self.steps[-1].update(fields)
+
+    def finish(self, df):
+        """
+        Profile the cleaned frame, reusing the last step's missing value counts.
+        Args:
+            df (pd.DataFrame): Cleaning output.
+        Returns:
+            dict: The report (see to_dict).
+        """
+        if self._counts is None:
+            self.start(df)
+        # Nothing after a final dedupe step can have reintroduced duplicates
+        duplicates = 0 if self.steps and self.steps[-1]['step'] == DEDUPE_STEP else None
+        self.final = issue_summary(df, self._counts, duplicates)
+        return self.to_dict()
+
+    def to_dict(self):
+        """Report as a JSON-serializable dict"""
+        return {
+            'dataset': self.dataset,
+            'initial': self.initial,
+            'final': self.final,
+            'rows_removed': self.initial['rows'] - self.final['rows'] if self.final else None,
+            'seconds': round(time.perf_counter() - self._started, 3) if self._started else None,
+            'steps': self.steps
+        }
+
+
+def write_run_report(reports, report_dir=REPORT_DIR, **run_fields):
+    """
+    Write the reports of one cleaning run to a timestamped JSON file.
+    Args:
+        reports (dict): Dataset name -> report dict.
+        report_dir (str): Output directory.
+        **run_fields: Extra top-level fields, e.g. workers=4.
+    Returns:
+        str: Path written.
+    """
+    created_at = datetime.now(timezone.utc)
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"cleaning_{created_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(path, 'w') as f:
+        json.dump({'created_at': created_at.isoformat(), **run_fields, 'datasets': reports},
+                  f, indent=2, default=str)
+    return path
@@ -0,0 +1,77 @@
+# Suffix of the standalone table a dimension's rows are loaded into before the upsert
+SYNC_SUFFIX = '_sync'
+
+
+def sync_dimension(conn, table_name, df, unique_keys, load_func):
+    """
+    Upsert a dimension table's rows on its natural key, leaving surrogate keys to the database.
+
+    The rows are bulk loaded into a standalone table, then members missing
+    from the dimension are inserted (their SERIAL key is assigned there) and
+    the attributes of existing members are updated. Existing members keep
+    their key, so facts loaded earlier still point at the same member.
+    Members no longer in the source are kept. The caller commits.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Dimension table, e.g. regions.
+        df (pd.DataFrame): One row per member, without the surrogate key.
+        unique_keys (list): Natural key columns of the table's UNIQUE constraint, e.g. [region_name].
+        load_func (callable): Called as load_func(conn, table, frame) to bulk load the rows.
+    """
+    columns = df.columns.tolist()
+    columns_str = ', '.join(f'"{col}"' for col in columns)
+    keys_str = ', '.join(f'"{col}"' for col in unique_keys)
+    match = ' AND '.join(f'd."{col}" = s."{col}"' for col in unique_keys)
+    updates = [col for col in columns if col not in unique_keys]
+    staging = f'{table_name}{SYNC_SUFFIX}'
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS public.{staging}")
+        # No defaults are copied, so the staging rows draw nothing from the key sequence
+        cur.execute(f"CREATE TABLE public.{staging} AS SELECT {columns_str} FROM public.{table_name} WITH NO DATA")
+    load_func(conn, staging, df)
+    with conn.cursor() as cur:
+        # Only new members reach the INSERT, so existing ones consume no sequence values
+        cur.execute(f"""
+            INSERT INTO public.{table_name} ({columns_str})
+            SELECT {columns_str} FROM public.{staging} s
+            WHERE NOT EXISTS (SELECT 1 FROM public.{table_name} d WHERE {match})
+            ON CONFLICT ({keys_str}) DO NOTHING
+        """)
+        if updates:
+            assignments = ', '.join(f'"{col}" = s."{col}"' for col in updates)
+            changed = ' OR '.join(f'd."{col}" IS DISTINCT FROM s."{col}"' for col in updates)
+            cur.execute(f"""
+                UPDATE public.{table_name} d SET {assignments}
+                FROM public.{staging} s
+                WHERE {match} AND ({changed})
+            """)
+        cur.execute(f"DROP TABLE public.{staging}")
+
+
+def resolve_keys(conn, spec, df):
+    """
+    Replace a built frame's natural key by the surrogate key read back from its dimension.
+    Args:
+        conn: psycopg2 connection.
+        spec (dict): Registry entry; frames without a 'lookup' are returned unchanged.
+        df (pd.DataFrame): Frame from DatasetEngine.build, with lookup['key'].
+    Returns:
+        pd.DataFrame: Rows with columns in load_columns order.
+    Raises:
+        ValueError: If a key is missing from the dimension (load it first).
+    """
+    lookup = spec.get('lookup')
+    if not lookup:
+        return df
+    table, key, column = lookup['table'], lookup['key'], lookup['column']
+    with conn.cursor() as cur:
+        cur.execute(f'SELECT "{key}", "{column}" FROM public.{table}')
+        keys = dict(cur.fetchall())
+    ids = df[key].astype(str).map(keys)
+    missing = ids.isna()
+    if missing.any():
+        examples = ', '.join(df.loc[missing, key].astype(str).unique()[:5])
+        raise ValueError(f"{int(missing.sum())} rows of {spec['name']} have a {key} missing from {table} "
+                         f"(e.g. {examples})")
+    return df.assign(**{column: ids.astype('int64')})[spec['load_columns']]
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from checkpoints import backoff_delay
+from response_cache import IMMUTABLE
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_RATE = 5          # requests per second
+DEFAULT_BURST = 10        # requests allowed back to back
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 4
+REQUEST_TIMEOUT = 60
+
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second after a burst of `capacity`"""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedClient:
+    """Pooled requests.Session shared by worker threads, with a token bucket and jittered retries"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_workers=DEFAULT_WORKERS,
+                 max_retries=DEFAULT_RETRIES, headers=None, cache=None, refresh=False):
+        """
+        Args:
+            rate (float): Requests per second across all threads.
+            burst (int): Token bucket capacity.
+            max_workers (int): Concurrent requests, also the connection pool size.
+            max_retries (int): Retries for connection errors and RETRY_STATUSES.
+            headers (dict): Headers sent with every request.
+            cache (ResponseCache): Optional response cache used by fetch_json.
+            refresh (bool): Ignore cached payloads (fresh responses are still stored).
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.cache = cache
+        self.refresh = refresh
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request under the rate limit, retrying transient failures.
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            **kwargs: Passed to requests.Session.request.
+        Returns:
+            requests.Response: Successful response.
+        Raises:
+            requests.exceptions.RequestException: After the last retry fails.
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else backoff_delay(attempt)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def fetch_json(self, method, url, max_age=IMMUTABLE, params=None, json_body=None, cacheable=None,
+                   final_at=None):
+        """
+        Return a request's decoded JSON, from the cache when it is fresh enough.
+
+        Empty responses (e.g. Census 204 for unpublished vintages) return None
+        and are not cached, so they are retried on the next run.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            max_age (float): Freshness rule in seconds; IMMUTABLE caches forever.
+            params (dict): Query parameters.
+            json_body (dict): JSON request body.
+            cacheable (callable): Called with the decoded JSON; responses it rejects
+                (e.g. API-level errors sent with status 200) are not cached.
+            final_at (float): Timestamp after which the response can no longer
+                change; cached entries fetched after it never expire.
+        Returns:
+            Decoded JSON, or None for an empty response.
+        """
+        key = self.cache.key(method, url, params, json_body) if self.cache else None
+        if key and not self.refresh:
+            payload = self.cache.get(key, max_age, final_at=final_at)
+            if payload is not None:
+                return json.loads(payload)
+
+        response = self.request(method, url, params=params, json=json_body)
+        if response.status_code == 204 or not response.content:
+            return None
+        data = response.json()
+        if key and (cacheable is None or cacheable(data)):
+            self.cache.put(key, response.content)
+        return data
+
+    def map(self, func, items):
+        """
+        Run func over items on the worker threads.
+        Args:
+            func (callable): Called once per item; typically issues requests via this client.
+            items (iterable): Work items.
+        Returns:
+            list: (item, result, error) tuples in input order; error is None on success.
+        """
+        def run(item):
+            try:
+                return item, func(item), None
+            except Exception as e:
+                return item, None, e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(run, items))
+
+    def close(self):
+        self.session.close()
@@ -1,8 +1,22 @@
 import kagglehub
 import pandas as pd
 import os
+import re
+import json
 import shutil
+import argparse
+from pathlib import Path
 from datetime import datetime
+from profiling import span
+from storage import write_frame, resolve_path, FrameWriter
+from load_runs import fingerprint_source
+from transforms import iter_wide_to_long, wide_to_long
+
+# Dataset versions and file hashes of the last processed download of each dataset
+MANIFEST_PATH = os.path.join('data', 'kaggle', 'manifest.json')
+
+ZILLOW_ID_COLS = ['RegionName', 'State', 'Metro', 'CountyName', 'SizeRank']
+ZILLOW_CHANGES = {'Price_MoM': 1, 'Price_YoY': 12}
 
 class KaggleHousingScraper:
     def __init__(self):
@@ -17,6 +31,13 @@ class KaggleHousingScraper:
             "zillow": "paultimothymooney/zillow-house-price-data",
             "zillow_hvindex": "robikscube/zillow-home-value-index"  # Home Value Index data
         }
+
+        # File name to process for multi-file datasets. Unlisted datasets keep the
+        # file processed last time (manifest), or the first CSV found in the download
+        self.primary_files = {}
+
+        # Regions per block when streaming the Zillow reshape to disk; None reshapes in memory
+        self.zillow_block_size = None
         
     def fetch_data(self, dataset_key):
         """Download the latest version of the specified dataset"""
@@ -28,7 +49,8 @@ class KaggleHousingScraper:
         print(f"Downloading dataset: {dataset}")
         try:
             # Download latest version
-            path = kagglehub.dataset_download(dataset)
+            with span('download', source='kaggle', dataset=dataset_key):
+                path = kagglehub.dataset_download(dataset)
             print(f"Dataset downloaded to: {path}")
             return path
         except Exception as e:
@@ -98,25 +120,9 @@ class KaggleHousingScraper:
 
             elif dataset_key == "zillow":
                 # Process Zillow housing data
-                # Melt the date columns into rows
-                id_cols = ['RegionName', 'State', 'Metro', 'CountyName', 'SizeRank']
-                date_cols = [col for col in df.columns if col not in id_cols + ['Unnamed: 0']]
-                
-                df = pd.melt(df, 
-                           id_vars=id_cols,
-                           value_vars=date_cols,
-                           var_name='Date',
-                           value_name='Price')
-                
-                # Convert date and sort
-                df['Date'] = pd.to_datetime(df['Date'])
-                df = df.sort_values(['RegionName', 'Date'])
-                
-                # Calculate changes by region efficiently
-                df['Price_MoM'] = df.groupby('RegionName')['Price'].transform(
-                    lambda x: x.pct_change(fill_method=None))
-                df['Price_YoY'] = df.groupby('RegionName')['Price'].transform(
-                    lambda x: x.pct_change(12, fill_method=None))
+                # Reshape the date columns into rows, with changes computed per region
+                df = wide_to_long(df, ZILLOW_ID_COLS, var_name='Date', value_name='Price',
+                                  changes=ZILLOW_CHANGES, sort_by='RegionName')
 
             elif dataset_key == "zillow_hvindex":
                 # Process Zillow Home Value Index data
@@ -142,8 +148,28 @@ class KaggleHousingScraper:
             print(f"Error processing data: {e}")
             return None
 
+    def stream_zillow(self, file_path, output_path):
+        """
+        Reshape the Zillow file to long format in region blocks, appending each
+        block to the processed file so only one block is held in long form.
+        Args:
+            file_path (str or Path): Wide Zillow CSV.
+            output_path (str): Processed artifact path to write.
+        Returns:
+            int: Rows written.
+        """
+        df = pd.read_csv(file_path)
+        blocks = iter_wide_to_long(df, ZILLOW_ID_COLS, var_name='Date', value_name='Price',
+                                   changes=ZILLOW_CHANGES, sort_by='RegionName',
+                                   block_size=self.zillow_block_size)
+        with FrameWriter(output_path) as writer:
+            for block in blocks:
+                writer.write(block)
+        print(f"Data saved to {writer.path} ({writer.rows} rows)")
+        return writer.rows
+
     def save_to_csv(self, df, dataset_key, filename=None):
-        """Save data to CSV file"""
+        """Save data as an intermediate file (Parquet when available, else CSV)"""
         if df is None or df.empty:
             print("No data to save")
             return
@@ -152,58 +178,175 @@ class KaggleHousingScraper:
             filename = f"kaggle_{dataset_key}_data_{datetime.now().strftime('%Y%m%d')}.csv"
 
         filepath = os.path.join('data', 'kaggle', dataset_key, filename)
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        df.to_csv(filepath, index=False)
+        with span('write', source='kaggle', dataset=dataset_key) as s:
+            filepath = write_frame(df, filepath)
+            s['rows'] = len(df)
         print(f"Data saved to {filepath}")
 
-    def run(self, dataset_key):
-        """Run the complete scraping process for a specific dataset"""
-        # Download data
+    def load_manifest(self):
+        """Load the dataset manifest, or an empty one on the first run"""
+        if not os.path.exists(MANIFEST_PATH):
+            return {}
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        """Write the dataset manifest"""
+        os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+        with open(MANIFEST_PATH, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    def dataset_version(self, download_path):
+        """Version number from a kagglehub download path (.../versions/<n>), or None"""
+        match = re.search(r'versions[\\/](\d+)$', str(download_path).rstrip('/\\'))
+        return int(match.group(1)) if match else None
+
+    def hash_files(self, download_path):
+        """sha256 of every CSV in a download, keyed by path relative to the download"""
+        root = Path(download_path)
+        return {
+            str(path.relative_to(root)): fingerprint_source(path)['source_hash']
+            for path in sorted(root.rglob('*.csv'))
+        }
+
+    def output_paths(self, dataset_key):
+        """Raw CSV and processed artifact paths written for a dataset"""
+        directory = os.path.join('data', 'kaggle', dataset_key)
+        return (os.path.join(directory, f'kaggle_{dataset_key}_raw.csv'),
+                os.path.join(directory, f'kaggle_{dataset_key}_processed.csv'))
+
+    def primary_file(self, dataset_key, download_path, previous=None):
+        """
+        Pick the CSV to process from a (possibly multi-file) download.
+        Args:
+            dataset_key (str): Key in self.datasets.
+            download_path (str): Downloaded dataset directory.
+            previous (str): Primary file recorded in the manifest, relative to the download.
+        Returns:
+            Path: primary_files[dataset_key] if present, else the previous
+                primary file if present, else the first CSV found walking the download.
+        """
+        root = Path(download_path)
+        configured = self.primary_files.get(dataset_key)
+        if configured:
+            matches = sorted(root.rglob(configured))
+            if matches:
+                return matches[0]
+        if previous and (root / previous).is_file():
+            return root / previous
+        for dirpath, dirs, files in os.walk(download_path):
+            for file in files:
+                if file.endswith('.csv'):
+                    return Path(dirpath) / file
+        return None
+
+    def prune_old_versions(self, download_path):
+        """Remove older cached versions of a dataset, keeping the one just downloaded"""
+        current = Path(download_path)
+        if current.parent.name != 'versions':
+            return
+        for version_dir in current.parent.iterdir():
+            if version_dir != current and version_dir.is_dir():
+                print(f"Removing old cached version: {version_dir}")
+                shutil.rmtree(version_dir)
+
+    def run(self, dataset_key, force=False):
+        """
+        Run the complete scraping process for a specific dataset.
+
+        Downloads stay in the kagglehub cache, so an unchanged version is not
+        downloaded again. Processing is skipped when the version matches the
+        manifest, or when a new version has byte-identical files.
+
+        Args:
+            dataset_key (str): Key in self.datasets.
+            force (bool): Process even if the dataset is unchanged.
+        """
+        # Download data (kagglehub reuses its cache when the latest version is already there)
         download_path = self.fetch_data(dataset_key)
         if not download_path:
             return
         
-        # Find the CSV file in the downloaded directory
-        csv_file = None
-        for root, dirs, files in os.walk(download_path):
-            for file in files:
-                if file.endswith('.csv'):
-                    csv_file = os.path.join(root, file)
-                    break
-            if csv_file:
-                break
-        
-        if not csv_file:
+        manifest = self.load_manifest()
+        entry = manifest.get(dataset_key, {})
+        version = self.dataset_version(download_path)
+        outputs_exist = all(resolve_path(path).exists() for path in self.output_paths(dataset_key))
+
+        if not force and outputs_exist and version is not None and entry.get('version') == version:
+            print(f"Skipping {dataset_key}: version {version} already processed")
+            return
+
+        file_hashes = self.hash_files(download_path)
+        if not file_hashes:
             print("No CSV file found in downloaded dataset")
             return
+        if not force and outputs_exist and entry.get('files') == file_hashes:
+            print(f"Skipping {dataset_key}: version {version} has unchanged content")
+            manifest[dataset_key] = {**entry, 'version': version}
+            self.save_manifest(manifest)
+            return
+
+        csv_files = [Path(download_path) / relpath for relpath in file_hashes]
+        csv_file = self.primary_file(dataset_key, download_path, entry.get('primary_file'))
         
         # Process data
-        print("Processing data...")
-        df = self.process_data(csv_file, dataset_key)
+        print(f"Processing {csv_file.name}...")
+        raw_path, processed_path = self.output_paths(dataset_key)
+        streamed = dataset_key == 'zillow' and self.zillow_block_size
+        with span('process', source='kaggle', dataset=dataset_key) as s:
+            if streamed:
+                df = None
+                rows = self.stream_zillow(csv_file, processed_path)
+            else:
+                df = self.process_data(csv_file, dataset_key)
+                rows = len(df) if df is not None else None
+            s['rows'] = rows
         
-        if df is not None:
+        if rows is not None:
             # Save both raw and processed data
             print("Saving data...")
             # Save raw data
-            raw_path = os.path.join('data', 'kaggle', dataset_key, f'kaggle_{dataset_key}_raw.csv')
             os.makedirs(os.path.dirname(raw_path), exist_ok=True)
             shutil.copy2(csv_file, raw_path)
             print(f"Raw data saved to: {raw_path}")
             
-            # Save processed data
-            self.save_to_csv(df, dataset_key, f'kaggle_{dataset_key}_processed.csv')
+            # Keep the other files of multi-file datasets next to it
+            for other in csv_files:
+                if other != csv_file:
+                    other_path = os.path.join(os.path.dirname(raw_path), f'kaggle_{dataset_key}_{other.stem}_raw.csv')
+                    shutil.copy2(other, other_path)
+                    print(f"Additional file saved to: {other_path}")
+            
+            # Save processed data (already written when streamed)
+            if not streamed:
+                self.save_to_csv(df, dataset_key, os.path.basename(processed_path))
+
+            manifest[dataset_key] = {
+                'handle': self.datasets[dataset_key],
+                'version': version,
+                'files': file_hashes,
+                'primary_file': str(csv_file.relative_to(download_path)),
+                'processed_at': datetime.now().isoformat()
+            }
+            self.save_manifest(manifest)
         
-        # Clean up downloaded files
-        print("Cleaning up downloaded files...")
-        shutil.rmtree(download_path)
+        # Keep only the current version in the download cache
+        self.prune_old_versions(download_path)
 
 def main():
+    parser = argparse.ArgumentParser(description='Download and process Kaggle housing datasets')
     scraper = KaggleHousingScraper()
+    parser.add_argument('--datasets', nargs='+', choices=list(scraper.datasets), default=list(scraper.datasets))
+    parser.add_argument('--force', action='store_true', help='Process datasets even if unchanged')
+    parser.add_argument('--zillow-block-size', type=int,
+                        help='Stream the Zillow reshape to disk in blocks of this many regions')
+    args = parser.parse_args()
+    scraper.zillow_block_size = args.zillow_block_size
     
     # Download and process all datasets
-    for dataset in ["housing", "wages", "interest_rates", "zillow", "zillow_hvindex"]:
+    for dataset in args.datasets:
         print(f"\nProcessing {dataset} dataset...")
-        scraper.run(dataset)
+        scraper.run(dataset, force=args.force)
 
 if __name__ == "__main__":
     main()
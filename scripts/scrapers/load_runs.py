@@ -0,0 +1,101 @@
+import hashlib
+
+# Metadata table recording one row per table per load attempt
+LOAD_RUNS_DDL = """
+CREATE TABLE IF NOT EXISTS public.load_runs (
+    id SERIAL PRIMARY KEY,
+    table_name VARCHAR(100) NOT NULL,
+    source_path TEXT NOT NULL,
+    source_hash CHAR(64) NOT NULL,
+    source_rows INTEGER,
+    loaded_rows INTEGER,
+    transform_version INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_load_runs_table ON public.load_runs(table_name, id);
+"""
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def ensure_load_runs_table(conn):
+    """Create the load_runs metadata table if it does not exist"""
+    with conn.cursor() as cur:
+        cur.execute(LOAD_RUNS_DDL)
+
+
+def fingerprint_source(path):
+    """
+    Hash a source file and count its data rows in a single streaming pass.
+    Args:
+        path (str or Path): File to fingerprint.
+    Returns:
+        dict: 'source_hash' (sha256 hex digest) and 'source_rows' (lines minus header).
+    """
+    digest = hashlib.sha256()
+    lines = 0
+    last_block = b''
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+            lines += block.count(b'\n')
+            last_block = block
+    if last_block and not last_block.endswith(b'\n'):
+        lines += 1
+    return {
+        'source_hash': digest.hexdigest(),
+        'source_rows': max(lines - 1, 0)
+    }
+
+
+def is_unchanged(conn, table_name, fingerprint, transform_version):
+    """Return True if the last successful load used the same source hash and transform version"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT source_hash, transform_version
+            FROM public.load_runs
+            WHERE table_name = %s AND status = 'loaded'
+            ORDER BY id DESC
+            LIMIT 1
+        """, (table_name,))
+        row = cur.fetchone()
+    return row is not None and row[0] == fingerprint['source_hash'] and row[1] == transform_version
+
+
+def record_run(conn, table_name, source_path, fingerprint, transform_version, status,
+               loaded_rows=None, error=None):
+    """Insert one load_runs row; the caller commits"""
+    fingerprint = fingerprint or {'source_hash': '', 'source_rows': None}
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO public.load_runs
+                (table_name, source_path, source_hash, source_rows, loaded_rows,
+                 transform_version, status, error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (table_name, str(source_path), fingerprint['source_hash'], fingerprint['source_rows'],
+              loaded_rows, transform_version, status, error))
+
+
+def format_run_summary(summary):
+    """
+    Format a per-table run summary.
+    Args:
+        summary (dict): Table name -> {'status': 'skipped'|'loaded'|'failed', 'rows': int, 'error': str}.
+    Returns:
+        str: Human-readable summary with one line per table and status totals.
+    """
+    lines = ["Load run summary:"]
+    for table_name, result in summary.items():
+        line = f"  {table_name:<28} {result['status']:<8}"
+        if result.get('rows') is not None:
+            line += f" {result['rows']} rows"
+        if result.get('error'):
+            line += f" ({result['error']})"
+        lines.append(line)
+    totals = {}
+    for result in summary.values():
+        totals[result['status']] = totals.get(result['status'], 0) + 1
+    lines.append("  " + ", ".join(f"{status}: {count}" for status, count in sorted(totals.items())))
+    return "\n".join(lines)
@@ -1,10 +1,20 @@
 import os
-import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from pathlib import Path
 import io
+from registry import DATASETS, DatasetEngine, dimension_tables
+from dimensions import resolve_keys, sync_dimension
+from load_runs import (
+    ensure_load_runs_table,
+    fingerprint_source,
+    is_unchanged,
+    record_run,
+    format_run_summary
+)
+from shadow_swap import reload_via_shadow, table_exists
+from partitions import PARTITIONED_TABLES, convert_to_partitioned, is_partitioned, load_partitioned
+from profiling import span
 
 class DatabaseLoader:
     def __init__(self):
@@ -26,30 +36,35 @@ class DatabaseLoader:
         """Create a new database connection"""
         return psycopg2.connect(**self.conn_params)
 
-    def create_tables(self, drop_existing=True):
-        """Create database tables from schema.sql"""
+    def create_tables(self, tables=None):
+        """
+        Create missing database tables from schema.sql.
+
+        Partitioned tables are never dropped: they are reloaded year by year
+        (see partitions.load_partitioned), so unchanged years stay in place.
+
+        Args:
+            tables (list): Registry tables to drop first so they are recreated
+                empty (e.g. the tables about to be reloaded); None drops all.
+        """
         schema_path = Path(__file__).parent / 'schema.sql'
         with open(schema_path, 'r') as f:
             schema_sql = f.read()
+        tables = list(DATASETS) if tables is None else tables
         
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 try:
-                    if drop_existing:
+                    if tables:
+                        droppable = self.droppable_tables(conn, tables)
                         # Drop existing tables in reverse order to handle dependencies
                         print("\nDropping existing tables...")
-                        tables = [
-                            'zillow_home_value_index',
-                            'zillow_housing',
-                            'interest_rates',
-                            'wages_education',
-                            'kaggle_housing_prices',
-                            'census_housing',
-                            'bls_housing_cpi'
-                        ]
-                        for table in tables:
-                            print(f"Dropping {table}...")
-                            cur.execute(f"DROP TABLE IF EXISTS public.{table} CASCADE")
+                        for table in reversed(list(DATASETS)):
+                            if table in droppable:
+                                print(f"Dropping {table}...")
+                                cur.execute(f"DROP TABLE IF EXISTS public.{table} CASCADE")
+                            elif table in tables:
+                                print(f"Keeping partitioned {table}")
                         conn.commit()
                     
                     # Create tables
@@ -62,6 +77,11 @@ class DatabaseLoader:
                     print(f"\nError creating tables: {str(e)}")
                     raise
 
+    def droppable_tables(self, conn, tables):
+        """Tables of the list that may be dropped and recreated: all but the partitioned ones"""
+        return [table for table in tables
+                if not (table_exists(conn, table) and is_partitioned(conn, table))]
+
     def copy_from_stringio(self, conn, df, table_name, columns=None):
         """Efficiently load DataFrame to PostgreSQL using COPY"""
         # Use specified columns or all DataFrame columns
@@ -73,514 +93,211 @@ class DatabaseLoader:
         # Create string buffer
         output = io.StringIO()
         # Save df to string buffer
-        df_to_load.to_csv(output, sep='\t', header=False, index=False)
-        output.seek(0)
+        with span('to_csv', table=table_name) as s:
+            df_to_load.to_csv(output, sep='\t', header=False, index=False)
+            output.seek(0)
+            s['rows'] = len(df_to_load)
         
         with conn.cursor() as cur:
             try:
                 # Specify columns in COPY command
                 columns_str = ', '.join([f'"{col}"' for col in columns])
-                cur.copy_expert(
-                    f"COPY public.{table_name} ({columns_str}) FROM STDIN WITH CSV DELIMITER E'\\t' NULL ''",
-                    output
-                )
+                with span('copy', table=table_name) as s:
+                    cur.copy_expert(
+                        f"COPY public.{table_name} ({columns_str}) FROM STDIN WITH CSV DELIMITER E'\\t' NULL ''",
+                        output
+                    )
+                    s['rows'] = len(df_to_load)
             except Exception as e:
                 print(f"Error copying data to {table_name}: {str(e)}")
                 raise
 
-    def load_bls_data(self):
-        """Load BLS housing CPI data"""
-        df = pd.read_csv('data/bls/bls_housing_processed.csv')
-        
-        # Rename columns to match schema
-        column_mapping = {
-            'date': 'date',
-            'Fuels_Utilities': 'fuels_utilities_cpi',
-            'Household_Furnishings': 'household_furnishings_cpi',
-            'Housing': 'housing_cpi',
-            'Housing_All': 'housing_all_cpi',
-            'Shelter': 'shelter_cpi'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Calculate MoM and YoY changes
-        df['housing_cpi_mom'] = df['housing_cpi'].pct_change().round(3)
-        df['shelter_cpi_mom'] = df['shelter_cpi'].pct_change().round(3)
-        df['fuels_utilities_mom'] = df['fuels_utilities_cpi'].pct_change().round(3)
-        df['furnishings_mom'] = df['household_furnishings_cpi'].pct_change().round(3)
-        
-        df['housing_cpi_yoy'] = df['housing_cpi'].pct_change(12).round(3)
-        df['shelter_cpi_yoy'] = df['shelter_cpi'].pct_change(12).round(3)
-        df['fuels_utilities_yoy'] = df['fuels_utilities_cpi'].pct_change(12).round(3)
-        df['furnishings_yoy'] = df['household_furnishings_cpi'].pct_change(12).round(3)
-        
-        # Specify columns in the correct order to match schema
-        columns = [
-            'date',
-            'housing_cpi', 'shelter_cpi', 'fuels_utilities_cpi', 'household_furnishings_cpi',
-            'housing_cpi_mom', 'shelter_cpi_mom', 'fuels_utilities_mom', 'furnishings_mom',
-            'housing_cpi_yoy', 'shelter_cpi_yoy', 'fuels_utilities_yoy', 'furnishings_yoy'
-        ]
-        
-        try:
-            print(f"\nLoading BLS data ({len(df)} rows)...")
-            print("First few rows:")
-            print(df[columns].head().to_string())
-            self.copy_from_stringio(df, 'bls_housing_cpi', columns)
-            print("BLS data loaded successfully")
-        except Exception as e:
-            print(f"Error loading BLS data: {str(e)}")
-            raise
+    def load_table(self, conn, table_name, df):
+        """Load one registry table's DataFrame using COPY"""
+        spec = DATASETS[table_name]
+        print(f"\nLoading {spec['name']} ({len(df)} rows)...")
+        self.copy_from_stringio(conn, df, table_name, spec['load_columns'])
 
-    def load_census_data(self):
-        """Load Census housing data"""
-        df = pd.read_csv('data/census/census_housing_processed.csv')
-        
-        # Ensure column names match schema
-        column_mapping = {
-            'state': 'state',
-            'year': 'year',
-            'Total_Housing_Units': 'total_housing_units',
-            'Occupied_Units': 'occupied_units',
-            'Vacant_Units': 'vacant_units',
-            'Owner_Occupied': 'owner_occupied',
-            'Renter_Occupied': 'renter_occupied',
-            'Median_Home_Value': 'median_home_value',
-            'Median_Monthly_Housing_Cost': 'median_monthly_cost',
-            'Vacancy_Rate': 'vacancy_rate',
-            'Homeownership_Rate': 'homeownership_rate'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        try:
-            print(f"\nLoading Census data ({len(df)} rows)...")
-            print("First few rows:")
-            print(df[list(column_mapping.values())].head().to_string())
-            self.copy_from_stringio(df, 'census_housing', list(column_mapping.values()))
-            print("Census data loaded successfully")
-        except Exception as e:
-            print(f"Error loading Census data: {str(e)}")
-            raise
+    def partition_tables(self, conn):
+        """Convert the PARTITIONED_TABLES that are still plain tables to yearly partitions"""
+        for table_name in PARTITIONED_TABLES:
+            if table_exists(conn, table_name) and not is_partitioned(conn, table_name):
+                convert_to_partitioned(conn, table_name)
 
-    def load_kaggle_housing_prices(self):
-        """Load Kaggle housing prices data"""
-        df = pd.read_csv('data/kaggle/housing/kaggle_housing_processed.csv')
-        
-        # Rename columns to match schema
-        column_mapping = {
-            'date': 'date',
-            'U.S. National': 'us_national',
-            '20-City Composite': 'city_composite_20',
-            '10-City Composite': 'city_composite_10'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Calculate MoM changes
-        df['us_national_mom'] = df['us_national'].pct_change().round(3)
-        df['city_20_mom'] = df['city_composite_20'].pct_change().round(3)
-        df['city_10_mom'] = df['city_composite_10'].pct_change().round(3)
-        
-        # Calculate YoY changes
-        df['us_national_yoy'] = df['us_national'].pct_change(12).round(3)
-        df['city_20_yoy'] = df['city_composite_20'].pct_change(12).round(3)
-        df['city_10_yoy'] = df['city_composite_10'].pct_change(12).round(3)
-        
-        # Specify columns in the correct order
-        columns = ['date', 'us_national', 'city_composite_20', 'city_composite_10',
-                  'us_national_mom', 'city_20_mom', 'city_10_mom',
-                  'us_national_yoy', 'city_20_yoy', 'city_10_yoy']
-        
-        try:
-            print(f"\nLoading Kaggle housing prices data ({len(df)} rows)...")
-            print("First few rows:")
-            print(df[columns].head().to_string())
-            self.copy_from_stringio(df, 'kaggle_housing_prices', columns)
-            print("Kaggle housing prices data loaded successfully")
-        except Exception as e:
-            print(f"Error loading Kaggle housing prices data: {str(e)}")
-            raise
+    def load_partitions(self, conn, table_name, df):
+        """Reload a partitioned table one changed year at a time"""
+        spec = DATASETS[table_name]
+        print(f"\nLoading {spec['name']} by partition ({len(df)} rows)...")
+        result = load_partitioned(
+            conn, table_name, df,
+            lambda conn, target, frame: self.copy_from_stringio(conn, frame, target, spec['load_columns'])
+        )
+        print(f"Years loaded: {result['loaded'] or 'none'}; unchanged: {len(result['unchanged'])}; "
+              f"dropped: {result['dropped'] or 'none'}")
 
-    def load_wages_data(self):
-        """Load wages by education data"""
-        df = pd.read_csv('data/kaggle/wages/kaggle_wages_processed.csv')
-        
-        # Reshape data to match schema
-        melted_df = pd.melt(
-            df,
-            id_vars=['Year'],
-            var_name='category',
-            value_name='wage_value'
+    def sync_table(self, conn, table_name, df):
+        """Upsert a dimension table by its natural key, keeping the ids the database assigned"""
+        spec = DATASETS[table_name]
+        print(f"\nSyncing {spec['name']} ({len(df)} rows)...")
+        sync_dimension(
+            conn, table_name, df, spec['unique_keys'],
+            lambda conn, target, frame: self.copy_from_stringio(conn, frame, target, spec['load_columns'])
         )
-        
-        # Split category into education_level and demographic_group
-        melted_df[['demographic_group', 'education_level']] = melted_df['category'].str.split('_', n=1, expand=True)
-        melted_df = melted_df.drop('category', axis=1)
-        
-        # Rename Year column to lowercase
-        melted_df = melted_df.rename(columns={'Year': 'year'})
-        
-        # Calculate YoY changes and handle infinite values
-        melted_df['wage_yoy_change'] = melted_df.groupby(['demographic_group', 'education_level'])['wage_value'].pct_change(fill_method=None).round(3)
-        # Replace infinite values with None/NULL
-        melted_df['wage_yoy_change'] = melted_df['wage_yoy_change'].replace([float('inf'), float('-inf')], None)
-        
-        # Specify columns in the correct order
-        columns = ['year', 'education_level', 'demographic_group', 'wage_value', 'wage_yoy_change']
-        
-        try:
-            print(f"\nLoading wages data ({len(melted_df)} rows)...")
-            print("First few rows:")
-            print(melted_df[columns].head().to_string())
-            self.copy_from_stringio(melted_df, 'wages_education', columns)
-            print("Wages data loaded successfully")
-        except Exception as e:
-            print(f"Error loading wages data: {str(e)}")
-            raise
 
-    def load_interest_rates(self):
-        """Load interest rates data"""
-        df = pd.read_csv('data/kaggle/interest_rates/kaggle_interest_rates_processed.csv')
-        
-        # Ensure column names match schema
-        column_mapping = {
-            'Date': 'date',
-            'Federal Funds Target Rate': 'fed_funds_target',
-            'Federal Funds Upper Target': 'fed_funds_upper',
-            'Federal Funds Lower Target': 'fed_funds_lower',
-            'Effective Federal Funds Rate': 'effective_rate',
-            'Real GDP (Percent Change)': 'real_gdp_change',
-            'Unemployment Rate': 'unemployment_rate',
-            'Inflation Rate': 'inflation_rate'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Calculate MoM and YoY changes with fill_method=None
-        df['target_rate_mom'] = df['fed_funds_target'].pct_change(fill_method=None).round(3)
-        df['effective_rate_mom'] = df['effective_rate'].pct_change(fill_method=None).round(3)
-        df['target_rate_yoy'] = df['fed_funds_target'].pct_change(12, fill_method=None).round(3)
-        df['effective_rate_yoy'] = df['effective_rate'].pct_change(12, fill_method=None).round(3)
-        
-        # Replace infinite values with None/NULL
-        for col in ['target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy']:
-            df[col] = df[col].replace([float('inf'), float('-inf')], None)
-        
-        # Specify columns in the correct order
-        columns = ['date', 'fed_funds_target', 'fed_funds_upper', 'fed_funds_lower', 
-                  'effective_rate', 'real_gdp_change', 'unemployment_rate', 'inflation_rate',
-                  'target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy']
-        
-        try:
-            print(f"\nLoading interest rates data ({len(df)} rows)...")
-            print("First few rows:")
-            print(df[columns].head().to_string())
-            self.copy_from_stringio(df, 'interest_rates', columns)
-            print("Interest rates data loaded successfully")
-        except Exception as e:
-            print(f"Error loading interest rates data: {str(e)}")
-            raise
+    def verify_counts(self, conn):
+        """Print the row count of every registry table"""
+        with conn.cursor() as cur:
+            print("\nVerifying data loaded:")
+            for table_name, spec in DATASETS.items():
+                cur.execute(f"SELECT COUNT(*) FROM public.{table_name}")
+                count = cur.fetchone()[0]
+                print(f"{spec['name']}: {count} rows")
 
-    def load_zillow_data(self):
-        """Load Zillow housing data"""
-        df = pd.read_csv('data/kaggle/zillow/kaggle_zillow_processed.csv')
-        
-        # Ensure column names match schema
-        column_mapping = {
-            'Date': 'date',
-            'RegionName': 'region_name',
-            'State': 'state',
-            'Metro': 'metro_area',
-            'CountyName': 'county_name',
-            'Price': 'price',
-            'Price_MoM': 'price_mom',
-            'Price_YoY': 'price_yoy'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Sort by date and region_name, keep only the latest entry for each combination
-        df = df.sort_values(['date', 'region_name']).drop_duplicates(['date', 'region_name'], keep='last')
-        
-        try:
-            print(f"\nLoading Zillow housing data ({len(df)} rows)...")
-            print("First few rows:")
-            print(df[list(column_mapping.values())].head().to_string())
-            self.copy_from_stringio(df, 'zillow_housing', list(column_mapping.values()))
-            print("Zillow housing data loaded successfully")
-        except Exception as e:
-            print(f"Error loading Zillow housing data: {str(e)}")
-            raise
+    def stale_tables(self, engine, force=False):
+        """
+        Fingerprint every registry source and find the tables that need loading.
 
-    def load_zillow_hvi(self):
-        """Load Zillow Home Value Index data"""
-        # Read from cleaned data instead of processed
-        df = pd.read_csv('data/cleaned/zillow_hvi_cleaned.csv')
-        
-        # Ensure date is in datetime format
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Get state columns (exclude date and any _MoM columns)
-        state_cols = [col for col in df.columns if col != 'date' and not col.endswith('_MoM')]
-        
-        # Melt state columns into rows
-        df_melted = pd.melt(
-            df,
-            id_vars=['date'],
-            value_vars=state_cols,
-            var_name='state',
-            value_name='home_value_index'
-        )
-        
-        # Sort by date and state, remove any duplicates
-        df_melted = df_melted.sort_values(['date', 'state']).drop_duplicates(['date', 'state'])
-        
-        # Convert home_value_index to numeric and handle duplicates
-        df_melted['home_value_index'] = pd.to_numeric(df_melted['home_value_index'], errors='coerce')
-        
-        # Sort by date and state, then remove duplicates keeping the latest value
-        df_melted = df_melted.sort_values(['date', 'state', 'home_value_index'], ascending=[True, True, False])
-        df_melted = df_melted.drop_duplicates(['date', 'state'], keep='first')
-        
-        # Calculate changes for each state separately to avoid cross-state calculations
-        dfs = []
-        for state in df_melted['state'].unique():
-            state_df = df_melted[df_melted['state'] == state].copy()
-            state_df = state_df.sort_values('date')
-            
-            # Calculate MoM and YoY changes
-            state_df['hvi_mom'] = state_df['home_value_index'].pct_change().round(3)
-            state_df['hvi_yoy'] = state_df['home_value_index'].pct_change(12).round(3)
-            
-            dfs.append(state_df)
-        
-        # Combine all states back together
-        df_melted = pd.concat(dfs, ignore_index=True)
-        
-        # Replace infinite values with None/NULL
-        for col in ['hvi_mom', 'hvi_yoy']:
-            df_melted[col] = df_melted[col].replace([float('inf'), float('-inf')], None)
-        
-        # Specify columns in the correct order
-        columns = ['date', 'state', 'home_value_index', 'hvi_mom', 'hvi_yoy']
-        
-        try:
-            print(f"\nLoading Zillow HVI data ({len(df_melted)} rows)...")
-            print("First few rows:")
-            print(df_melted[columns].head().to_string())
-            self.copy_from_stringio(df_melted, 'zillow_home_value_index', columns)
-            print("Zillow HVI data loaded successfully")
-        except Exception as e:
-            print(f"Error loading Zillow HVI data: {str(e)}")
-            raise
+        A table is current when it exists and its source hash and transform
+        version match its last successful load in load_runs. A table whose
+        lookup dimension is stale is stale too, so its keys are read back again.
+
+        Args:
+            engine (DatasetEngine): Engine resolving the source paths.
+            force (bool): Treat every table as stale.
+        Returns:
+            tuple: (table name -> fingerprint, or None if the source could not be
+                read, list of stale tables in registry order)
+        """
+        fingerprints = {}
+        stale = []
+        with self.get_connection() as conn:
+            ensure_load_runs_table(conn)
+            conn.commit()
+            for table_name, spec in DATASETS.items():
+                try:
+                    with span('fingerprint', table=table_name):
+                        fingerprints[table_name] = fingerprint_source(engine.source_path(table_name))
+                except Exception:
+                    # Reported when the table is loaded
+                    fingerprints[table_name] = None
+                if (force or fingerprints[table_name] is None or not table_exists(conn, table_name)
+                        or not is_unchanged(conn, table_name, fingerprints[table_name], spec['version'])
+                        or spec.get('lookup', {}).get('table') in stale):
+                    stale.append(table_name)
+        return fingerprints, stale
 
-    def load_all_data(self, drop_existing=True):
-        """Create tables and load all datasets"""
+    def load_all_data(self, drop_existing=True, create_schema=True, engine=None, force=False,
+                      full_reload=False, partitioned=False):
+        """
+        Create tables and load all datasets.
+
+        Tables whose source file hash and transform version match the last
+        successful load recorded in load_runs are skipped unless force is set;
+        the others are each loaded and committed on their own.
+
+        In full_reload mode existing tables are kept and each table is rebuilt
+        as a shadow copy (COPY first, then keys, indexes and ANALYZE) and swapped
+        in with an atomic rename, so the API never sees a missing or half-loaded
+        table.
+
+        Partitioned tables (see partitions.py) are always reloaded year by year:
+        only years whose rows changed are loaded and swapped in.
+
+        Dimension tables (see dimensions.py) are upserted by their natural key so
+        the database assigns and keeps their ids; tables with a lookup then read
+        those ids back before loading.
+
+        Args:
+            drop_existing (bool): Drop the tables to reload (except partitioned ones)
+                before running schema.sql.
+            create_schema (bool): Run schema.sql (creating missing tables) before
+                loading. Tables that are not dropped are truncated and reloaded in place.
+            engine (DatasetEngine): Engine to take the DataFrames from. Passing the
+                same engine to several loaders reuses the parsed sources.
+            force (bool): Reload every table even if its source is unchanged.
+            full_reload (bool): Replace tables via shadow copies instead of dropping them.
+            partitioned (bool): Partition PARTITIONED_TABLES by year (existing rows are kept).
+        Returns:
+            dict: Table name -> {'status', 'rows', 'error'} for the run summary.
+        """
         print("Starting database loading process...")
         
-        # Create tables first
-        self.create_tables(drop_existing=drop_existing)
+        engine = engine or DatasetEngine()
+        fingerprints, stale = self.stale_tables(engine, force=force)
+        if full_reload:
+            # Shadow copies are built from the live tables, so none are dropped
+            self.create_tables(tables=[])
+        elif create_schema:
+            self.create_tables(tables=stale if drop_existing else [])
+        summary = {}
         
-        # Use a single connection for all data loading
         with self.get_connection() as conn:
-            try:
-                # Load BLS data
-                print("\nLoading BLS data...")
-                df = pd.read_csv('data/bls/bls_housing_processed.csv')
-                column_mapping = {
-                    'date': 'date',
-                    'Fuels_Utilities': 'fuels_utilities_cpi',
-                    'Household_Furnishings': 'household_furnishings_cpi',
-                    'Housing': 'housing_cpi',
-                    'Housing_All': 'housing_all_cpi',
-                    'Shelter': 'shelter_cpi'
-                }
-                df = df.rename(columns=column_mapping)
-                df['housing_cpi_mom'] = df['housing_cpi'].pct_change().round(3)
-                df['shelter_cpi_mom'] = df['shelter_cpi'].pct_change().round(3)
-                df['fuels_utilities_mom'] = df['fuels_utilities_cpi'].pct_change().round(3)
-                df['furnishings_mom'] = df['household_furnishings_cpi'].pct_change().round(3)
-                df['housing_cpi_yoy'] = df['housing_cpi'].pct_change(12).round(3)
-                df['shelter_cpi_yoy'] = df['shelter_cpi'].pct_change(12).round(3)
-                df['fuels_utilities_yoy'] = df['fuels_utilities_cpi'].pct_change(12).round(3)
-                df['furnishings_yoy'] = df['household_furnishings_cpi'].pct_change(12).round(3)
-                columns = [
-                    'date', 'housing_cpi', 'shelter_cpi', 'fuels_utilities_cpi', 'household_furnishings_cpi',
-                    'housing_cpi_mom', 'shelter_cpi_mom', 'fuels_utilities_mom', 'furnishings_mom',
-                    'housing_cpi_yoy', 'shelter_cpi_yoy', 'fuels_utilities_yoy', 'furnishings_yoy'
-                ]
-                print(f"Loading {len(df)} rows...")
-                self.copy_from_stringio(conn, df, 'bls_housing_cpi', columns)
-                
-                # Load Census data
-                print("\nLoading Census data...")
-                df = pd.read_csv('data/census/census_housing_processed.csv')
-                column_mapping = {
-                    'state': 'state',
-                    'year': 'year',
-                    'Total_Housing_Units': 'total_housing_units',
-                    'Occupied_Units': 'occupied_units',
-                    'Vacant_Units': 'vacant_units',
-                    'Owner_Occupied': 'owner_occupied',
-                    'Renter_Occupied': 'renter_occupied',
-                    'Median_Home_Value': 'median_home_value',
-                    'Median_Monthly_Housing_Cost': 'median_monthly_cost',
-                    'Vacancy_Rate': 'vacancy_rate',
-                    'Homeownership_Rate': 'homeownership_rate'
-                }
-                df = df.rename(columns=column_mapping)
-                print(f"Loading {len(df)} rows...")
-                self.copy_from_stringio(conn, df, 'census_housing', list(column_mapping.values()))
-                
-                # Load Kaggle Housing Prices
-                print("\nLoading Kaggle Housing Prices...")
-                df = pd.read_csv('data/kaggle/housing/kaggle_housing_processed.csv')
-                column_mapping = {
-                    'date': 'date',
-                    'U.S. National': 'us_national',
-                    '20-City Composite': 'city_composite_20',
-                    '10-City Composite': 'city_composite_10'
-                }
-                df = df.rename(columns=column_mapping)
-                df['us_national_mom'] = df['us_national'].pct_change().round(3)
-                df['city_20_mom'] = df['city_composite_20'].pct_change().round(3)
-                df['city_10_mom'] = df['city_composite_10'].pct_change().round(3)
-                df['us_national_yoy'] = df['us_national'].pct_change(12).round(3)
-                df['city_20_yoy'] = df['city_composite_20'].pct_change(12).round(3)
-                df['city_10_yoy'] = df['city_composite_10'].pct_change(12).round(3)
-                columns = ['date', 'us_national', 'city_composite_20', 'city_composite_10',
-                          'us_national_mom', 'city_20_mom', 'city_10_mom',
-                          'us_national_yoy', 'city_20_yoy', 'city_10_yoy']
-                print(f"Loading {len(df)} rows...")
-                self.copy_from_stringio(conn, df, 'kaggle_housing_prices', columns)
-                
-                # Load Wages data
-                print("\nLoading Wages data...")
-                df = pd.read_csv('data/kaggle/wages/kaggle_wages_processed.csv')
-                melted_df = pd.melt(df, id_vars=['Year'], var_name='category', value_name='wage_value')
-                melted_df[['demographic_group', 'education_level']] = melted_df['category'].str.split('_', n=1, expand=True)
-                melted_df = melted_df.drop('category', axis=1)
-                melted_df = melted_df.rename(columns={'Year': 'year'})
-                melted_df['wage_yoy_change'] = melted_df.groupby(['demographic_group', 'education_level'])['wage_value'].pct_change(fill_method=None).round(3)
-                melted_df['wage_yoy_change'] = melted_df['wage_yoy_change'].replace([float('inf'), float('-inf')], None)
-                columns = ['year', 'education_level', 'demographic_group', 'wage_value', 'wage_yoy_change']
-                print(f"Loading {len(melted_df)} rows...")
-                self.copy_from_stringio(conn, melted_df, 'wages_education', columns)
-                
-                # Load Interest Rates data
-                print("\nLoading Interest Rates data...")
-                df = pd.read_csv('data/kaggle/interest_rates/kaggle_interest_rates_processed.csv')
-                column_mapping = {
-                    'Date': 'date',
-                    'Federal Funds Target Rate': 'fed_funds_target',
-                    'Federal Funds Upper Target': 'fed_funds_upper',
-                    'Federal Funds Lower Target': 'fed_funds_lower',
-                    'Effective Federal Funds Rate': 'effective_rate',
-                    'Real GDP (Percent Change)': 'real_gdp_change',
-                    'Unemployment Rate': 'unemployment_rate',
-                    'Inflation Rate': 'inflation_rate'
-                }
-                df = df.rename(columns=column_mapping)
-                df['target_rate_mom'] = df['fed_funds_target'].pct_change(fill_method=None).round(3)
-                df['effective_rate_mom'] = df['effective_rate'].pct_change(fill_method=None).round(3)
-                df['target_rate_yoy'] = df['fed_funds_target'].pct_change(12, fill_method=None).round(3)
-                df['effective_rate_yoy'] = df['effective_rate'].pct_change(12, fill_method=None).round(3)
-                for col in ['target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy']:
-                    df[col] = df[col].replace([float('inf'), float('-inf')], None)
-                columns = ['date', 'fed_funds_target', 'fed_funds_upper', 'fed_funds_lower',
-                          'effective_rate', 'real_gdp_change', 'unemployment_rate', 'inflation_rate',
-                          'target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy']
-                print(f"Loading {len(df)} rows...")
-                self.copy_from_stringio(conn, df, 'interest_rates', columns)
-                
-                # Load Zillow Housing data
-                print("\nLoading Zillow Housing data...")
-                df = pd.read_csv('data/kaggle/zillow/kaggle_zillow_processed.csv')
-                column_mapping = {
-                    'Date': 'date',
-                    'RegionName': 'region_name',
-                    'State': 'state',
-                    'Metro': 'metro_area',
-                    'CountyName': 'county_name',
-                    'Price': 'price',
-                    'Price_MoM': 'price_mom',
-                    'Price_YoY': 'price_yoy'
-                }
-                df = df.rename(columns=column_mapping)
-                df = df.sort_values(['date', 'region_name']).drop_duplicates(['date', 'region_name'], keep='last')
-                print(f"Loading {len(df)} rows...")
-                self.copy_from_stringio(conn, df, 'zillow_housing', list(column_mapping.values()))
-                
-                # Load Zillow HVI data
-                print("\nLoading Zillow HVI data...")
-                df = pd.read_csv('data/cleaned/zillow_hvi_cleaned.csv')
-                df['date'] = pd.to_datetime(df['date'])
-                state_cols = [col for col in df.columns if col != 'date' and not col.endswith('_MoM')]
-                df_melted = pd.melt(df, id_vars=['date'], value_vars=state_cols,
-                                  var_name='state', value_name='home_value_index')
-                df_melted = df_melted.sort_values(['date', 'state']).drop_duplicates(['date', 'state'])
-                df_melted['home_value_index'] = pd.to_numeric(df_melted['home_value_index'], errors='coerce')
-                df_melted = df_melted.sort_values(['date', 'state', 'home_value_index'], ascending=[True, True, False])
-                df_melted = df_melted.drop_duplicates(['date', 'state'], keep='first')
-                dfs = []
-                for state in df_melted['state'].unique():
-                    state_df = df_melted[df_melted['state'] == state].copy()
-                    state_df = state_df.sort_values('date')
-                    state_df['hvi_mom'] = state_df['home_value_index'].pct_change().round(3)
-                    state_df['hvi_yoy'] = state_df['home_value_index'].pct_change(12).round(3)
-                    dfs.append(state_df)
-                df_melted = pd.concat(dfs, ignore_index=True)
-                for col in ['hvi_mom', 'hvi_yoy']:
-                    df_melted[col] = df_melted[col].replace([float('inf'), float('-inf')], None)
-                columns = ['date', 'state', 'home_value_index', 'hvi_mom', 'hvi_yoy']
-                print(f"Loading {len(df_melted)} rows...")
-                self.copy_from_stringio(conn, df_melted, 'zillow_home_value_index', columns)
-                
-                # Verify all data was loaded
-                with conn.cursor() as cur:
-                    tables = {
-                        'BLS Housing CPI': 'bls_housing_cpi',
-                        'Census Housing': 'census_housing',
-                        'Kaggle Housing Prices': 'kaggle_housing_prices',
-                        'Wages Education': 'wages_education',
-                        'Interest Rates': 'interest_rates',
-                        'Zillow Housing': 'zillow_housing',
-                        'Zillow Home Value Index': 'zillow_home_value_index'
-                    }
-                    print("\nVerifying data loaded:")
-                    for name, table in tables.items():
-                        cur.execute(f"SELECT COUNT(*) FROM public.{table}")
-                        count = cur.fetchone()[0]
-                        print(f"{name}: {count} rows")
-                
-                conn.commit()
-                print("\nAll data loaded and committed successfully!")
-                
-            except Exception as e:
-                conn.rollback()
-                print(f"Error loading data: {str(e)}")
-                raise
+            if partitioned:
+                self.partition_tables(conn)
+            
+            for table_name, spec in DATASETS.items():
+                source_path = engine.source_path(table_name)
+                fingerprint = fingerprints.get(table_name)
+                if table_name not in stale:
+                    print(f"\nSkipping {spec['name']} (source unchanged)")
+                    summary[table_name] = {'status': 'skipped'}
+                    continue
+                try:
+                    if fingerprint is None:
+                        fingerprint = fingerprint_source(source_path)
+                    
+                    df = resolve_keys(conn, spec, engine.build(table_name))
+                    if table_name in dimension_tables():
+                        self.sync_table(conn, table_name, df)
+                    elif is_partitioned(conn, table_name):
+                        self.load_partitions(conn, table_name, df)
+                    elif full_reload:
+                        print(f"\nLoading {spec['name']} into shadow table ({len(df)} rows)...")
+                        reload_via_shadow(
+                            conn, table_name,
+                            lambda conn, shadow: self.copy_from_stringio(conn, df, shadow, spec['load_columns'])
+                        )
+                    else:
+                        with conn.cursor() as cur:
+                            cur.execute(f"TRUNCATE public.{table_name}")
+                        self.load_table(conn, table_name, df)
+                    record_run(conn, table_name, source_path, fingerprint, spec['version'],
+                               'loaded', loaded_rows=len(df))
+                    with span('commit', table=table_name):
+                        conn.commit()
+                    summary[table_name] = {'status': 'loaded', 'rows': len(df)}
+                    
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Error loading {spec['name']}: {str(e)}")
+                    record_run(conn, table_name, source_path, fingerprint, spec['version'],
+                               'failed', error=str(e))
+                    conn.commit()
+                    summary[table_name] = {'status': 'failed', 'error': str(e)}
+            
+            self.verify_counts(conn)
+        
+        print("\n" + format_run_summary(summary))
+        failed = [table for table, result in summary.items() if result['status'] == 'failed']
+        if failed:
+            raise RuntimeError(f"Failed to load: {', '.join(failed)}")
+        print("\nAll data loaded and committed successfully!")
+        return summary
 
 def main():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--no-schema', action='store_true', help='Skip schema creation')
+    parser.add_argument('--force', action='store_true', help='Reload tables even if their source is unchanged')
+    parser.add_argument('--full-reload', action='store_true',
+                        help='Rebuild tables as shadow copies and swap them in without read downtime')
+    parser.add_argument('--partitioned', action='store_true',
+                        help='Partition zillow_housing by year and reload only changed years')
     args = parser.parse_args()
     
     loader = DatabaseLoader()
-    if args.no_schema:
-        # Skip schema creation, just load data
-        try:
-            loader.load_bls_data()
-            loader.load_census_data()
-            loader.load_kaggle_housing_prices()
-            loader.load_wages_data()
-            loader.load_interest_rates()
-            loader.load_zillow_data()
-            loader.load_zillow_hvi()
-            print("\nAll data loaded successfully!")
-        except Exception as e:
-            print(f"Error loading data: {str(e)}")
-    else:
-        # Create schema and load data
-        loader.load_all_data(drop_existing=True)
+    loader.load_all_data(drop_existing=True, create_schema=not args.no_schema, force=args.force,
+                         full_reload=args.full_reload, partitioned=args.partitioned)
 
 if __name__ == "__main__":
     main()
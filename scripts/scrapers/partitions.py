@@ -0,0 +1,236 @@
+import hashlib
+
+import pandas as pd
+
+from shadow_swap import (
+    SWAP_LOCK_TIMEOUT,
+    _constraints,
+    _plain_indexes,
+    build_shadow_indexes,
+    swap_in_shadow,
+    SHADOW_SUFFIX
+)
+
+# Tables that can be range-partitioned by year, with their partition column.
+# Recent-window queries (the API's MAX(date) heatmap and trends) then prune to
+# one or two partitions, and reloading a year leaves the others untouched.
+PARTITIONED_TABLES = {
+    'zillow_housing': 'date'
+}
+
+# Suffix of the standalone table a year is loaded into before it is attached
+LOAD_SUFFIX = '_load'
+
+
+def is_partitioned(conn, table_name):
+    """Return True if public.<table_name> is a partitioned table"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = to_regclass(%s)
+        """, (f'public.{table_name}',))
+        return cur.fetchone() is not None
+
+
+def partition_name(table_name, year):
+    """Name of a table's partition for one year, e.g. zillow_housing_y2020"""
+    return f'{table_name}_y{int(year)}'
+
+
+def _bounds(year):
+    return f"FOR VALUES FROM ('{int(year)}-01-01') TO ('{int(year) + 1}-01-01')"
+
+
+def partition_years(df, column='date'):
+    """Sorted distinct years of a frame's partition column"""
+    return sorted(pd.to_datetime(df[column]).dt.year.unique().tolist())
+
+
+def attached_partitions(conn, table_name):
+    """
+    Partitions of a table with their content hashes.
+    Returns:
+        dict: Partition name -> hash stored in its comment by load_partitioned (or None).
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, obj_description(c.oid, 'pg_class')
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+        """, (f'public.{table_name}',))
+        return dict(cur.fetchall())
+
+
+def ensure_partitions(conn, table_name, years, parent=None):
+    """
+    Create empty partitions for the given years where missing (e.g. before upserts).
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Table the partitions are named after.
+        years (list): Years that need a partition.
+        parent (str): Partitioned table to attach them to, defaults to table_name.
+    """
+    parent = parent or table_name
+    existing = attached_partitions(conn, parent)
+    with conn.cursor() as cur:
+        for year in years:
+            name = partition_name(table_name, year)
+            if name not in existing:
+                cur.execute(f"CREATE TABLE public.{name} PARTITION OF public.{parent} {_bounds(year)}")
+
+
+def convert_to_partitioned(conn, table_name, column=None):
+    """
+    Replace a plain table with a copy range-partitioned by year, keeping its rows.
+
+    The copy is built as a shadow table (see shadow_swap.py) with one partition
+    per year present, and the live table's keys, indexes and policies, then
+    swapped in atomically.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Table to convert; a key of PARTITIONED_TABLES by default.
+        column (str): Date column to partition by.
+    """
+    column = column or PARTITIONED_TABLES[table_name]
+    shadow = f'{table_name}{SHADOW_SUFFIX}'
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS public.{shadow} CASCADE")
+            cur.execute(f"""
+                CREATE TABLE public.{shadow}
+                (LIKE public.{table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                PARTITION BY RANGE ({column})
+            """)
+            cur.execute(f"""
+                SELECT DISTINCT EXTRACT(YEAR FROM {column})::int FROM public.{table_name}
+                WHERE {column} IS NOT NULL
+            """)
+            years = sorted(year for year, in cur.fetchall())
+        # Partitions are named after the live table, which the shadow replaces
+        ensure_partitions(conn, table_name, years, parent=shadow)
+        with conn.cursor() as cur:
+            cur.execute(f"INSERT INTO public.{shadow} SELECT * FROM public.{table_name}")
+        build_shadow_indexes(conn, table_name)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    swap_in_shadow(conn, table_name)
+    print(f"Partitioned {table_name} by year of {column} ({len(years)} partitions)")
+
+
+def frame_hash(df):
+    """sha256 of a frame's values, to detect unchanged partitions"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def _index_statements(cur, table_name, target, final):
+    """
+    Statements recreating a partitioned table's keys and indexes on a standalone
+    table, so ATTACH PARTITION adopts them instead of building them under lock.
+    Returns:
+        list: (sql, temporary name, final name) per index.
+    """
+    statements = []
+    for name, definition in _constraints(cur, table_name):
+        statements.append((f'ALTER TABLE public.{target} ADD CONSTRAINT "{target}_{name}" {definition}',
+                           f'{target}_{name}', f'{final}_{name}'))
+    for name, definition in _plain_indexes(cur, table_name):
+        definition = definition.replace(f'INDEX {name} ON', f'INDEX "{target}_{name}" ON', 1)
+        definition = definition.replace(f'ON ONLY public.{table_name} ', f'ON public.{target} ', 1)
+        definition = definition.replace(f'ON public.{table_name} ', f'ON public.{target} ', 1)
+        statements.append((definition, f'{target}_{name}', f'{final}_{name}'))
+    return statements
+
+
+def load_partitioned(conn, table_name, df, load_func, column=None):
+    """
+    Reload a partitioned table year by year, touching only years whose rows changed.
+
+    Each changed year is loaded into a standalone table, which gets the
+    partition's keys, indexes and a CHECK on its date range (so attaching needs
+    no validation scan). The old partition is then detached and dropped and the
+    new one attached in one short transaction, so readers never see the year
+    missing. Years no longer in the source are detached and dropped.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Partitioned table.
+        df (pd.DataFrame): All rows of the table.
+        load_func (callable): Called as load_func(conn, table, frame) to bulk load one year.
+        column (str): Partition column; defaults to PARTITIONED_TABLES[table_name].
+    Returns:
+        dict: 'loaded', 'unchanged' and 'dropped' lists of years.
+    """
+    column = column or PARTITIONED_TABLES[table_name]
+    existing = attached_partitions(conn, table_name)
+    years = pd.to_datetime(df[column]).dt.year
+    result = {'loaded': [], 'unchanged': [], 'dropped': []}
+
+    for year, frame in df.groupby(years.to_numpy(), sort=True):
+        name = partition_name(table_name, year)
+        digest = frame_hash(frame)
+        if existing.get(name) == digest:
+            result['unchanged'].append(int(year))
+            continue
+
+        staging = f'{name}{LOAD_SUFFIX}'
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{staging}")
+                cur.execute(f"""
+                    CREATE TABLE public.{staging}
+                    (LIKE public.{table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+                """)
+            load_func(conn, staging, frame)
+            with conn.cursor() as cur:
+                indexes = _index_statements(cur, table_name, staging, name)
+                for sql, _, _ in indexes:
+                    cur.execute(sql)
+                cur.execute(f"""
+                    ALTER TABLE public.{staging} ADD CONSTRAINT {staging}_bounds
+                    CHECK ({column} IS NOT NULL AND {column} >= '{int(year)}-01-01'
+                           AND {column} < '{int(year) + 1}-01-01')
+                """)
+                cur.execute(f"COMMENT ON TABLE public.{staging} IS %s", (digest,))
+                cur.execute(f"ANALYZE public.{staging}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{staging}")
+            conn.commit()
+            raise
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+                if name in existing:
+                    cur.execute(f"ALTER TABLE public.{table_name} DETACH PARTITION public.{name}")
+                    cur.execute(f"DROP TABLE public.{name}")
+                cur.execute(f"ALTER TABLE public.{staging} RENAME TO {name}")
+                for _, temporary, final in indexes:
+                    cur.execute(f'ALTER INDEX public."{temporary}" RENAME TO "{final}"')
+                cur.execute(f"ALTER TABLE public.{table_name} ATTACH PARTITION public.{name} {_bounds(year)}")
+                cur.execute(f"ALTER TABLE public.{name} DROP CONSTRAINT {staging}_bounds")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS public.{staging}")
+            conn.commit()
+            raise
+        result['loaded'].append(int(year))
+
+    loaded_names = {partition_name(table_name, year) for year in result['loaded'] + result['unchanged']}
+    with conn.cursor() as cur:
+        for name in existing:
+            if name not in loaded_names:
+                cur.execute(f"ALTER TABLE public.{table_name} DETACH PARTITION public.{name}")
+                cur.execute(f"DROP TABLE public.{name}")
+                result['dropped'].append(int(name.rsplit('_y', 1)[1]))
+    conn.commit()
+    return result
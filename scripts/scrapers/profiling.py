@@ -0,0 +1,175 @@
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Set to a trace file path (e.g. ETL_PROFILE=data/profile.jsonl) to enable profiling
+PROFILE_ENV = 'ETL_PROFILE'
+# Set to 0 to skip tracemalloc, which slows allocation-heavy stages noticeably
+PROFILE_MEMORY_ENV = 'ETL_PROFILE_MEMORY'
+
+
+class Profiler:
+    """Collect nested timing/memory spans for ETL stages"""
+
+    def __init__(self, trace_memory=True):
+        """
+        Args:
+            trace_memory (bool): Track peak memory per span with tracemalloc.
+        """
+        self.trace_memory = trace_memory
+        self.enabled = False
+        self.spans = []
+        self._stack = []
+
+    def start(self):
+        """Start recording spans"""
+        self.enabled = True
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time a stage. The yielded dict can be updated inside the block,
+        typically with span['rows'] = len(df).
+
+        Records wall time, CPU time and the peak traced memory above the
+        span's starting point (including nested spans). When profiling is
+        disabled the block runs untouched.
+
+        Args:
+            name (str): Stage name, e.g. 'read_csv' or 'copy'.
+            **attrs: Extra fields stored with the span, e.g. table='zillow_housing'.
+        """
+        record = {'name': name, 'rows': None, **attrs}
+        if not self.enabled:
+            yield record
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Hand the parent its peak so far before resetting the counter for this span
+            if parent is not None:
+                parent['_peak'] = max(parent['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_mem_start'] = current
+            record['_peak'] = current
+
+        self._stack.append(record)
+        record['start'] = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+            self._stack.pop()
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], record.pop('_peak'))
+                record['peak_mem_mb'] = round((peak - record.pop('_mem_start')) / 2 ** 20, 3)
+                if parent is not None:
+                    parent['_peak'] = max(parent['_peak'], peak)
+                tracemalloc.reset_peak()
+            record['parent'] = parent['name'] if parent is not None else None
+            record['depth'] = len(self._stack)
+            record['pid'] = os.getpid()
+            record['script'] = os.path.basename(sys.argv[0])
+            self.spans.append(record)
+
+    def write_trace(self, path):
+        """Append recorded spans to a JSON Lines trace file, one span per line"""
+        if not self.spans:
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as f:
+            for record in self.spans:
+                f.write(json.dumps(record, default=str) + '\n')
+        self.spans = []
+
+
+def summarize(spans):
+    """
+    Aggregate spans by stage name.
+    Args:
+        spans (list): Span dicts, as recorded or read from a trace file.
+    Returns:
+        dict: Stage name -> {'calls', 'wall_s', 'cpu_s', 'peak_mem_mb', 'rows'}.
+    """
+    summary = defaultdict(lambda: {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_mem_mb': None, 'rows': 0})
+    for record in spans:
+        stage = summary[record['name']]
+        stage['calls'] += 1
+        stage['wall_s'] += record['wall_s']
+        stage['cpu_s'] += record['cpu_s']
+        if record.get('peak_mem_mb') is not None:
+            stage['peak_mem_mb'] = max(stage['peak_mem_mb'] or 0, record['peak_mem_mb'])
+        stage['rows'] += record.get('rows') or 0
+    return dict(summary)
+
+
+def format_summary(spans):
+    """Format a per-stage summary table, slowest stage first"""
+    summary = summarize(spans)
+    lines = [f"{'Stage':<24}{'Calls':>7}{'Wall (s)':>11}{'CPU (s)':>10}{'Peak MB':>10}{'Rows':>12}"]
+    for name, stage in sorted(summary.items(), key=lambda item: item[1]['wall_s'], reverse=True):
+        peak = f"{stage['peak_mem_mb']:.1f}" if stage['peak_mem_mb'] is not None else '-'
+        lines.append(f"{name:<24}{stage['calls']:>7}{stage['wall_s']:>11.3f}{stage['cpu_s']:>10.3f}"
+                     f"{peak:>10}{stage['rows']:>12}")
+    return '\n'.join(lines)
+
+
+def read_trace(path):
+    """Read spans from a JSON Lines trace file"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+profiler = Profiler(trace_memory=os.getenv(PROFILE_MEMORY_ENV, '1') != '0')
+
+
+def span(name, **attrs):
+    """Time a stage with the module profiler (see Profiler.span)"""
+    return profiler.span(name, **attrs)
+
+
+def flush_trace():
+    """
+    Append the spans recorded so far to the trace file, if profiling is enabled.
+
+    Worker processes (e.g. a ProcessPoolExecutor) exit without running atexit
+    hooks, so they call this after each unit of work.
+    """
+    path = os.getenv(PROFILE_ENV)
+    if path and profiler.enabled:
+        profiler.write_trace(path)
+
+
+def _finish(path):
+    """Print this process's summary and append its spans to the trace file"""
+    if profiler.spans:
+        print("\nProfile summary:\n" + format_summary(profiler.spans))
+        profiler.write_trace(path)
+        print(f"Profile trace appended to {path}")
+
+
+if os.getenv(PROFILE_ENV):
+    profiler.start()
+    atexit.register(_finish, os.getenv(PROFILE_ENV))
+
+
+if __name__ == "__main__":
+    # Summarize a trace file written by one or more profiled runs
+    if len(sys.argv) != 2:
+        print("Usage: python profiling.py <trace.jsonl>")
+        sys.exit(1)
+    print(format_summary(read_trace(sys.argv[1])))
@@ -0,0 +1,261 @@
+from pathlib import Path
+from profiling import span
+from storage import resolve_path
+from schemas import read_dataset
+from transforms import (
+    add_changes,
+    melt_wages,
+    melt_states,
+    region_dimension,
+    region_facts,
+    BLS_CHANGES,
+    KAGGLE_HOUSING_CHANGES,
+    WAGES_CHANGES,
+    INTEREST_RATE_CHANGES,
+    ZILLOW_HVI_CHANGES
+)
+
+# Zillow source columns, shared by the regions dimension and the zillow_housing
+# facts so the engine parses the file once for both
+ZILLOW_COLUMNS = {
+    'Date': 'date',
+    'RegionName': 'region_name',
+    'State': 'state',
+    'Metro': 'metro_area',
+    'CountyName': 'county_name',
+    'Price': 'price',
+    'Price_MoM': 'price_mom',
+    'Price_YoY': 'price_yoy'
+}
+
+# One entry per database table, in load order. Keys:
+#   name         display name used in progress output
+#   version      transform version; bump when the mapping or derivations change
+#                so unchanged sources are reloaded (see load_runs.py)
+#   source       artifact path relative to the project root (a newer Parquet or
+#                Feather file with the same name is read instead, see storage.py);
+#                read with its dtypes from the schema catalog (schemas.py)
+#   columns      source column -> schema column; only these are read (usecols).
+#                When empty, the catalog's usecols decide (derived *_MoM/*_YoY
+#                columns are skipped, they are recomputed here)
+#   reshape      optional callable applied after renaming; it must not modify its
+#                input, which may be the source frame shared with other tables
+#   changes      derived change columns (see transforms.add_changes)
+#   group_by     columns identifying independent series for changes
+#   order_by     columns giving the time order for changes
+#   unique_keys  columns of the table's UNIQUE constraint
+#   load_columns columns loaded into the table, in schema order
+#   lookup       optional surrogate key read from a dimension table at load time:
+#                'column' (in load_columns) is filled from 'table' by matching
+#                'key', which the built frame carries instead (see dimensions.py)
+DATASETS = {
+    'bls_housing_cpi': {
+        'name': 'BLS Housing CPI',
+        'version': 1,
+        'source': 'data/bls/bls_housing_processed.csv',
+        'columns': {
+            'date': 'date',
+            'Fuels_Utilities': 'fuels_utilities_cpi',
+            'Household_Furnishings': 'household_furnishings_cpi',
+            'Housing': 'housing_cpi',
+            'Shelter': 'shelter_cpi'
+        },
+        'changes': BLS_CHANGES,
+        'unique_keys': ['date'],
+        'load_columns': [
+            'date', 'housing_cpi', 'shelter_cpi', 'fuels_utilities_cpi', 'household_furnishings_cpi',
+            'housing_cpi_mom', 'shelter_cpi_mom', 'fuels_utilities_mom', 'furnishings_mom',
+            'housing_cpi_yoy', 'shelter_cpi_yoy', 'fuels_utilities_yoy', 'furnishings_yoy'
+        ]
+    },
+    'census_housing': {
+        'name': 'Census Housing',
+        'version': 1,
+        'source': 'data/census/census_housing_processed.csv',
+        'columns': {
+            'state': 'state',
+            'year': 'year',
+            'Total_Housing_Units': 'total_housing_units',
+            'Occupied_Units': 'occupied_units',
+            'Vacant_Units': 'vacant_units',
+            'Owner_Occupied': 'owner_occupied',
+            'Renter_Occupied': 'renter_occupied',
+            'Median_Home_Value': 'median_home_value',
+            'Median_Monthly_Housing_Cost': 'median_monthly_cost',
+            'Vacancy_Rate': 'vacancy_rate',
+            'Homeownership_Rate': 'homeownership_rate'
+        },
+        'unique_keys': ['state', 'year'],
+        'load_columns': [
+            'state', 'year', 'total_housing_units', 'occupied_units', 'vacant_units',
+            'owner_occupied', 'renter_occupied', 'median_home_value', 'median_monthly_cost',
+            'vacancy_rate', 'homeownership_rate'
+        ]
+    },
+    'kaggle_housing_prices': {
+        'name': 'Kaggle Housing Prices',
+        'version': 1,
+        'source': 'data/kaggle/housing/kaggle_housing_processed.csv',
+        'columns': {
+            'date': 'date',
+            'U.S. National': 'us_national',
+            '20-City Composite': 'city_composite_20',
+            '10-City Composite': 'city_composite_10'
+        },
+        'changes': KAGGLE_HOUSING_CHANGES,
+        'unique_keys': ['date'],
+        'load_columns': [
+            'date', 'us_national', 'city_composite_20', 'city_composite_10',
+            'us_national_mom', 'city_20_mom', 'city_10_mom',
+            'us_national_yoy', 'city_20_yoy', 'city_10_yoy'
+        ]
+    },
+    'wages_education': {
+        'name': 'Wages Education',
+        'version': 1,
+        'source': 'data/kaggle/wages/kaggle_wages_processed.csv',
+        'columns': {},
+        'reshape': melt_wages,
+        'changes': WAGES_CHANGES,
+        'group_by': ['demographic_group', 'education_level'],
+        'order_by': 'year',
+        'unique_keys': ['year', 'education_level', 'demographic_group'],
+        'load_columns': ['year', 'education_level', 'demographic_group', 'wage_value', 'wage_yoy_change']
+    },
+    'interest_rates': {
+        'name': 'Interest Rates',
+        'version': 1,
+        'source': 'data/kaggle/interest_rates/kaggle_interest_rates_processed.csv',
+        'columns': {
+            'Date': 'date',
+            'Federal Funds Target Rate': 'fed_funds_target',
+            'Federal Funds Upper Target': 'fed_funds_upper',
+            'Federal Funds Lower Target': 'fed_funds_lower',
+            'Effective Federal Funds Rate': 'effective_rate',
+            'Real GDP (Percent Change)': 'real_gdp_change',
+            'Unemployment Rate': 'unemployment_rate',
+            'Inflation Rate': 'inflation_rate'
+        },
+        'changes': INTEREST_RATE_CHANGES,
+        'unique_keys': ['date'],
+        'load_columns': [
+            'date', 'fed_funds_target', 'fed_funds_upper', 'fed_funds_lower',
+            'effective_rate', 'real_gdp_change', 'unemployment_rate', 'inflation_rate',
+            'target_rate_mom', 'effective_rate_mom', 'target_rate_yoy', 'effective_rate_yoy'
+        ]
+    },
+    'regions': {
+        'name': 'Zillow Regions',
+        'version': 2,
+        'source': 'data/kaggle/zillow/kaggle_zillow_processed.csv',
+        'columns': ZILLOW_COLUMNS,
+        'reshape': region_dimension,
+        'unique_keys': ['region_name'],
+        'load_columns': ['region_name', 'state', 'metro_area', 'county_name']
+    },
+    'zillow_housing': {
+        'name': 'Zillow Housing',
+        'version': 3,
+        'source': 'data/kaggle/zillow/kaggle_zillow_processed.csv',
+        'columns': ZILLOW_COLUMNS,
+        'reshape': region_facts,
+        'unique_keys': ['region_id', 'date'],
+        'load_columns': ['region_id', 'date', 'price', 'price_mom', 'price_yoy'],
+        'lookup': {'column': 'region_id', 'table': 'regions', 'key': 'region_name'}
+    },
+    'zillow_home_value_index': {
+        'name': 'Zillow Home Value Index',
+        'version': 1,
+        'source': 'data/cleaned/zillow_hvi_cleaned.csv',
+        'columns': {},
+        'reshape': melt_states,
+        'changes': ZILLOW_HVI_CHANGES,
+        'group_by': 'state',
+        'order_by': 'date',
+        'unique_keys': ['date', 'state'],
+        'load_columns': ['date', 'state', 'home_value_index', 'hvi_mom', 'hvi_yoy']
+    }
+}
+
+
+def frame_columns(spec):
+    """Columns of a table's built frame: load_columns with a lookup column replaced by its key"""
+    lookup = spec.get('lookup')
+    if not lookup:
+        return spec['load_columns']
+    return [lookup['key'] if col == lookup['column'] else col for col in spec['load_columns']]
+
+
+def dimension_tables(datasets=None):
+    """Tables that other tables' lookups read their surrogate keys from"""
+    datasets = datasets or DATASETS
+    return {spec['lookup']['table'] for spec in datasets.values() if spec.get('lookup')}
+
+
+class DatasetEngine:
+    """Build load-ready DataFrames from the dataset registry"""
+
+    def __init__(self, datasets=None, base_dir='.'):
+        """
+        Args:
+            datasets (dict): Registry to execute, defaults to DATASETS.
+            base_dir (str or Path): Directory the source paths are relative to.
+        """
+        self.datasets = datasets or DATASETS
+        self.base_dir = Path(base_dir)
+        self._frames = {}
+        self._sources = {}
+
+    def source_path(self, table_name):
+        """Return the path of the file currently holding a table's source (CSV, Parquet or Feather)"""
+        return resolve_path(self.base_dir / self.datasets[table_name]['source'])
+
+    def read_source(self, spec):
+        """
+        Read only the columns a dataset needs from its source file, with catalog
+        dtypes. Tables built from the same source and columns share one read.
+        """
+        key = (spec['source'], tuple(spec['columns']))
+        if key not in self._sources:
+            self._sources[key] = read_dataset(self.base_dir / spec['source'],
+                                              columns=list(spec['columns']) or None)
+        return self._sources[key]
+
+    def transform(self, spec, df):
+        """Apply the registry's mapping, reshape and derived columns to a source frame"""
+        if spec['columns']:
+            with span('rename', dataset=spec['name']):
+                df = df.rename(columns=spec['columns'])
+        if spec.get('reshape'):
+            with span('reshape', dataset=spec['name']) as s:
+                df = spec['reshape'](df)
+                s['rows'] = len(df)
+        if spec.get('changes'):
+            with span('pct_change', dataset=spec['name']) as s:
+                df = add_changes(df, spec['changes'],
+                                 group_by=spec.get('group_by'), order_by=spec.get('order_by'))
+                s['rows'] = len(df)
+        return df[frame_columns(spec)].reset_index(drop=True)
+
+    def build(self, table_name):
+        """
+        Build the DataFrame for one table, parsing its source at most once per engine.
+        Args:
+            table_name (str): Key in the registry.
+        Returns:
+            pd.DataFrame: Rows ready to load, with columns in load_columns order (a
+                lookup column is still its natural key, see dimensions.resolve_keys).
+        """
+        if table_name not in self._frames:
+            spec = self.datasets[table_name]
+            with span('read_csv', table=table_name) as s:
+                df = self.read_source(spec)
+                s['rows'] = len(df)
+            with span('transform', table=table_name) as s:
+                self._frames[table_name] = self.transform(spec, df)
+                s['rows'] = len(self._frames[table_name])
+        return self._frames[table_name]
+
+    def build_all(self):
+        """Build every registered table, returning a dict of table name -> DataFrame"""
+        return {table_name: self.build(table_name) for table_name in self.datasets}
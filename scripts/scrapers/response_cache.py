@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = 'data/cache/http'
+MAX_CACHE_BYTES = 500 * 2 ** 20
+# Eviction frees space down to this share of max_bytes, so it runs once per
+# that much new data instead of on every put once the cache is full
+EVICT_TO = 0.9
+
+# Freshness rules (max_age in seconds)
+IMMUTABLE = None                  # published history: cache forever
+CURRENT_MAX_AGE = 12 * 3600       # windows that can still change: refetch after half a day
+
+# Request fields that must not end up in (or change) cache keys
+SECRET_FIELDS = {'key', 'registrationkey', 'api_key'}
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of gzip-compressed response bodies keyed by request parameters"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        """
+        Args:
+            cache_dir (str or Path): Directory for cached payloads.
+            max_bytes (int): Total compressed size to keep; least recently used entries are evicted.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Running total of the payload sizes, from one directory scan on the first put
+        self._size = None
+
+    def key(self, method, url, params=None, body=None):
+        """Stable hash of a request with secrets removed"""
+        def public(fields):
+            return {k: v for k, v in (fields or {}).items() if k not in SECRET_FIELDS}
+        request = {'method': method.upper(), 'url': url, 'params': public(params), 'body': public(body)}
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.gz'
+
+    def get(self, key, max_age=IMMUTABLE, final_at=None):
+        """
+        Return a cached payload, or None if missing or older than max_age.
+        Args:
+            key (str): Key from key().
+            max_age (float): Maximum age in seconds; IMMUTABLE (None) never expires.
+            final_at (float): Timestamp after which the response can no longer
+                change; entries fetched at or after it never expire, older ones
+                follow max_age.
+        Returns:
+            bytes or None: Decompressed payload.
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                payload = f.read()
+                fetched_at = f.mtime
+            final = final_at is not None and fetched_at >= final_at
+            if max_age is not None and not final and time.time() - fetched_at > max_age:
+                return None
+            # atime drives eviction
+            os.utime(path, (time.time(), path.stat().st_mtime))
+            return payload
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+
+    def put(self, key, payload):
+        """
+        Store a payload atomically, then evict old entries if over max_bytes.
+
+        The fetch time is written to the gzip header (MTIME) rather than taken
+        from the file, so copied or restored caches keep it. The cache size is
+        tracked as a running total, so the directory is only scanned once and
+        when evicting.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=int(time.time())) as f:
+                f.write(payload)
+            size = os.path.getsize(tmp_path)
+            with self.lock:
+                replaced = path.stat().st_size if path.exists() else 0
+                os.replace(tmp_path, path)
+                if self._size is None:
+                    self._size = self._scan()[1]
+                else:
+                    self._size += size - replaced
+                over = self._size > self.max_bytes
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if over:
+            self.evict()
+
+    def _scan(self):
+        """(atime, size, path) of every cached payload, and their total size"""
+        entries = []
+        for path in self.cache_dir.glob('*/*.gz'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in EVICT_TO of max_bytes"""
+        with self.lock:
+            entries, total = self._scan()
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._size = total
+
+    def clear(self):
+        """Remove every cached payload"""
+        with self.lock:
+            for path in self.cache_dir.glob('*/*.gz'):
+                path.unlink()
+            self._size = 0
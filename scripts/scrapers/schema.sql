@@ -2,16 +2,12 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Housing Market Data Schema
-DROP TABLE IF EXISTS public.bls_housing_cpi CASCADE;
-DROP TABLE IF EXISTS public.census_housing CASCADE;
-DROP TABLE IF EXISTS public.kaggle_housing_prices CASCADE;
-DROP TABLE IF EXISTS public.wages_education CASCADE;
-DROP TABLE IF EXISTS public.interest_rates CASCADE;
-DROP TABLE IF EXISTS public.zillow_housing CASCADE;
-DROP TABLE IF EXISTS public.zillow_home_value_index CASCADE;
+-- Tables are created where missing; load_to_db.py drops the tables it is about
+-- to reload first. Load history and checkpoints (load_runs.py, checkpoints.py)
+-- are kept, so tables whose source is unchanged are skipped.
 
 -- BLS Housing CPI Data
-CREATE TABLE public.bls_housing_cpi (
+CREATE TABLE IF NOT EXISTS public.bls_housing_cpi (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     housing_cpi DECIMAL(10, 2),
@@ -31,7 +27,7 @@ CREATE TABLE public.bls_housing_cpi (
 );
 
 -- Census Housing Data
-CREATE TABLE public.census_housing (
+CREATE TABLE IF NOT EXISTS public.census_housing (
     id SERIAL PRIMARY KEY,
     state VARCHAR(50) NOT NULL,
     year INTEGER NOT NULL,
@@ -49,7 +45,7 @@ CREATE TABLE public.census_housing (
 );
 
 -- Kaggle Housing Prices
-CREATE TABLE public.kaggle_housing_prices (
+CREATE TABLE IF NOT EXISTS public.kaggle_housing_prices (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     us_national DECIMAL(10, 2),
@@ -66,7 +62,7 @@ CREATE TABLE public.kaggle_housing_prices (
 );
 
 -- Wages by Education
-CREATE TABLE public.wages_education (
+CREATE TABLE IF NOT EXISTS public.wages_education (
     id SERIAL PRIMARY KEY,
     year INTEGER NOT NULL,
     education_level VARCHAR(50) NOT NULL,
@@ -78,7 +74,7 @@ CREATE TABLE public.wages_education (
 );
 
 -- Interest Rates
-CREATE TABLE public.interest_rates (
+CREATE TABLE IF NOT EXISTS public.interest_rates (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     fed_funds_target DECIMAL(5, 2),
@@ -96,23 +92,31 @@ CREATE TABLE public.interest_rates (
     UNIQUE(date)
 );
 
--- Zillow Housing Data
-CREATE TABLE public.zillow_housing (
-    id SERIAL PRIMARY KEY,
-    date DATE NOT NULL,
-    region_name VARCHAR(100) NOT NULL,
+-- Zillow regions: one row per region, referenced by zillow_housing.region_id.
+-- The database assigns region ids; the loaders upsert regions by region_name
+-- and read the ids back to map the facts (see dimensions.py). No foreign key
+-- is declared; it would not survive the shadow-table reloads of the facts.
+CREATE TABLE IF NOT EXISTS public.regions (
+    region_id SERIAL PRIMARY KEY,
+    region_name VARCHAR(100) NOT NULL UNIQUE,
     state VARCHAR(50) NOT NULL,
     metro_area VARCHAR(100),
     county_name VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Zillow Housing Data (monthly facts per region)
+CREATE TABLE IF NOT EXISTS public.zillow_housing (
+    region_id INTEGER NOT NULL,
+    date DATE NOT NULL,
     price DECIMAL(12, 2),
     price_mom DECIMAL(6, 3),
     price_yoy DECIMAL(6, 3),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(date, region_name)
+    PRIMARY KEY (region_id, date)
 );
 
 -- Zillow Home Value Index
-CREATE TABLE public.zillow_home_value_index (
+CREATE TABLE IF NOT EXISTS public.zillow_home_value_index (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     state VARCHAR(50) NOT NULL,
@@ -129,7 +133,9 @@ CREATE INDEX IF NOT EXISTS idx_census_state_year ON public.census_housing(state,
 CREATE INDEX IF NOT EXISTS idx_housing_prices_date ON public.kaggle_housing_prices(date);
 CREATE INDEX IF NOT EXISTS idx_wages_year ON public.wages_education(year);
 CREATE INDEX IF NOT EXISTS idx_interest_rates_date ON public.interest_rates(date);
-CREATE INDEX IF NOT EXISTS idx_zillow_date_region ON public.zillow_housing(date, region_name);
+-- Rows are loaded in date order, so a BRIN index (a few pages) serves the
+-- date filters; region lookups use the (region_id, date) primary key
+CREATE INDEX IF NOT EXISTS idx_zillow_date ON public.zillow_housing USING brin (date);
 CREATE INDEX IF NOT EXISTS idx_zillow_hvi_date_state ON public.zillow_home_value_index(date, state);
 
 -- Enable row level security but allow all operations
@@ -138,14 +144,24 @@ ALTER TABLE public.census_housing ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.kaggle_housing_prices ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.wages_education ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.interest_rates ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.regions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.zillow_housing ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.zillow_home_value_index ENABLE ROW LEVEL SECURITY;
 
 -- Create policies to allow all operations
+DROP POLICY IF EXISTS "Allow all" ON public.bls_housing_cpi;
 CREATE POLICY "Allow all" ON public.bls_housing_cpi FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.census_housing;
 CREATE POLICY "Allow all" ON public.census_housing FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.kaggle_housing_prices;
 CREATE POLICY "Allow all" ON public.kaggle_housing_prices FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.wages_education;
 CREATE POLICY "Allow all" ON public.wages_education FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.interest_rates;
 CREATE POLICY "Allow all" ON public.interest_rates FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.regions;
+CREATE POLICY "Allow all" ON public.regions FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.zillow_housing;
 CREATE POLICY "Allow all" ON public.zillow_housing FOR ALL USING (true);
+DROP POLICY IF EXISTS "Allow all" ON public.zillow_home_value_index;
 CREATE POLICY "Allow all" ON public.zillow_home_value_index FOR ALL USING (true);
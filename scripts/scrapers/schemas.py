@@ -0,0 +1,219 @@
+import os
+from pathlib import Path
+
+from storage import HAS_PYARROW, read_columns, read_frame, iter_frames, resolve_path
+
+# Set to pyarrow to parse CSVs with pyarrow's multithreaded reader (when installed)
+CSV_ENGINE_ENV = 'ETL_CSV_ENGINE'
+
+# Read schema of each pipeline artifact, keyed by logical path. Keys:
+#   dtypes        column -> dtype for named columns
+#   value_dtype   dtype of every other column (the per-region/per-series value columns);
+#                 when absent (census counts are nullable integers) they are inferred
+#   dates         date columns; read as text unless parse_dates=True
+#   categoricals  repeated text columns, read as 'category'
+#   usecols       columns read by default when the caller names none: a predicate
+#                 on column names (derived change columns that every consumer
+#                 recomputes are skipped)
+# Raw files are the cleaning inputs; processed files are written by the
+# scrapers; cleaned files by process_datasets.py.
+TEXT = 'str'
+FLOAT = 'float64'
+INT = 'int64'
+
+
+def _not_derived(col):
+    return not col.endswith(('_MoM', '_YoY'))
+
+
+SCHEMAS = {
+    # Raw downloads and API extracts
+    'data/bls/bls_housing_raw.csv': {
+        'dtypes': {'date': TEXT, 'series_id': TEXT, 'value': FLOAT},
+        'categoricals': ['series_name']
+    },
+    'data/census/census_housing_raw.csv': {
+        'dtypes': {'year': INT},
+        'categoricals': ['state']
+    },
+    'data/kaggle/housing/kaggle_housing_raw.csv': {
+        'dates': ['Unnamed: 0'],
+        'value_dtype': FLOAT
+    },
+    'data/kaggle/wages/kaggle_wages_raw.csv': {
+        'dtypes': {'year': INT},
+        'value_dtype': FLOAT
+    },
+    'data/kaggle/interest_rates/kaggle_interest_rates_raw.csv': {
+        'dtypes': {'Year': INT, 'Month': INT, 'Day': INT},
+        'value_dtype': FLOAT
+    },
+    'data/kaggle/zillow/kaggle_zillow_raw.csv': {
+        'dtypes': {'RegionID': INT, 'SizeRank': INT, 'RegionName': TEXT, 'RegionType': TEXT,
+                   'StateName': TEXT, 'State': TEXT, 'Metro': TEXT, 'CountyName': TEXT, 'City': TEXT},
+        'value_dtype': FLOAT
+    },
+    'data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_raw.csv': {
+        'dates': ['Unnamed: 0', 'Date'],
+        'value_dtype': FLOAT
+    },
+
+    # Processed by the scrapers
+    'data/bls/bls_housing_processed.csv': {
+        'dates': ['date'],
+        'value_dtype': FLOAT
+    },
+    'data/census/census_housing_processed.csv': {
+        'dtypes': {'year': INT, 'Median_Home_Value': FLOAT, 'Median_Monthly_Housing_Cost': FLOAT,
+                   'Vacancy_Rate': FLOAT, 'Homeownership_Rate': FLOAT},
+        'categoricals': ['state']
+    },
+    'data/kaggle/housing/kaggle_housing_processed.csv': {
+        'dates': ['date'],
+        'value_dtype': FLOAT,
+        'usecols': _not_derived
+    },
+    'data/kaggle/wages/kaggle_wages_processed.csv': {
+        'dtypes': {'Year': INT},
+        'value_dtype': FLOAT,
+        'usecols': _not_derived
+    },
+    'data/kaggle/interest_rates/kaggle_interest_rates_processed.csv': {
+        'dates': ['Date'],
+        'value_dtype': FLOAT,
+        'usecols': _not_derived
+    },
+    'data/kaggle/zillow/kaggle_zillow_processed.csv': {
+        'dates': ['Date'],
+        'dtypes': {'SizeRank': FLOAT},
+        'categoricals': ['RegionName', 'State', 'Metro', 'CountyName'],
+        'value_dtype': FLOAT
+    },
+    'data/kaggle/zillow_hvindex/kaggle_zillow_hvindex_processed.csv': {
+        'dates': ['index', 'Date', 'Unnamed: 0'],
+        'value_dtype': FLOAT,
+        'usecols': _not_derived
+    },
+
+    # Cleaned by process_datasets.py
+    'data/cleaned/zillow_hvi_cleaned.csv': {
+        'dates': ['date'],
+        'value_dtype': FLOAT,
+        'usecols': _not_derived
+    }
+}
+
+
+def csv_engine():
+    """CSV parser: ETL_CSV_ENGINE (pyarrow only when installed), else pandas' C parser"""
+    engine = os.getenv(CSV_ENGINE_ENV, 'c')
+    if engine == 'pyarrow' and not HAS_PYARROW:
+        return 'c'
+    return engine
+
+
+def schema_for(path):
+    """
+    Catalog entry of an artifact, matched on its logical path (any storage suffix,
+    optionally under a base directory).
+    Returns:
+        dict: Schema, empty for files not in the catalog.
+    """
+    logical = Path(path).with_suffix('.csv').as_posix()
+    for key, schema in SCHEMAS.items():
+        if logical == key or logical.endswith('/' + key):
+            return schema
+    return {}
+
+
+def read_dtypes(schema, columns, parse_dates=False, numeric=True, path=None):
+    """
+    Dtypes for the columns being read.
+    Args:
+        schema (dict): Catalog entry.
+        columns (list): Columns that will be read.
+        parse_dates (bool): Leave date columns to be parsed as dates instead of
+            text. Columnar files keep their stored date types either way.
+        numeric (bool): Include numeric dtypes; False keeps only text/category
+            types, letting pandas infer the numbers.
+        path (str or Path): Artifact being read; Parquet/Feather date columns keep their type.
+    Returns:
+        dict: Column -> dtype.
+    """
+    dates = set(schema.get('dates', []))
+    if path is not None and resolve_path(path).suffix != '.csv':
+        parse_dates = True
+    categoricals = set(schema.get('categoricals', []))
+    dtypes = {}
+    for col in columns:
+        if col in dates:
+            if not parse_dates:
+                dtypes[col] = TEXT
+        elif col in categoricals:
+            dtypes[col] = 'category'
+        elif col in schema.get('dtypes', {}):
+            dtypes[col] = schema['dtypes'][col]
+        elif schema.get('value_dtype'):
+            dtypes[col] = schema['value_dtype']
+    if not numeric:
+        dtypes = {col: dtype for col, dtype in dtypes.items() if dtype in (TEXT, 'category')}
+    return dtypes
+
+
+def _columns(path, schema, columns, project):
+    available = read_columns(path)
+    if columns is None and project:
+        columns = schema.get('usecols')
+    if columns is None:
+        return available
+    if callable(columns):
+        return [col for col in available if columns(col)]
+    return columns
+
+
+def read_dataset(path, columns=None, parse_dates=False, strict=True, project=True):
+    """
+    Read an artifact with its catalog schema: only the needed columns, with
+    fixed dtypes instead of per-run inference.
+
+    Args:
+        path (str or Path): Logical artifact path (see storage.resolve_path).
+        columns (list or callable): Columns to read; defaults to the schema's usecols (or all).
+        parse_dates (bool): Parse the schema's date columns as datetimes.
+        strict (bool): Raise if a value does not fit its numeric dtype. Readers
+            that inspect or clean dirty data pass False to fall back to inferring
+            the numeric columns (so the bad values can be reported or coerced).
+        project (bool): Apply the schema's usecols when columns is None; False reads every column.
+    Returns:
+        pd.DataFrame: The artifact's data.
+    """
+    schema = schema_for(path)
+    columns = _columns(path, schema, columns, project)
+    dates = [col for col in schema.get('dates', []) if col in columns] if parse_dates else None
+    try:
+        return read_frame(path, columns=columns, dtype=read_dtypes(schema, columns, parse_dates, path=path),
+                          parse_dates=dates or None, engine=csv_engine())
+    except (ValueError, TypeError):
+        if strict:
+            raise
+        print(f"{Path(path).name} has values that do not fit its schema; inferring numeric dtypes")
+        dtypes = read_dtypes(schema, columns, parse_dates, numeric=False, path=path)
+        return read_frame(path, columns=columns, dtype=dtypes, parse_dates=dates or None)
+
+
+def iter_dataset(path, columns=None, chunksize=100_000, dtype=None, project=True):
+    """
+    Stream an artifact in blocks with its catalog schema (see read_dataset).
+    Args:
+        path (str or Path): Logical artifact path.
+        columns (list or callable): Columns to read; defaults to the schema's usecols (or all).
+        chunksize (int): Rows per block.
+        dtype (dict): Overrides for individual columns.
+        project (bool): Apply the schema's usecols when columns is None.
+    Yields:
+        pd.DataFrame: Consecutive blocks.
+    """
+    schema = schema_for(path)
+    columns = _columns(path, schema, columns, project)
+    dtypes = {**read_dtypes(schema, columns, path=path), **(dtype or {})}
+    yield from iter_frames(path, columns=columns, chunksize=chunksize, dtype=dtypes)
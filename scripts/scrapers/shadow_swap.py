@@ -0,0 +1,176 @@
+import re
+
+SHADOW_SUFFIX = '_shadow'
+
+# Readers queue behind the swap's ACCESS EXCLUSIVE lock; fail fast rather than stall them
+SWAP_LOCK_TIMEOUT = '5s'
+
+
+def table_exists(conn, table_name):
+    """Return True if public.<table_name> exists"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (f'public.{table_name}',))
+        return cur.fetchone()[0] is not None
+
+
+def _constraints(cur, table_name):
+    """Primary key and unique constraints of a table as (name, definition)"""
+    cur.execute("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+        ORDER BY contype, conname
+    """, (f'public.{table_name}',))
+    return cur.fetchall()
+
+
+def _plain_indexes(cur, table_name):
+    """Indexes of a table not backing a constraint, as (name, definition)"""
+    cur.execute("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = 'public' AND i.tablename = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conrelid = %s::regclass AND c.conname = i.indexname
+          )
+        ORDER BY i.indexname
+    """, (table_name, f'public.{table_name}'))
+    return cur.fetchall()
+
+
+def _policies(cur, table_name):
+    """Row level security flag and policies of a table"""
+    cur.execute("SELECT relrowsecurity FROM pg_class WHERE oid = %s::regclass", (f'public.{table_name}',))
+    rls_enabled = cur.fetchone()[0]
+    cur.execute("""
+        SELECT policyname, permissive, roles, cmd, qual, with_check
+        FROM pg_policies
+        WHERE schemaname = 'public' AND tablename = %s
+    """, (table_name,))
+    return rls_enabled, cur.fetchall()
+
+
+def create_shadow_table(conn, table_name):
+    """
+    Create an empty, index-free copy of a table to bulk load into.
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Live table to copy the column layout from.
+    Returns:
+        str: Name of the shadow table.
+    """
+    shadow = f'{table_name}{SHADOW_SUFFIX}'
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS public.{shadow}")
+        # Columns, NOT NULL, defaults and CHECKs only; keys and indexes come after the load
+        cur.execute(f"""
+            CREATE TABLE public.{shadow}
+            (LIKE public.{table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        """)
+    return shadow
+
+
+def build_shadow_indexes(conn, table_name):
+    """
+    Recreate the live table's keys, indexes and policies on its loaded shadow, then ANALYZE it.
+
+    Shadow objects get the SHADOW_SUFFIX so their names don't collide with the
+    live table's; swap_in_shadow renames them back.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Live table whose shadow has been loaded.
+    """
+    shadow = f'{table_name}{SHADOW_SUFFIX}'
+    with conn.cursor() as cur:
+        for name, definition in _constraints(cur, table_name):
+            cur.execute(f'ALTER TABLE public.{shadow} ADD CONSTRAINT "{name}{SHADOW_SUFFIX}" {definition}')
+
+        for name, definition in _plain_indexes(cur, table_name):
+            definition = definition.replace(f'INDEX {name} ON', f'INDEX "{name}{SHADOW_SUFFIX}" ON', 1)
+            definition = re.sub(rf'ON (ONLY )?public\.{table_name}\b', f'ON public.{shadow}', definition, count=1)
+            cur.execute(definition)
+
+        rls_enabled, policies = _policies(cur, table_name)
+        if rls_enabled:
+            cur.execute(f"ALTER TABLE public.{shadow} ENABLE ROW LEVEL SECURITY")
+        for name, permissive, roles, command, qual, with_check in policies:
+            sql = f'CREATE POLICY "{name}" ON public.{shadow} AS {permissive} FOR {command}'
+            sql += f" TO {', '.join(roles)}"
+            if qual:
+                sql += f" USING ({qual})"
+            if with_check:
+                sql += f" WITH CHECK ({with_check})"
+            cur.execute(sql)
+
+        cur.execute(f"ANALYZE public.{shadow}")
+
+
+def swap_in_shadow(conn, table_name):
+    """
+    Atomically replace a live table with its loaded shadow and commit.
+
+    The transaction only transfers sequence ownership, drops the old table and
+    renames the shadow and its keys/indexes, so readers are blocked for
+    milliseconds and never see a missing or partially loaded table.
+
+    Args:
+        conn: psycopg2 connection with no open work besides the shadow build.
+        table_name (str): Live table to replace.
+    """
+    shadow = f'{table_name}{SHADOW_SUFFIX}'
+    with conn.cursor() as cur:
+        cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        cur.execute(f"LOCK TABLE public.{table_name} IN ACCESS EXCLUSIVE MODE")
+
+        constraint_names = [name for name, _ in _constraints(cur, shadow)]
+        index_names = [name for name, _ in _plain_indexes(cur, shadow)]
+
+        # SERIAL sequences are owned by the old table's column; keep them alive
+        # (tables keyed by their data, e.g. zillow_housing, have none)
+        cur.execute("""
+            SELECT attname, pg_get_serial_sequence(%s, attname)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """, (f'public.{table_name}', f'public.{table_name}'))
+        for column, sequence in cur.fetchall():
+            if sequence:
+                cur.execute(f'ALTER SEQUENCE {sequence} OWNED BY public.{shadow}."{column}"')
+
+        cur.execute(f"DROP TABLE public.{table_name}")
+        cur.execute(f"ALTER TABLE public.{shadow} RENAME TO {table_name}")
+        for name in constraint_names:
+            live_name = name[:-len(SHADOW_SUFFIX)]
+            cur.execute(f'ALTER TABLE public.{table_name} RENAME CONSTRAINT "{name}" TO "{live_name}"')
+        for name in index_names:
+            live_name = name[:-len(SHADOW_SUFFIX)]
+            cur.execute(f'ALTER INDEX public."{name}" RENAME TO "{live_name}"')
+    conn.commit()
+
+
+def reload_via_shadow(conn, table_name, load_func):
+    """
+    Reload a table with zero read downtime: build, load, index, analyze, swap.
+
+    Args:
+        conn: psycopg2 connection.
+        table_name (str): Existing table to reload.
+        load_func (callable): Called as load_func(conn, shadow_table_name) to bulk load the shadow.
+    """
+    try:
+        shadow = create_shadow_table(conn, table_name)
+        load_func(conn, shadow)
+        build_shadow_indexes(conn, table_name)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    try:
+        swap_in_shadow(conn, table_name)
+    except Exception:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS public.{table_name}{SHADOW_SUFFIX}")
+        conn.commit()
+        raise
@@ -0,0 +1,467 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from load_runs import fingerprint_source
+
+# pyarrow is in requirements.txt; without it every artifact is read and written as CSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    pq = None
+    HAS_PYARROW = False
+
+# Set to parquet, feather or csv to override the default intermediate format
+STORAGE_FORMAT_ENV = 'ETL_STORAGE_FORMAT'
+
+SUFFIXES = {'parquet': '.parquet', 'feather': '.feather', 'csv': '.csv'}
+# Codec of Parquet and Feather files: zstd is both smaller and faster to read than snappy
+COMPRESSION = 'zstd'
+
+# Region/state text columns repeated on every row; columnar artifacts store
+# them dictionary-encoded (read back as 'category')
+DICTIONARY_COLUMNS = (
+    'RegionName', 'RegionType', 'StateName', 'State', 'Metro', 'CountyName', 'City',
+    'state', 'series_id', 'series_name'
+)
+
+# Directory holding a project's data; artifacts below it are recorded in its manifest
+DATA_DIR = 'data'
+# One JSON line per artifact write (file, format, schema, rows, size, hash) in
+# <project root>/data/; the last line for a path describes its current file
+ARTIFACT_MANIFEST_NAME = 'artifacts.jsonl'
+# Rewrite the manifest with only the latest entries once it holds this many stale lines
+MANIFEST_COMPACT_LINES = 1000
+
+# Manifest path -> (size, mtime_ns, entries) of its last parse
+_manifests = {}
+
+
+def default_format():
+    """Intermediate format: ETL_STORAGE_FORMAT if set, else parquet when pyarrow is installed"""
+    fmt = os.getenv(STORAGE_FORMAT_ENV)
+    if fmt:
+        if fmt not in SUFFIXES:
+            raise ValueError(f"{STORAGE_FORMAT_ENV} must be one of {', '.join(SUFFIXES)}, got {fmt}")
+        return fmt
+    return 'parquet' if HAS_PYARROW else 'csv'
+
+
+def artifact_path(path, fmt):
+    """Path of a logical artifact (e.g. data/cleaned/wages_cleaned.csv) in a given format"""
+    return Path(path).with_suffix(SUFFIXES[fmt])
+
+
+def _format_of(path):
+    for fmt, suffix in SUFFIXES.items():
+        if Path(path).suffix == suffix:
+            return fmt
+    return 'csv'
+
+
+def resolve_path(path):
+    """
+    Find the file that currently holds a logical artifact.
+
+    Every format is checked next to the given path and the most recently
+    written one wins, so switching formats never reads a stale file. Columnar
+    files are ignored without pyarrow.
+
+    Args:
+        path (str or Path): Artifact path with any of the known suffixes.
+    Returns:
+        Path: Existing file, or the CSV path if nothing has been written yet.
+    """
+    candidates = [
+        artifact_path(path, fmt) for fmt in SUFFIXES
+        if (fmt == 'csv' or HAS_PYARROW) and artifact_path(path, fmt).exists()
+    ]
+    if not candidates:
+        return artifact_path(path, 'csv')
+    return max(candidates, key=lambda candidate: candidate.stat().st_mtime)
+
+
+def dictionary_encode(df):
+    """Cast the DICTIONARY_COLUMNS present in df to 'category'"""
+    columns = [col for col in DICTIONARY_COLUMNS
+               if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+    return df.astype({col: 'category' for col in columns}) if columns else df
+
+
+def decode_categories(df):
+    """Cast categorical columns back to their categories' dtype"""
+    columns = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    return df.astype({col: df[col].cat.categories.dtype for col in columns}) if columns else df
+
+
+def data_root(path):
+    """
+    Data directory an artifact lives in: the nearest enclosing DATA_DIR.
+    Args:
+        path (str or Path): Artifact path, relative to the working directory or absolute.
+    Returns:
+        Path: Absolute data directory, or None when the path is outside any.
+    """
+    for parent in Path(os.path.abspath(path)).parents:
+        if parent.name == DATA_DIR:
+            return parent
+    return None
+
+
+def manifest_path(path):
+    """Manifest recording an artifact (<project root>/data/artifacts.jsonl), or None outside a data root"""
+    root = data_root(path)
+    return root / ARTIFACT_MANIFEST_NAME if root is not None else None
+
+
+def _manifest_key(path, root):
+    """Artifact path relative to the project root (e.g. data/cleaned/wages_cleaned.csv)"""
+    return Path(os.path.abspath(path)).relative_to(root.parent).as_posix()
+
+
+def record_artifact(path, target, df, fmt, rows=None):
+    """
+    Append an artifact's file, schema, size and content hash to its project's manifest.
+
+    Paths are stored relative to the project root, so the entry is found from
+    any working directory. Files outside a data root (e.g. temporary files)
+    are not recorded.
+
+    Lines are appended in a single write, so concurrent writers (e.g. the
+    cleaning worker processes) never interleave or overwrite each other's entries.
+
+    Args:
+        path (str or Path): Logical artifact path.
+        target (Path): File written.
+        df (pd.DataFrame): Data written (or its first block), for the schema.
+        fmt (str): Storage format.
+        rows (int): Rows written; defaults to len(df).
+    Returns:
+        dict: The manifest entry, or None if the artifact is not recorded.
+    """
+    root = data_root(target)
+    if root is None:
+        return None
+    stat = target.stat()
+    entry = {
+        'path': _manifest_key(Path(path).with_suffix('.csv'), root),
+        'file': _manifest_key(target, root),
+        'format': fmt,
+        'compression': COMPRESSION if fmt != 'csv' else None,
+        'rows': len(df) if rows is None else rows,
+        'schema': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': fingerprint_source(target)['source_hash'],
+        'written_at': datetime.now(timezone.utc).isoformat()
+    }
+    with open(root / ARTIFACT_MANIFEST_NAME, 'a') as f:
+        f.write(json.dumps(entry, default=str) + '\n')
+    return entry
+
+
+def compact_manifest(manifest, entries):
+    """
+    Rewrite a manifest with only the latest entry per artifact.
+
+    The new file replaces the old one atomically; an entry appended by another
+    process in between is lost, which only costs that artifact a recomputed hash.
+    """
+    partial = _partial_path(Path(manifest))
+    with open(partial, 'w') as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, default=str) + '\n')
+    os.replace(partial, manifest)
+
+
+def read_manifest(manifest):
+    """
+    Current manifest entry of every recorded artifact.
+
+    The parse is cached until the file changes, and a manifest with more than
+    MANIFEST_COMPACT_LINES superseded lines is compacted.
+
+    Args:
+        manifest (str or Path): Manifest file (see manifest_path).
+    Returns:
+        dict: Project-relative logical path -> latest entry (empty if nothing was recorded yet).
+    """
+    if manifest is None or not os.path.exists(manifest):
+        return {}
+    stat = os.stat(manifest)
+    cached = _manifests.get(str(manifest))
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    entries = {}
+    lines = 0
+    with open(manifest) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry['path']] = entry
+                lines += 1
+    if lines - len(entries) > MANIFEST_COMPACT_LINES:
+        compact_manifest(manifest, entries)
+        stat = os.stat(manifest)
+    _manifests[str(manifest)] = (stat.st_size, stat.st_mtime_ns, entries)
+    return entries
+
+
+def artifact_hash(path, manifest=None):
+    """
+    sha256 of the file holding an artifact, taken from the manifest when the
+    file's size and mtime still match it, else computed.
+    Args:
+        path (str or Path): Logical artifact path or file.
+        manifest (dict): read_manifest() output, to avoid re-reading it per call.
+    Returns:
+        str: Hex digest.
+    """
+    target = resolve_path(path)
+    stat = target.stat()
+    root = data_root(target)
+    if root is not None:
+        entries = read_manifest(root / ARTIFACT_MANIFEST_NAME) if manifest is None else manifest
+        entry = entries.get(_manifest_key(target.with_suffix('.csv'), root))
+        if entry and entry['file'] == _manifest_key(target, root) and entry['size'] == stat.st_size \
+                and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+    return fingerprint_source(target)['source_hash']
+
+
+def _partial_path(target):
+    """Temporary file an artifact is written to before being renamed into place"""
+    return target.with_name(f'{target.name}.{os.getpid()}.tmp')
+
+
+def _require_pyarrow(fmt):
+    if fmt != 'csv' and not HAS_PYARROW:
+        raise ImportError(f"pyarrow is required to write {fmt} files; install it or set {STORAGE_FORMAT_ENV}=csv")
+
+
+def write_frame(df, path, fmt=None):
+    """
+    Write a DataFrame as an intermediate artifact and record it in the manifest.
+
+    Parquet and Feather files are zstd-compressed, with DICTIONARY_COLUMNS
+    dictionary-encoded. The file is written under a temporary name and renamed
+    into place, so a failed write never leaves a truncated artifact.
+
+    Args:
+        df (pd.DataFrame): Data to write (the index is not stored).
+        path (str or Path): Logical artifact path; the suffix is replaced to match fmt.
+        fmt (str): 'parquet', 'feather' or 'csv'; defaults to default_format().
+    Returns:
+        Path: File written.
+    """
+    fmt = fmt or default_format()
+    _require_pyarrow(fmt)
+    target = artifact_path(path, fmt)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = _partial_path(target)
+    try:
+        if fmt == 'parquet':
+            df = dictionary_encode(df)
+            df.to_parquet(partial, index=False, compression=COMPRESSION)
+        elif fmt == 'feather':
+            df = dictionary_encode(df)
+            df.reset_index(drop=True).to_feather(partial, compression=COMPRESSION)
+        else:
+            df.to_csv(partial, index=False)
+        os.replace(partial, target)
+    except BaseException:
+        if partial.exists():
+            partial.unlink()
+        raise
+    record_artifact(path, target, df, fmt)
+    return target
+
+
+def read_columns(path):
+    """Column names of an artifact without reading its data"""
+    path = resolve_path(path)
+    fmt = _format_of(path)
+    if fmt == 'parquet':
+        return pq.read_schema(path).names
+    if fmt == 'feather':
+        return pa.ipc.open_file(path).schema.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_frame(path, columns=None, dtype=None, parse_dates=None, engine=None):
+    """
+    Read an artifact in whichever format it was written, loading only the needed columns.
+
+    CSVs are parsed with usecols/dtype as before; Parquet and Feather files
+    are read with column projection and keep their stored types, with dtype
+    applied afterwards to the columns present.
+
+    Args:
+        path (str or Path): Logical artifact path (see resolve_path).
+        columns (list or callable): Columns to load, or a predicate on column names.
+        dtype (dict): Column -> dtype.
+        parse_dates (list): Columns to parse as datetimes.
+        engine (str): pandas CSV parser ('c' or 'pyarrow'); ignored for columnar files.
+    Returns:
+        pd.DataFrame: The artifact's data.
+    """
+    path = resolve_path(path)
+    fmt = _format_of(path)
+    if callable(columns):
+        columns = [col for col in read_columns(path) if columns(col)]
+
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, dtype=dtype, parse_dates=parse_dates, engine=engine)
+    if fmt == 'parquet':
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_feather(path, columns=columns)
+    if dtype:
+        df = df.astype({col: col_dtype for col, col_dtype in dtype.items() if col in df.columns})
+    for col in parse_dates or []:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def iter_frames(path, columns=None, chunksize=100_000, dtype=None):
+    """
+    Read an artifact in blocks of about chunksize rows, in whichever format it was written.
+
+    CSVs are parsed chunk by chunk, Parquet files by record batch and Feather
+    files batch by batch from a memory map, so only one block is in memory.
+
+    Args:
+        path (str or Path): Logical artifact path (see resolve_path).
+        columns (list or callable): Columns to load, or a predicate on column names.
+        chunksize (int): Rows per block (Feather blocks follow the file's record batches).
+        dtype (dict): Column -> dtype, applied after reading for Parquet and Feather.
+    Yields:
+        pd.DataFrame: Consecutive blocks of the artifact.
+    """
+    path = resolve_path(path)
+    fmt = _format_of(path)
+    if callable(columns):
+        columns = [col for col in read_columns(path) if columns(col)]
+
+    if fmt == 'csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=dtype)
+        return
+
+    def typed(df):
+        if dtype:
+            df = df.astype({col: col_dtype for col, col_dtype in dtype.items() if col in df.columns})
+        return df
+
+    if fmt == 'parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield typed(batch.to_pandas())
+    else:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield typed((batch.select(columns) if columns is not None else batch).to_pandas())
+
+
+class FrameWriter:
+    """
+    Append DataFrame blocks with one schema to a single artifact, recorded in
+    the manifest on close.
+
+    Blocks go to a temporary file that close() renames into place. Used as a
+    context manager, a write that raises (or is interrupted) discards the
+    temporary file instead, leaving the previous artifact and manifest as
+    they were.
+
+    Blocks are written as they come, so only one is in memory. Parquet text
+    columns are dictionary-encoded page by page by the Parquet writer, so the
+    blocks' category sets never have to agree. Feather files are Arrow IPC
+    files written one record batch per block; the IPC file format cannot
+    replace a dictionary between batches, so categorical columns are stored
+    decoded there.
+    """
+
+    def __init__(self, path, fmt=None):
+        """
+        Args:
+            path (str or Path): Logical artifact path.
+            fmt (str): Output format, defaults to default_format().
+        """
+        self.fmt = fmt or default_format()
+        _require_pyarrow(self.fmt)
+        self.path = artifact_path(path, self.fmt)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.partial_path = _partial_path(self.path)
+        self.logical_path = path
+        self.rows = 0
+        self._first = None
+        self._started = False
+        self._writer = None
+        self._sink = None
+        self._schema = None
+
+    def write(self, df):
+        """Append one block"""
+        if self.fmt == 'parquet':
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.partial_path, table.schema, compression=COMPRESSION)
+            self._writer.write_table(table)
+        elif self.fmt == 'feather':
+            table = pa.Table.from_pandas(decode_categories(df), preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._sink = pa.OSFile(str(self.partial_path), 'wb')
+                self._writer = pa.ipc.new_file(self._sink, self._schema,
+                                               options=pa.ipc.IpcWriteOptions(compression=COMPRESSION))
+            self._writer.write_table(table.cast(self._schema))
+        else:
+            df.to_csv(self.partial_path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        if self._first is None:
+            self._first = df.head(0)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self):
+        """Finish the artifact, move it into place and record it"""
+        self._close_writer()
+        if self._first is not None:
+            os.replace(self.partial_path, self.path)
+            schema = decode_categories(self._first) if self.fmt == 'feather' else self._first
+            record_artifact(self.logical_path, self.path, schema, self.fmt, rows=self.rows)
+            self._first = None
+
+    def _close_writer(self):
+        try:
+            if self._writer is not None:
+                self._writer.close()
+        finally:
+            self._writer = None
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+    def abort(self):
+        """Discard everything written so far; the existing artifact is left untouched"""
+        try:
+            self._close_writer()
+        finally:
+            self._first = None
+        if self.partial_path.exists():
+            self.partial_path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+# Decimal places kept for MoM/YoY changes (matches DECIMAL(6, 3) in schema.sql)
+CHANGE_DECIMALS = 3
+
+# Output column -> (source column, periods) for each dataset with derived changes
+BLS_CHANGES = {
+    'housing_cpi_mom': ('housing_cpi', 1),
+    'shelter_cpi_mom': ('shelter_cpi', 1),
+    'fuels_utilities_mom': ('fuels_utilities_cpi', 1),
+    'furnishings_mom': ('household_furnishings_cpi', 1),
+    'housing_cpi_yoy': ('housing_cpi', 12),
+    'shelter_cpi_yoy': ('shelter_cpi', 12),
+    'fuels_utilities_yoy': ('fuels_utilities_cpi', 12),
+    'furnishings_yoy': ('household_furnishings_cpi', 12)
+}
+
+KAGGLE_HOUSING_CHANGES = {
+    'us_national_mom': ('us_national', 1),
+    'city_20_mom': ('city_composite_20', 1),
+    'city_10_mom': ('city_composite_10', 1),
+    'us_national_yoy': ('us_national', 12),
+    'city_20_yoy': ('city_composite_20', 12),
+    'city_10_yoy': ('city_composite_10', 12)
+}
+
+WAGES_CHANGES = {
+    'wage_yoy_change': ('wage_value', 1)
+}
+
+INTEREST_RATE_CHANGES = {
+    'target_rate_mom': ('fed_funds_target', 1),
+    'effective_rate_mom': ('effective_rate', 1),
+    'target_rate_yoy': ('fed_funds_target', 12),
+    'effective_rate_yoy': ('effective_rate', 12)
+}
+
+ZILLOW_HVI_CHANGES = {
+    'hvi_mom': ('home_value_index', 1),
+    'hvi_yoy': ('home_value_index', 12)
+}
+
+
+def _as_list(columns):
+    """Normalize a column name or list of names to a list"""
+    if columns is None:
+        return []
+    if isinstance(columns, str):
+        return [columns]
+    return list(columns)
+
+
+def add_changes(df, changes, group_by=None, order_by=None, decimals=CHANGE_DECIMALS):
+    """
+    Add period-over-period percentage changes to a DataFrame in one vectorized pass.
+
+    The frame is sorted once by (group_by, order_by), every distinct period is
+    shifted once within its group for all source columns together, and the
+    ratios are computed as plain array arithmetic. Infinite results become NaN
+    (written as NULL by the loaders) and all change columns are rounded together.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to process.
+        changes (dict): Output column -> (source column, periods).
+        group_by (str or list): Columns identifying independent series (e.g. 'state').
+        order_by (str or list): Columns giving the time order within each series.
+        decimals (int): Decimal places to round the change columns to.
+    Returns:
+        pd.DataFrame: The sorted DataFrame with change columns added.
+    """
+    group_cols = _as_list(group_by)
+    sort_cols = group_cols + _as_list(order_by)
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind='mergesort', ignore_index=True)
+
+    sources = list(dict.fromkeys(source for source, _ in changes.values()))
+    values = df[sources].apply(pd.to_numeric, errors='coerce').astype('float64')
+
+    # Shift every source column once per distinct period
+    shifted = {}
+    for periods in {periods for _, periods in changes.values()}:
+        if group_cols:
+            keys = [df[col] for col in group_cols]
+            shifted[periods] = values.groupby(keys, sort=False).shift(periods).to_numpy()
+        else:
+            shifted[periods] = values.shift(periods).to_numpy()
+
+    current = values.to_numpy()
+    position = {source: i for i, source in enumerate(sources)}
+    result = np.empty((len(df), len(changes)), dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, (source, periods) in enumerate(changes.values()):
+            j = position[source]
+            np.divide(current[:, j], shifted[periods][:, j], out=result[:, i])
+        result -= 1
+
+    result[~np.isfinite(result)] = np.nan
+    np.round(result, decimals, out=result)
+
+    return df.assign(**{column: result[:, i] for i, column in enumerate(changes)})
+
+
+def melt_wages(df):
+    """
+    Reshape the wide wages file into one row per year/group/education level.
+    Args:
+        df (pd.DataFrame): Wages data with a 'Year' column and '<group>_<level>' columns.
+    Returns:
+        pd.DataFrame: Long-format wages with year, demographic_group, education_level, wage_value.
+    """
+    melted_df = pd.melt(df, id_vars=['Year'], var_name='category', value_name='wage_value')
+    melted_df[['demographic_group', 'education_level']] = melted_df['category'].str.split('_', n=1, expand=True)
+    melted_df = melted_df.drop('category', axis=1)
+    return melted_df.rename(columns={'Year': 'year'})
+
+
+def melt_states(df):
+    """
+    Reshape the wide Zillow HVI file into one row per date/state.
+    Args:
+        df (pd.DataFrame): HVI data with a 'date' column and one column per state.
+    Returns:
+        pd.DataFrame: Long-format HVI with date, state, home_value_index, one row per key.
+    """
+    df = df.assign(date=pd.to_datetime(df['date']))
+    state_cols = [col for col in df.columns if col != 'date' and not col.endswith('_MoM')]
+    df_melted = pd.melt(df, id_vars=['date'], value_vars=state_cols,
+                        var_name='state', value_name='home_value_index')
+    df_melted['home_value_index'] = pd.to_numeric(df_melted['home_value_index'], errors='coerce')
+
+    # Keep the highest value for any repeated date/state
+    df_melted = df_melted.sort_values(['date', 'state', 'home_value_index'], ascending=[True, True, False])
+    return df_melted.drop_duplicates(['date', 'state'], keep='first')
+
+
+def latest_per_key(keys):
+    """
+    Build a reshape step that keeps the last row for each key combination.
+    Args:
+        keys (list): Columns that identify a row.
+    Returns:
+        callable: Function taking and returning a DataFrame.
+    """
+    def reshape(df):
+        return df.sort_values(keys).drop_duplicates(keys, keep='last')
+    return reshape
+
+
+def region_dimension(df):
+    """
+    Reduce Zillow rows to one row per region with its latest attributes.
+    Args:
+        df (pd.DataFrame): Renamed Zillow rows with date, region_name and the region attributes.
+    Returns:
+        pd.DataFrame: One row per region_name; region_id is assigned by the database.
+    """
+    return df.sort_values(['region_name', 'date']).drop_duplicates('region_name', keep='last')
+
+
+def region_facts(df):
+    """
+    Keep the last row per date/region.
+    Args:
+        df (pd.DataFrame): Renamed Zillow rows.
+    Returns:
+        pd.DataFrame: Rows keyed by (region_name, date); the loaders replace
+            region_name by its region_id (see dimensions.resolve_keys).
+    """
+    return latest_per_key(['date', 'region_name'])(df)
+
+
+def _shifted_change(values, periods):
+    """pct_change along the date axis of a (rows, dates) matrix, NaN for the first periods"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] > periods:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, periods:] = values[:, periods:] / values[:, :-periods] - 1
+    return out
+
+
+def iter_wide_to_long(df, id_cols, var_name='Date', value_name='Price', changes=None,
+                      sort_by=None, value_dtype='float64', change_dtype='float32', block_size=None):
+    """
+    Reshape a wide file (one row per region, one column per date) to long format in region blocks.
+
+    Works on the wide value matrix directly: dates are parsed and ordered once,
+    regions are ordered once, and changes are shifted-array arithmetic along the
+    date axis, so every region's series is computed independently without a
+    long-format sort or groupby. Text id columns are emitted as categoricals.
+    Values keep float64 by default (prices are loaded into DECIMAL(12, 2));
+    changes, rounded to 3 decimals downstream, fit in float32.
+
+    Args:
+        df (pd.DataFrame): Wide data; every column not in id_cols (or 'Unnamed: 0') is a date.
+        id_cols (list): Columns identifying a row (region).
+        var_name (str): Name of the long date column.
+        value_name (str): Name of the long value column.
+        changes (dict): Output column -> periods, e.g. {'Price_MoM': 1, 'Price_YoY': 12}.
+        sort_by (str): Id column to order regions by (stable); None keeps file order.
+        value_dtype (str): dtype of the value column.
+        change_dtype (str): dtype of the change columns.
+        block_size (int): Regions per yielded block; None yields a single block.
+    Yields:
+        pd.DataFrame: Long rows ordered by region, then date. A frame without
+            regions yields one empty block with the long columns.
+    """
+    changes = changes or {}
+    df = df.reset_index(drop=True)
+    date_cols = [col for col in df.columns if col not in id_cols and col != 'Unnamed: 0']
+    dates = pd.to_datetime(pd.Index(date_cols))
+    date_order = np.argsort(dates.values, kind='stable')
+    dates = dates.values[date_order]
+
+    if sort_by:
+        region_order = df[sort_by].sort_values(kind='mergesort').index.to_numpy()
+    else:
+        region_order = np.arange(len(df))
+    values = df[date_cols].to_numpy(dtype='float64')[np.ix_(region_order, date_order)]
+    ids = df[id_cols].iloc[region_order].reset_index(drop=True)
+
+    # Encode text ids once; blocks repeat integer codes instead of strings
+    encoded = {}
+    for col in id_cols:
+        if pd.api.types.is_numeric_dtype(ids[col]):
+            encoded[col] = (ids[col].to_numpy(), None)
+        else:
+            categorical = pd.Categorical(ids[col])
+            encoded[col] = (categorical.codes, categorical.categories)
+
+    n_dates = len(dates)
+    block_size = block_size or max(len(ids), 1)
+    for start in range(0, max(len(ids), 1), block_size):
+        stop = min(start + block_size, len(ids))
+        block_values = values[start:stop]
+        block = {}
+        for col in id_cols:
+            codes, categories = encoded[col]
+            repeated = np.repeat(codes[start:stop], n_dates)
+            block[col] = repeated if categories is None else pd.Categorical.from_codes(repeated, categories)
+        block[var_name] = np.tile(dates, stop - start)
+        block[value_name] = block_values.ravel().astype(value_dtype)
+        for column, periods in changes.items():
+            block[column] = _shifted_change(block_values, periods).ravel().astype(change_dtype)
+        yield pd.DataFrame(block)
+
+
+def wide_to_long(df, id_cols, **kwargs):
+    """Reshape a wide file to long format in one block (see iter_wide_to_long)"""
+    kwargs.pop('block_size', None)
+    return next(iter_wide_to_long(df, id_cols, **kwargs))
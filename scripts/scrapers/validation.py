@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Issue kinds that would make the database reject (or silently corrupt) a row
+ERROR_KINDS = ('overflow', 'nonfinite', 'null', 'too_long')
+# Issue kinds the database accepts by rounding
+WARNING_KINDS = ('scale',)
+
+# Tolerance when checking that a float has no digits beyond the column scale
+SCALE_TOLERANCE = 1e-6
+
+
+class SchemaValidator:
+    """Validate DataFrames against column constraints read once from information_schema"""
+
+    def __init__(self, conn):
+        """
+        Args:
+            conn: psycopg2 connection used to read information_schema.columns.
+        """
+        self.conn = conn
+        self._constraints = {}
+
+    def constraints(self, table_name):
+        """
+        Column constraints for a table, queried on first use and cached.
+        Args:
+            table_name (str): Table in the public schema.
+        Returns:
+            dict: Column name -> {'data_type', 'precision', 'scale', 'nullable', 'max_length'}.
+        """
+        if table_name not in self._constraints:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT column_name, data_type, numeric_precision, numeric_scale,
+                           is_nullable, character_maximum_length
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = %s
+                """, (table_name,))
+                self._constraints[table_name] = {
+                    name: {
+                        'data_type': data_type,
+                        'precision': precision,
+                        'scale': scale,
+                        'nullable': is_nullable == 'YES',
+                        'max_length': max_length
+                    }
+                    for name, data_type, precision, scale, is_nullable, max_length in cur.fetchall()
+                }
+        return self._constraints[table_name]
+
+    def validate(self, df, table_name):
+        """
+        Check every constrained column of a batch in one vectorized pass.
+
+        Numeric columns are checked together as a single float matrix for
+        non-finite values, precision overflow (after rounding to the column
+        scale, as PostgreSQL does) and digits beyond the scale. NOT NULL
+        columns are checked for missing values and VARCHAR columns for length.
+
+        Args:
+            df (pd.DataFrame): Batch to validate; only columns present in the table are checked.
+            table_name (str): Target table.
+        Returns:
+            dict: 'table', 'rows', 'errors' and 'warnings' counts, and 'issues' mapping
+                column -> issue kind -> list of offending row positions.
+        """
+        constraints = self.constraints(table_name)
+        columns = [col for col in df.columns if col in constraints]
+        issues = {}
+
+        def add(column, kind, mask):
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                issues.setdefault(column, {})[kind] = positions.tolist()
+
+        numeric_cols = [col for col in columns if constraints[col]['data_type'] == 'numeric'
+                        and constraints[col]['precision'] is not None]
+        if numeric_cols:
+            values = df[numeric_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            precision = np.array([constraints[col]['precision'] for col in numeric_cols])
+            scale = np.array([constraints[col]['scale'] or 0 for col in numeric_cols])
+            factor = 10.0 ** scale
+            limit = 10.0 ** (precision - scale)
+
+            finite = np.isfinite(values)
+            nonfinite = np.isinf(values)
+            with np.errstate(invalid='ignore'):
+                scaled = values * factor
+                rounded = np.round(scaled)
+                overflow = finite & (np.abs(rounded / factor) >= limit)
+                excess_scale = finite & ~overflow & (np.abs(scaled - rounded) > SCALE_TOLERANCE)
+
+            for i, col in enumerate(numeric_cols):
+                add(col, 'nonfinite', nonfinite[:, i])
+                add(col, 'overflow', overflow[:, i])
+                add(col, 'scale', excess_scale[:, i])
+
+        not_null_cols = [col for col in columns if not constraints[col]['nullable']]
+        if not_null_cols:
+            nulls = df[not_null_cols].isna().to_numpy()
+            for i, col in enumerate(not_null_cols):
+                add(col, 'null', nulls[:, i])
+
+        for col in columns:
+            max_length = constraints[col]['max_length']
+            if max_length is not None:
+                add(col, 'too_long', (df[col].astype('string').str.len() > max_length).fillna(False).to_numpy())
+
+        def count(kinds):
+            return sum(len(rows) for column_issues in issues.values()
+                       for kind, rows in column_issues.items() if kind in kinds)
+
+        return {
+            'table': table_name,
+            'rows': len(df),
+            'errors': count(ERROR_KINDS),
+            'warnings': count(WARNING_KINDS),
+            'issues': issues
+        }
+
+
+def format_report(report, max_rows=5):
+    """
+    Summarize a validation report in a few lines.
+    Args:
+        report (dict): Report returned by SchemaValidator.validate.
+        max_rows (int): Number of offending row positions to show per issue.
+    Returns:
+        str: One line per column/issue with counts and sample row positions.
+    """
+    lines = [f"{report['table']}: {report['rows']} rows, "
+             f"{report['errors']} errors, {report['warnings']} warnings"]
+    for column, column_issues in report['issues'].items():
+        for kind, rows in column_issues.items():
+            sample = ', '.join(str(row) for row in rows[:max_rows])
+            more = ', ...' if len(rows) > max_rows else ''
+            lines.append(f"  {column}: {kind} x{len(rows)} (rows {sample}{more})")
+    return '\n'.join(lines)
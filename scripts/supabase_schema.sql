@@ -7,8 +7,12 @@ DROP TABLE IF EXISTS public.census_housing CASCADE;
 DROP TABLE IF EXISTS public.kaggle_housing_prices CASCADE;
 DROP TABLE IF EXISTS public.wages_education CASCADE;
 DROP TABLE IF EXISTS public.interest_rates CASCADE;
+DROP TABLE IF EXISTS public.regions CASCADE;
 DROP TABLE IF EXISTS public.zillow_housing CASCADE;
 DROP TABLE IF EXISTS public.zillow_home_value_index CASCADE;
+-- Load history and checkpoints describe the tables dropped above (see load_runs.py, checkpoints.py)
+DROP TABLE IF EXISTS public.load_runs CASCADE;
+DROP TABLE IF EXISTS public.load_checkpoints CASCADE;
 
 -- BLS Housing CPI Data
 CREATE TABLE public.bls_housing_cpi (
@@ -96,19 +100,27 @@ CREATE TABLE public.interest_rates (
     UNIQUE(date)
 );
 
--- Zillow Housing Data
-CREATE TABLE public.zillow_housing (
-    id SERIAL PRIMARY KEY,
-    date DATE NOT NULL,
-    region_name VARCHAR(100) NOT NULL,
+-- Zillow regions: one row per region, referenced by zillow_housing.region_id.
+-- The database assigns region ids; the loaders upsert regions by region_name
+-- and read the ids back to map the facts (see dimensions.py). No foreign key
+-- is declared; it would not survive the shadow-table reloads of the facts.
+CREATE TABLE public.regions (
+    region_id SERIAL PRIMARY KEY,
+    region_name VARCHAR(100) NOT NULL UNIQUE,
     state VARCHAR(50) NOT NULL,
     metro_area VARCHAR(100),
     county_name VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Zillow Housing Data (monthly facts per region)
+CREATE TABLE public.zillow_housing (
+    region_id INTEGER NOT NULL,
+    date DATE NOT NULL,
     price DECIMAL(12, 2),
     price_mom DECIMAL(6, 3),
     price_yoy DECIMAL(6, 3),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(date, region_name)
+    PRIMARY KEY (region_id, date)
 );
 
 -- Zillow Home Value Index
@@ -129,7 +141,9 @@ CREATE INDEX IF NOT EXISTS idx_census_state_year ON public.census_housing(state,
 CREATE INDEX IF NOT EXISTS idx_housing_prices_date ON public.kaggle_housing_prices(date);
 CREATE INDEX IF NOT EXISTS idx_wages_year ON public.wages_education(year);
 CREATE INDEX IF NOT EXISTS idx_interest_rates_date ON public.interest_rates(date);
-CREATE INDEX IF NOT EXISTS idx_zillow_date_region ON public.zillow_housing(date, region_name);
+-- Rows are loaded in date order, so a BRIN index (a few pages) serves the
+-- date filters; region lookups use the (region_id, date) primary key
+CREATE INDEX IF NOT EXISTS idx_zillow_date ON public.zillow_housing USING brin (date);
 CREATE INDEX IF NOT EXISTS idx_zillow_hvi_date_state ON public.zillow_home_value_index(date, state);
 
 -- Enable row level security but allow all operations
@@ -138,6 +152,7 @@ ALTER TABLE public.census_housing ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.kaggle_housing_prices ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.wages_education ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.interest_rates ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.regions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.zillow_housing ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.zillow_home_value_index ENABLE ROW LEVEL SECURITY;
 
@@ -147,5 +162,6 @@ CREATE POLICY "Allow all" ON public.census_housing FOR ALL USING (true);
 CREATE POLICY "Allow all" ON public.kaggle_housing_prices FOR ALL USING (true);
 CREATE POLICY "Allow all" ON public.wages_education FOR ALL USING (true);
 CREATE POLICY "Allow all" ON public.interest_rates FOR ALL USING (true);
+CREATE POLICY "Allow all" ON public.regions FOR ALL USING (true);
 CREATE POLICY "Allow all" ON public.zillow_housing FOR ALL USING (true);
 CREATE POLICY "Allow all" ON public.zillow_home_value_index FOR ALL USING (true);
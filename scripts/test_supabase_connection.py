@@ -83,6 +83,7 @@ def test_connection():
             'kaggle_housing_prices',
             'wages_education',
             'interest_rates',
+            'regions',
             'zillow_housing',
             'zillow_home_value_index'
         ]